@@ -0,0 +1,87 @@
+"""
+=============================================================================
+PRESUPUESTO DE ARRANQUE: tiempo de `import normas_github`
+=============================================================================
+Importa el módulo en un intérprete nuevo con `python -X importtime` varias veces
+y toma la mediana del tiempo acumulado. Falla (código 1) si supera el presupuesto
+o si el import arrastra alguna dependencia pesada, que solo debe cargarse en la
+etapa que la usa. También mide inicializar() (configuración + keywords).
+
+Uso:
+    python benchmarks/bench_import.py [repeticiones]
+
+Variables:
+    IMPORT_PRESUPUESTO_MS   presupuesto para el import (por defecto 150 ms)
+"""
+
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# Ninguna de estas debe cargarse al importar el módulo
+PESADAS = ["numpy", "scipy", "sklearn", "pandas", "selenium", "googleapiclient",
+           "google.oauth2", "requests", "bs4", "lxml"]
+
+SONDA = """
+import sys, time, io, contextlib
+inicio = time.perf_counter()
+import normas_github
+with contextlib.redirect_stdout(io.StringIO()):
+    normas_github.inicializar({})
+print("INIT", (time.perf_counter() - inicio) * 1000)
+print("CARGADAS", ",".join(m for m in %r if m in sys.modules))
+""" % (PESADAS,)
+
+
+def medir_una_vez():
+    """(ms del import según -X importtime, ms de import + inicializar, dependencias pesadas cargadas)"""
+    proceso = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", SONDA],
+        cwd=RAIZ, capture_output=True, text=True, check=True
+    )
+    # Línea de -X importtime: "import time: self [us] | cumulative | nombre"
+    acumulado = None
+    for linea in proceso.stderr.splitlines():
+        m = re.match(r"import time:\s+\d+\s+\|\s+(\d+)\s+\|\s+normas_github$", linea)
+        if m:
+            acumulado = int(m.group(1)) / 1000
+    salida = dict((linea + " ").split(" ", 1) for linea in proceso.stdout.splitlines())
+    cargadas = [m for m in salida["CARGADAS"].strip().split(",") if m]
+    return acumulado, float(salida["INIT"]), cargadas
+
+
+def main():
+    repeticiones = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    presupuesto = float(os.getenv("IMPORT_PRESUPUESTO_MS", "150"))
+
+    imports, inits, cargadas = [], [], set()
+    for _ in range(repeticiones):
+        t_import, t_init, pesadas = medir_una_vez()
+        imports.append(t_import)
+        inits.append(t_init)
+        cargadas.update(pesadas)
+
+    mediana = statistics.median(imports)
+    print(f"📏 {repeticiones} arranques en intérpretes nuevos")
+    print(f"   {'import normas_github':<38} {mediana:8.1f} ms (mediana)")
+    print(f"   {'import + inicializar()':<38} {statistics.median(inits):8.1f} ms (mediana)")
+    print(f"   {'presupuesto del import':<38} {presupuesto:8.1f} ms")
+
+    ok = True
+    if cargadas:
+        print(f"   ❌ Dependencias pesadas cargadas al importar: {', '.join(sorted(cargadas))}")
+        ok = False
+    if mediana > presupuesto:
+        print(f"   ❌ El import supera el presupuesto por {mediana - presupuesto:.1f} ms")
+        ok = False
+    if ok:
+        print("   ✅ Dentro del presupuesto")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
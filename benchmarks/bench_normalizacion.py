@@ -0,0 +1,86 @@
+"""
+=============================================================================
+MICRO-BENCHMARK: normalizar_texto (antes / después)
+=============================================================================
+Compara la normalización original (re.sub sin compilar + NFKD en cada llamada)
+con la actual (tabla de traducción + caché LRU + normalizar_lote) sobre textos
+con la forma de los candidatos del PASO 8 y de las filas de Sheets.
+
+Uso:
+    python benchmarks/bench_normalizacion.py [repeticiones]
+"""
+
+import contextlib
+import io
+import os
+import re
+import sys
+import time
+import unicodedata
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import normas_github as ng
+
+with contextlib.redirect_stdout(io.StringIO()):
+    ng.inicializar()
+
+
+def normalizar_texto_original(texto):
+    """Implementación previa, copiada tal cual como referencia"""
+    if not isinstance(texto, str):
+        return ""
+    texto = texto.lower()
+    texto = unicodedata.normalize('NFKD', texto).encode('ascii', 'ignore').decode('utf-8')
+    texto = re.sub(r'[^a-z0-9\s]', ' ', texto)
+    texto = re.sub(r'\s+', ' ', texto).strip()
+    return texto
+
+
+def textos_de_prueba():
+    """~60 candidatos únicos; cada uno se normaliza varias veces como en el filtrado real"""
+    sectores = ["ENERGÍA Y MINAS", "ECONOMÍA Y FINANZAS", "ORGANISMOS REGULADORES",
+                "PRESIDENCIA DEL CONSEJO DE MINISTROS", "EDUCACIÓN", "SALUD"]
+    titulos = [f"RESOLUCIÓN MINISTERIAL N° {i:03d}-2026-MINEM/DM" for i in range(60)]
+    sumilla = ("Aprueban el procedimiento de supervisión de las actividades de "
+               "hidrocarburos líquidos, gas natural y GLP a cargo del OSINERGMIN")
+    candidatos = [f"{sectores[i % len(sectores)]} {t} {sumilla}" for i, t in enumerate(titulos)]
+    return candidatos + sectores
+
+
+def medir(nombre, funcion, repeticiones):
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion()
+    total = time.perf_counter() - inicio
+    print(f"   {nombre:<38} {total * 1000 / repeticiones:8.3f} ms/ronda")
+    return total
+
+
+def main():
+    repeticiones = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    textos = textos_de_prueba()
+    # En el filtrado cada texto se normaliza ~3 veces (prioritario, entidad, evaluar_relevancia)
+    llamadas = textos * 3
+
+    assert [normalizar_texto_original(t) for t in textos] == ng.normalizar_lote(textos)
+
+    print(f"📏 {len(llamadas)} normalizaciones por ronda, {repeticiones} rondas")
+    antes = medir("original (re.sub + NFKD)", lambda: [normalizar_texto_original(t) for t in llamadas], repeticiones)
+
+    def sin_cache():
+        ng._normalizar.cache_clear()
+        [ng.normalizar_texto(t) for t in llamadas]
+    medir("nueva, caché vacía en cada ronda", sin_cache, repeticiones)
+
+    def lote():
+        ng._normalizar.cache_clear()
+        ng.normalizar_lote(llamadas)
+    medir("normalizar_lote, caché vacía", lote, repeticiones)
+
+    despues = medir("nueva, caché caliente", lambda: [ng.normalizar_texto(t) for t in llamadas], repeticiones)
+    print(f"   ⚡ Aceleración con caché caliente: x{antes / despues:.1f}")
+
+
+if __name__ == "__main__":
+    main()
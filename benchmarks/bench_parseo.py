@@ -0,0 +1,90 @@
+"""
+=============================================================================
+MICRO-BENCHMARK: parsear_articulos() con backend lxml vs. BeautifulSoup
+=============================================================================
+Parsea las páginas de resultados grabadas (fixtures/) con los dos backends,
+verifica que produzcan exactamente los mismos candidatos y mide artículos por
+segundo. Con --factor N cada página se repite N veces dentro de un mismo
+documento, para ver cómo escala con páginas más grandes.
+
+Uso:
+    python benchmarks/bench_parseo.py [--repeticiones N] [--factor N]
+"""
+
+import argparse
+import contextlib
+import glob
+import io
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import normas_github as ng
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+BACKENDS = ["bs4", "lxml"]
+
+
+def ampliar(html, factor):
+    """Repite el bloque de artículos `factor` veces (misma cabecera y pie de página)"""
+    if factor <= 1:
+        return html
+    inicio = html.find("<article")
+    fin = html.rfind("</article>") + len("</article>")
+    return html[:inicio] + html[inicio:fin] * factor + html[fin:]
+
+
+def candidatos(html, backend):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return ng.construir_candidatos(ng.parsear_articulos(html, backend))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--factor", type=int, default=1)
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        ng.inicializar({})
+
+    paginas = {}
+    for ruta in sorted(glob.glob(os.path.join(FIXTURES, "*.html"))):
+        with open(ruta, encoding="utf-8") as f:
+            paginas[os.path.basename(ruta)] = ampliar(f.read(), args.factor)
+
+    # Mismos candidatos con ambos backends
+    for nombre, html in paginas.items():
+        referencia = candidatos(html, "bs4")
+        if candidatos(html, "lxml") != referencia:
+            print(f"❌ {nombre}: los backends no producen los mismos candidatos")
+            sys.exit(1)
+
+    print(f"📏 {len(paginas)} páginas grabadas (x{args.factor}), {args.repeticiones} repeticiones, candidatos idénticos ✅")
+    print(f"   {'página':<36} {'artículos':>9} " + " ".join(f"{b + ' (ms)':>11}" for b in BACKENDS) + f" {'mejora':>8}")
+    totales = {b: 0.0 for b in BACKENDS}
+    articulos = 0
+    for nombre, html in paginas.items():
+        n = len(ng.parsear_articulos(html, "lxml"))
+        articulos += n
+        tiempos = {}
+        for backend in BACKENDS:
+            muestras = []
+            for _ in range(args.repeticiones):
+                inicio = time.perf_counter()
+                ng.parsear_articulos(html, backend)
+                muestras.append(time.perf_counter() - inicio)
+            tiempos[backend] = statistics.median(muestras)
+            totales[backend] += tiempos[backend]
+        print(f"   {nombre:<36} {n:>9} " + " ".join(f"{tiempos[b] * 1000:11.2f}" for b in BACKENDS)
+              + f" {tiempos['bs4'] / tiempos['lxml']:7.1f}x")
+
+    for backend in BACKENDS:
+        print(f"   ⚡ {backend:<5} {articulos / totales[backend]:10.0f} artículos/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+"""
+=============================================================================
+BENCHMARK END-TO-END SIN RED: páginas grabadas + servicios locales
+=============================================================================
+Corre las etapas del pipeline contra el servidor local (servidor_local.py: búsqueda
+de El Peruano con páginas de fixtures/ y PDFs sintéticos) y los dobles en memoria
+de Drive, Sheets y Telegram (dobles.py). Mide por separado:
+
+  parseo         construir_candidatos(parsear_articulos(html)) sobre cada página grabada (PARSER_HTML)
+  extraccion     extraer_ediciones() con motor HTTP (formulario + búsquedas por rango + parseo)
+  filtrado       PASO 8: filtrar_relevancia() sobre los candidatos únicos
+  transferencia  PASO 9 en secuencia: descargar_pdf() en un pool de PDF_WORKERS hilos y
+                 subir_pdf_descargado() en el hilo principal (streaming + subida por bloques)
+  corpus         PASOS 2-3 y 11 en la primera ejecución: corpus inicial, feedback de toda la hoja,
+                 ajuste del TF-IDF y guardado
+  corpus_diario  lo mismo con el corpus y el modelo ya en Drive y la hoja sin cambios
+  pipeline       PASOS 6-9 solapados (PipelineNormas), para comparar con la suma de etapas
+  telegram       PASO 12: armar_mensajes_telegram() con los aceptados y envío a la Bot API local
+                 (bot_api_local.py: valida el HTML, el largo y el ritmo por chat)
+
+Cada etapa reporta la mediana de N repeticiones, el rendimiento (ítems/s) y el pico
+de memoria (tracemalloc, en una pasada aparte para no distorsionar los tiempos).
+
+Uso:
+    python benchmarks/bench_pipeline.py [--repeticiones N] [--latencia S] [--latencia-busqueda S]
+                                        [--rango-dias D] [--json ruta]
+
+El solapamiento de la etapa pipeline solo ahorra lo que las descargas de una edición pueden
+adelantarse a la búsqueda de las siguientes. Sin latencia todo es CPU (mismo GIL) y queda
+igual o algo peor que la suma de etapas; con búsquedas por rango llegan todas las ediciones
+juntas y tampoco hay qué solapar. Con búsquedas lentas y escalonadas, p. ej.
+--latencia 0.02 --latencia-busqueda 1 --rango-dias 1 (como Selenium, una por edición),
+se acerca a la etapa más lenta.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import normas_github as ng
+from bot_api_local import BotApiLocal
+from dobles import TelegramEnMemoria, cliente_en_memoria
+from servidor_local import ServidorLocal
+
+# Ediciones de las páginas grabadas; la última no tiene fixture (página "sin resultados")
+EDICIONES = [
+    (date(2026, 1, 5), False),
+    (date(2026, 1, 5), True),
+    (date(2026, 1, 6), False),
+    (date(2026, 1, 6), True),
+]
+
+
+def filas_de_feedback(cantidad):
+    """Filas A:G como las escribe el PASO 10, un tercio marcadas S y un tercio N"""
+    filas = []
+    for i in range(cantidad):
+        marca = "S" if i % 3 == 0 else ("N" if i % 3 == 1 else "")
+        filas.append(["2026-01-05", f"RESOLUCION {i:04d}-2026-MINEM/DM",
+                      "05/01/2026", f"Aprueban disposiciones sobre hidrocarburos y gas natural, expediente {i}",
+                      "https://drive.local/x", "Ordinaria", marca])
+    return filas
+
+
+def medir(nombre, preparar, ejecutar, repeticiones):
+    """
+    preparar() → estado fresco para una corrida (no se mide); ejecutar(estado) → ítems procesados.
+    Retorna dict con mediana, ítems y pico de memoria (MB).
+    """
+    tiempos = []
+    items = 0
+    for _ in range(repeticiones):
+        estado = preparar()
+        inicio = time.perf_counter()
+        items = ejecutar(estado)
+        tiempos.append(time.perf_counter() - inicio)
+
+    estado = preparar()
+    tracemalloc.start()
+    ejecutar(estado)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "segundos_mediana": statistics.median(tiempos),
+        "segundos_min": min(tiempos),
+        "items": items,
+        "pico_memoria_mb": pico / 1024 / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--latencia", type=float, default=0.0,
+                        help="segundos agregados a cada respuesta HTTP y llamada a la API (por defecto 0)")
+    parser.add_argument("--latencia-busqueda", type=float, default=0.0,
+                        help="segundos agregados además a cada búsqueda de El Peruano (por defecto 0)")
+    parser.add_argument("--rango-dias", type=int, default=7,
+                        help="EXTRACCION_RANGO_DIAS: 1 = una búsqueda por edición (por defecto 7)")
+    parser.add_argument("--filas-hoja", type=int, default=300)
+    parser.add_argument("--json", help="escribe los resultados en este archivo")
+    args = parser.parse_args()
+
+    cache_dir = tempfile.mkdtemp(prefix="bench_normas_")
+    resultados = {}
+    unidades = {}
+
+    with ServidorLocal(latencia=args.latencia, latencia_busqueda=args.latencia_busqueda) as servidor, BotApiLocal(latencia=args.latencia, intervalo=0.05) as bot, \
+            contextlib.redirect_stdout(io.StringIO()):
+        ng.inicializar({
+            "ELPERUANO_BASE_URL": servidor.url,
+            "TELEGRAM_API_URL": bot.url,
+            "TELEGRAM_INTERVALO": "0.05",
+            "MOTOR_EXTRACCION": "http",
+            "EXTRACCION_RANGO_DIAS": str(args.rango_dias),
+            "NORMAS_CACHE_DIR": cache_dir,
+            "DRIVE_FOLDER_ID": "carpeta-benchmark",
+            "SPREADSHEET_ID": "hoja-benchmark",
+        })
+        enviar_telegram = ng.enviar_telegram
+        ng.enviar_telegram = TelegramEnMemoria(args.latencia)
+
+        # --- parseo -------------------------------------------------------------
+        paginas = []
+        for ruta in sorted(servidor.paginas.values()):
+            with open(ruta, encoding="utf-8") as f:
+                paginas.append(f.read())
+        resultados["parseo"] = medir(
+            "parseo", lambda: None,
+            lambda _: sum(len(ng.construir_candidatos(ng.parsear_articulos(html))) for html in paginas),
+            args.repeticiones)
+        unidades["parseo"] = "artículos"
+
+        # --- extracción HTTP ------------------------------------------------------
+        candidatos = []
+
+        def extraer(_):
+            candidatos[:] = ng.extraer_ediciones(EDICIONES, motor="http")
+            return len(EDICIONES)
+        resultados["extraccion"] = medir("extraccion", lambda: None, extraer, args.repeticiones)
+        unidades["extraccion"] = "ediciones"
+
+        # --- filtrado (PASO 8) ----------------------------------------------------
+        corpus = ng.CorpusNormas()
+        corpus.sembrar_inicial(ng.HOY)
+        vectorizador, X_base = ng.ajustar_vectorizador(*corpus.datos_entrenamiento(ng.HOY))
+        unicos = ng.deduplicar(candidatos, set())
+        aceptados = []
+
+        def filtrar(_):
+            ng._normalizar.cache_clear()
+            aceptados[:] = ng.filtrar_relevancia(unicos, vectorizador, X_base)[0]
+            return len(unicos)
+        resultados["filtrado"] = medir("filtrado", lambda: None, filtrar, args.repeticiones)
+        unidades["filtrado"] = "candidatos"
+
+        # --- transferencia (PASO 9) -----------------------------------------------
+        transferidos = {}
+
+        def preparar_transferencia():
+            cliente, drive, _ = cliente_en_memoria(ng, latencia=args.latencia)
+            transferidos["drive"] = drive
+            return cliente, [dict(n) for n in aceptados]
+
+        def transferir(estado):
+            cliente, normas = estado
+            folder_id = cliente.create_folder("carpeta-benchmark", "2026-01-05")
+            session = ng.crear_sesion_http(ng.PDF_WORKERS)
+            try:
+                with ThreadPoolExecutor(max_workers=ng.PDF_WORKERS) as pool:
+                    descargas = pool.map(lambda norma: ng.descargar_pdf(session, norma), normas)
+                    for i, (norma, resultado) in enumerate(zip(normas, descargas), 1):
+                        ng.subir_pdf_descargado(cliente, folder_id, norma, resultado, f"{i}/{len(normas)}")
+            finally:
+                session.close()
+            return len(normas)
+        resultados["transferencia"] = medir("transferencia", preparar_transferencia, transferir, args.repeticiones)
+        resultados["transferencia"]["mb"] = transferidos["drive"].bytes_subidos / 1024 / 1024
+        unidades["transferencia"] = "PDFs"
+
+        # --- corpus (PASOS 2-3 y 11) ----------------------------------------------
+        def preparar_corpus():
+            ng.CACHE_DIR = tempfile.mkdtemp(dir=cache_dir)
+            return cliente_en_memoria(ng, filas_hoja=filas_de_feedback(args.filas_hoja), latencia=args.latencia)[0]
+
+        def gestionar(cliente):
+            corpus = ng.gestionar_corpus(cliente, "hoja-benchmark", "carpeta-benchmark")
+            ng.obtener_vectorizador(cliente, "carpeta-benchmark", corpus)
+            ng.guardar_corpus(cliente, "carpeta-benchmark", corpus)
+            return args.filas_hoja
+        resultados["corpus"] = medir("corpus", preparar_corpus, gestionar, args.repeticiones)
+        unidades["corpus"] = "filas de hoja"
+
+        def preparar_corpus_diario():
+            cliente = preparar_corpus()
+            gestionar(cliente)
+            ng.CACHE_DIR = tempfile.mkdtemp(dir=cache_dir)  # el modelo se baja de Drive
+            return cliente
+        resultados["corpus_diario"] = medir("corpus_diario", preparar_corpus_diario, gestionar, args.repeticiones)
+        unidades["corpus_diario"] = "filas de hoja"
+
+        # --- pipeline solapado (PASOS 6-9) ----------------------------------------
+        def preparar_pipeline():
+            cliente = cliente_en_memoria(ng, latencia=args.latencia)[0]
+            return ng.PipelineNormas(cliente, vectorizador, X_base, ng.IndiceNormas(), "2026-01-05")
+
+        resultados["pipeline"] = medir(
+            "pipeline", preparar_pipeline,
+            lambda pipeline: (pipeline.ejecutar(EDICIONES), pipeline.total_extraidos)[1],
+            args.repeticiones)
+        unidades["pipeline"] = "artículos"
+
+        # --- telegram (PASO 12) ---------------------------------------------------
+        ng.enviar_telegram = enviar_telegram
+
+        def enviar_resumen(_):
+            mensajes = ng.armar_mensajes_telegram(aceptados)
+            if not ng.enviar_mensajes_telegram(mensajes, "token-benchmark", "chat-benchmark"):
+                raise RuntimeError(f"la Bot API local rechazó mensajes: {bot.rechazos[-1:]}")
+            return len(mensajes)
+        resultados["telegram"] = medir("telegram", lambda: None, enviar_resumen, args.repeticiones)
+        unidades["telegram"] = "mensajes"
+
+    shutil.rmtree(cache_dir, ignore_errors=True)
+
+    print(f"📏 {args.repeticiones} repeticiones por etapa, latencia simulada {args.latencia * 1000:.0f} ms "
+          f"(+{args.latencia_busqueda * 1000:.0f} ms por búsqueda)")
+    print(f"   {'etapa':<14} {'mediana':>10} {'ítems':>8} {'rendimiento':>24} {'pico mem.':>11}")
+    for nombre, r in resultados.items():
+        r["por_segundo"] = r["items"] / r["segundos_mediana"] if r["segundos_mediana"] else 0.0
+        r["unidad"] = unidades[nombre]
+        rendimiento = f"{r['por_segundo']:.1f} {unidades[nombre]}/s"
+        print(f"   {nombre:<14} {r['segundos_mediana'] * 1000:8.1f} ms {r['items']:>8} {rendimiento:>24} "
+              f"{r['pico_memoria_mb']:8.2f} MB")
+    t = resultados["transferencia"]
+    print(f"   ⚡ Transferencia: {t['mb'] / t['segundos_mediana']:.1f} MB/s")
+    secuencial = sum(resultados[e]["segundos_mediana"] for e in ("extraccion", "filtrado", "transferencia"))
+    print(f"   ⚡ Pipeline solapado: {resultados['pipeline']['segundos_mediana']:.2f} s "
+          f"vs. {secuencial:.2f} s de extracción + filtrado + transferencia en secuencia")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({
+                "fecha": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "repeticiones": args.repeticiones,
+                "latencia": args.latencia,
+                "latencia_busqueda": args.latencia_busqueda,
+                "etapas": resultados,
+            }, f, ensure_ascii=False, indent=2)
+        print(f"   💾 Resultados en {args.json}")
+
+
+if __name__ == "__main__":
+    main()
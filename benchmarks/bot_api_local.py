@@ -0,0 +1,158 @@
+"""
+=============================================================================
+BOT API LOCAL: sendMessage de Telegram sin red
+=============================================================================
+Servidor HTTP en 127.0.0.1 (puerto libre) que responde como la Bot API:
+- POST /bot<token>/sendMessage   chat_id, text, parse_mode=HTML (form o JSON)
+  · 400 si el texto supera 4096 caracteres o el HTML no se puede interpretar
+    (etiqueta no soportada, sin cerrar o '<' / '&' sin escapar)
+  · 429 con parameters.retry_after si llegan dos mensajes al mismo chat con menos
+    de `intervalo` segundos entre sí (límite por chat)
+  · 200 con el mensaje aceptado en otro caso
+Los aceptados quedan en `mensajes` y los rechazos en `rechazos` (código, descripción).
+
+Para usarlo con normas_github: TELEGRAM_API_URL=bot.url (configurar()).
+"""
+
+import html.parser
+import http.server
+import itertools
+import json
+import threading
+import time
+from urllib.parse import parse_qs
+
+LIMITE_TEXTO = 4096
+
+# Etiquetas de parse_mode=HTML que acepta Telegram
+ETIQUETAS = {"b", "strong", "i", "em", "u", "ins", "s", "strike", "del", "a", "code", "pre",
+             "span", "tg-spoiler", "blockquote", "tg-emoji"}
+
+
+class _ValidadorHtml(html.parser.HTMLParser):
+    """Recorre el texto como lo haría Telegram; `error` queda con el primer problema encontrado"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.abiertas = []
+        self.error = None
+        self.largo = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag not in ETIQUETAS:
+            self.error = self.error or f"Unsupported start tag \"{tag}\""
+        self.abiertas.append(tag)
+
+    def handle_endtag(self, tag):
+        if not self.abiertas or self.abiertas[-1] != tag:
+            self.error = self.error or f"Can't find end tag corresponding to start tag \"{tag}\""
+        else:
+            self.abiertas.pop()
+
+    def handle_data(self, data):
+        self.largo += len(data.encode("utf-16-le")) // 2
+
+
+def validar_html(texto):
+    """(descripción del error o None, largo del texto visible)"""
+    # HTMLParser deja pasar '<' y '&' sueltos como texto; Telegram no
+    for i, c in enumerate(texto):
+        if c == "<" and not (texto[i + 1:i + 2].isalpha() or texto[i + 1:i + 2] == "/"):
+            return f"Can't parse entities: unexpected '<' at byte offset {i}", 0
+        if c == "&" and ";" not in texto[i + 1:i + 10]:
+            return f"Can't parse entities: unexpected '&' at byte offset {i}", 0
+    validador = _ValidadorHtml()
+    validador.feed(texto)
+    validador.close()
+    if validador.error is None and validador.abiertas:
+        validador.error = f"Can't find end tag corresponding to start tag \"{validador.abiertas[-1]}\""
+    return (f"Can't parse entities: {validador.error}" if validador.error else None), validador.largo
+
+
+class BotApiLocal:
+    """Servidor en un hilo; `latencia` (s) se agrega a cada respuesta, `intervalo` (s) es el límite por chat"""
+
+    def __init__(self, latencia=0.0, intervalo=1.0, retry_after=1):
+        self.latencia = latencia
+        self.intervalo = intervalo
+        self.retry_after = retry_after
+        self.mensajes = []
+        self.rechazos = []
+        self._ultimo = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        bot = self
+
+        class Manejador(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _responder(self, codigo, cuerpo):
+                datos = json.dumps(cuerpo).encode("utf-8")
+                time.sleep(bot.latencia)
+                self.send_response(codigo)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(datos)))
+                self.end_headers()
+                self.wfile.write(datos)
+
+            def _rechazar(self, codigo, descripcion, **parametros):
+                with bot._lock:
+                    bot.rechazos.append((codigo, descripcion))
+                cuerpo = {"ok": False, "error_code": codigo, "description": descripcion}
+                if parametros:
+                    cuerpo["parameters"] = parametros
+                self._responder(codigo, cuerpo)
+
+            def do_POST(self):
+                if not self.path.endswith("/sendMessage") or not self.path.startswith("/bot"):
+                    self._rechazar(404, "Not Found")
+                    return
+                largo = int(self.headers.get("Content-Length", "0"))
+                crudo = self.rfile.read(largo).decode("utf-8")
+                if "json" in self.headers.get("Content-Type", ""):
+                    datos = json.loads(crudo)
+                else:
+                    datos = {k: v[0] for k, v in parse_qs(crudo, keep_blank_values=True).items()}
+                chat_id, texto = datos.get("chat_id"), datos.get("text", "")
+
+                with bot._lock:
+                    ahora = time.monotonic()
+                    ultimo = bot._ultimo.get(chat_id)
+                    if ultimo is not None and ahora - ultimo < bot.intervalo:
+                        espera = bot.retry_after
+                    else:
+                        espera = None
+                        bot._ultimo[chat_id] = ahora
+                if espera is not None:
+                    self._rechazar(429, f"Too Many Requests: retry after {espera}", retry_after=espera)
+                    return
+
+                error, visible = (validar_html(texto) if datos.get("parse_mode") == "HTML"
+                                  else (None, len(texto.encode("utf-16-le")) // 2))
+                if error:
+                    self._rechazar(400, f"Bad Request: {error}")
+                elif not visible:
+                    self._rechazar(400, "Bad Request: message text is empty")
+                elif visible > LIMITE_TEXTO:
+                    self._rechazar(400, "Bad Request: message is too long")
+                else:
+                    with bot._lock:
+                        bot.mensajes.append(texto)
+                        mensaje_id = next(bot._ids)
+                    self._responder(200, {"ok": True, "result": {
+                        "message_id": mensaje_id, "chat": {"id": chat_id}, "date": int(time.time()), "text": texto}})
+
+            def log_message(self, *args):
+                pass
+
+        self._http = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Manejador)
+        self._http.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._http.server_address[1]}"
+
+    def __enter__(self):
+        threading.Thread(target=self._http.serve_forever, name="bot-api-local", daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._http.shutdown()
+        self._http.server_close()
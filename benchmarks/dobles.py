@@ -0,0 +1,228 @@
+"""
+=============================================================================
+DOBLES EN MEMORIA: Drive, Sheets y Telegram
+=============================================================================
+Reemplazan a los servicios de googleapiclient (no a GoogleDriveClient): el cliente
+real corre completo (caché de IDs, MD5, subidas por bloques, índice de PDFs) contra
+estos objetos, que responden las mismas llamadas que usa normas_github.
+`latencia` (s) se agrega a cada execute() para simular el ida y vuelta a la API.
+"""
+
+import hashlib
+import itertools
+import re
+import threading
+import time
+from datetime import datetime, timezone
+
+
+def _ahora():
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+class _Pedido:
+    """Lo que devuelven los métodos de files()/values(): se ejecuta con execute()"""
+
+    def __init__(self, servicio, funcion):
+        self._servicio = servicio
+        self._funcion = funcion
+
+    def execute(self, num_retries=0):
+        self._servicio.llamadas += 1
+        if self._servicio.latencia:
+            time.sleep(self._servicio.latencia)
+        return self._funcion()
+
+
+class _Respuesta(dict):
+    """Respuesta httplib2 mínima para MediaIoBaseDownload"""
+
+    def __init__(self, status, cabeceras):
+        super().__init__(cabeceras)
+        self.status = status
+
+
+class _HttpDescarga:
+    """Atiende los pedidos por rangos de MediaIoBaseDownload.next_chunk()"""
+
+    def __init__(self, servicio, file_id):
+        self._servicio = servicio
+        self._file_id = file_id
+
+    def request(self, uri, method="GET", headers=None, **kwargs):
+        self._servicio.llamadas += 1
+        if self._servicio.latencia:
+            time.sleep(self._servicio.latencia)
+        data = self._servicio.archivos[self._file_id]["data"]
+        inicio, fin = map(int, re.match(r"bytes=(\d+)-(\d+)", (headers or {})["range"]).groups())
+        bloque = data[inicio:fin + 1]
+        rango = f"bytes {inicio}-{inicio + len(bloque) - 1}/{len(data)}"
+        return _Respuesta(206, {"content-range": rango, "status": "206"}), bloque
+
+
+class _PedidoMedia:
+    def __init__(self, servicio, file_id):
+        self.uri = f"memoria://drive/{file_id}"
+        self.headers = {}
+        self.http = _HttpDescarga(servicio, file_id)
+
+
+class DriveEnMemoria:
+    """
+    Doble de drive_service: files().list/get/get_media/create/update.
+    El contenido de los PDFs no se conserva (solo MD5 y tamaño) para que el doble
+    no infle el pico de memoria que se mide; el resto de archivos sí.
+    """
+
+    def __init__(self, latencia=0.0):
+        self.latencia = latencia
+        self.archivos = {}
+        self.llamadas = 0
+        self.bytes_subidos = 0
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def files(self):
+        return self
+
+    # --- consultas -----------------------------------------------------------
+    def list(self, q="", fields=None, pageSize=None, pageToken=None, **kwargs):
+        nombre = re.search(r"name='((?:[^'\\]|\\.)*)'", q)
+        padres = set(re.findall(r"'([^']*)' in parents", q))  # varios: unidos con "or"
+        tipo = re.search(r"mimeType='([^']*)'", q)
+        desde = re.findall(r"(createdTime|modifiedTime) > '([^']*)'", q)  # ISO 8601: se comparan como texto
+
+        def listar():
+            encontrados = []
+            for file_id, meta in self.archivos.items():
+                if meta.get("trashed"):
+                    continue
+                if nombre and meta["name"] != nombre.group(1):
+                    continue
+                if padres and not padres.intersection(meta.get("parents", [])):
+                    continue
+                if tipo and meta.get("mimeType") != tipo.group(1):
+                    continue
+                if any(meta.get(campo, "") <= valor for campo, valor in desde):
+                    continue
+                encontrados.append(self._meta(file_id))
+            return {"files": encontrados}
+        return _Pedido(self, listar)
+
+    def get(self, fileId=None, fields=None, **kwargs):
+        def obtener():
+            if fileId not in self.archivos:
+                raise LookupError(f"404: {fileId}")
+            return self._meta(fileId)
+        return _Pedido(self, obtener)
+
+    def get_media(self, fileId=None, **kwargs):
+        return _PedidoMedia(self, fileId)
+
+    # --- escrituras ----------------------------------------------------------
+    def create(self, body=None, media_body=None, fields=None, **kwargs):
+        def crear():
+            with self._lock:
+                file_id = f"mem{next(self._ids)}"
+            self.archivos[file_id] = dict(body or {}, trashed=False, createdTime=_ahora())
+            self._guardar_media(file_id, media_body)
+            return self._meta(file_id)
+        return _Pedido(self, crear)
+
+    def update(self, fileId=None, body=None, media_body=None, fields=None, **kwargs):
+        def actualizar():
+            self.archivos[fileId].update(body or {})
+            self._guardar_media(fileId, media_body)
+            return self._meta(fileId)
+        return _Pedido(self, actualizar)
+
+    def _guardar_media(self, file_id, media_body):
+        """Lee el contenido como una subida reanudable: de a chunksize() bytes"""
+        meta = self.archivos[file_id]
+        meta["modifiedTime"] = _ahora()
+        if media_body is None:
+            return
+        md5 = hashlib.md5()
+        partes = []
+        tamano = media_body.size()
+        for inicio in range(0, tamano, media_body.chunksize()):
+            bloque = media_body.getbytes(inicio, media_body.chunksize())
+            md5.update(bloque)
+            if meta.get("mimeType") != "application/pdf":
+                partes.append(bloque)
+        meta["data"] = b"".join(partes)
+        meta["md5Checksum"] = md5.hexdigest()
+        self.bytes_subidos += tamano
+
+    def _meta(self, file_id):
+        meta = {k: v for k, v in self.archivos[file_id].items() if k != "data"}
+        meta["id"] = file_id
+        meta["webViewLink"] = f"https://drive.local/file/d/{file_id}/view"
+        return meta
+
+
+class SheetsEnMemoria:
+    """Doble de sheets_service: spreadsheets().values().append/get/batchGet sobre una hoja"""
+
+    def __init__(self, drive, spreadsheet_id="hoja-benchmark", filas=None, latencia=0.0):
+        self.latencia = latencia
+        self.llamadas = 0
+        self.spreadsheet_id = spreadsheet_id
+        self.filas = [list(f) for f in (filas or [])]  # sin encabezado: la fila 2 de la hoja es filas[0]
+        self._drive = drive
+        # La hoja existe también en Drive, con su modifiedTime, como en el servicio real
+        drive.archivos[spreadsheet_id] = {"name": "normas", "mimeType": "application/vnd.google-apps.spreadsheet",
+                                          "parents": [], "trashed": False, "modifiedTime": _ahora()}
+
+    def spreadsheets(self):
+        return self
+
+    def values(self):
+        return self
+
+    def append(self, spreadsheetId=None, range=None, valueInputOption=None, insertDataOption=None, body=None):
+        def agregar():
+            self.filas.extend(list(f) for f in body["values"])
+            self._drive.archivos[self.spreadsheet_id]["modifiedTime"] = _ahora()
+            return {"updates": {"updatedRows": len(body["values"])}}
+        return _Pedido(self, agregar)
+
+    def _rango(self, rango):
+        m = re.match(r"([A-Z])(\d+):([A-Z])(\d*)", rango)
+        columna = ord(m.group(1)) - ord("A")
+        desde = int(m.group(2)) - 2
+        hasta = int(m.group(4)) - 1 if m.group(4) else len(self.filas)
+        valores = []
+        for fila in self.filas[desde:hasta]:
+            valores.append([fila[columna]] if columna < len(fila) and fila[columna] != "" else [])
+        while valores and not valores[-1]:
+            valores.pop()
+        return {"range": rango, "values": valores}
+
+    def get(self, spreadsheetId=None, range=None, **kwargs):
+        return _Pedido(self, lambda: self._rango(range))
+
+    def batchGet(self, spreadsheetId=None, ranges=None, **kwargs):
+        return _Pedido(self, lambda: {"valueRanges": [self._rango(r) for r in ranges]})
+
+
+class TelegramEnMemoria:
+    """Reemplazo de enviar_telegram(mensaje, bot_token, chat_id): guarda los mensajes"""
+
+    def __init__(self, latencia=0.0):
+        self.latencia = latencia
+        self.mensajes = []
+
+    def __call__(self, mensaje, bot_token=None, chat_id=None):
+        if self.latencia:
+            time.sleep(self.latencia)
+        self.mensajes.append(mensaje)
+        return True
+
+
+def cliente_en_memoria(ng, filas_hoja=None, latencia=0.0, cache_path=None):
+    """GoogleDriveClient real de normas_github sobre los dobles. Retorna (cliente, drive, sheets)"""
+    drive = DriveEnMemoria(latencia)
+    sheets = SheetsEnMemoria(drive, filas=filas_hoja, latencia=latencia)
+    cliente = ng.GoogleDriveClient(None, cache_path=cache_path, drive_service=drive, sheets_service=sheets)
+    return cliente, drive, sheets
@@ -0,0 +1,162 @@
+"""
+=============================================================================
+SERVIDOR LOCAL: El Peruano grabado + PDFs sintéticos
+=============================================================================
+Servidor HTTP en 127.0.0.1 (puerto libre) para correr el pipeline sin red:
+- GET  /Normas          formulario de búsqueda (mismos campos que el sitio real)
+- POST /Normas/Filtro   página de resultados grabada en fixtures/ según cddesde y tipo
+                        (<ordinaria|extraordinaria>_<ddmmaaaa>_<n>.html); si cdhasta es
+                        posterior, une los artículos de todas las páginas del rango.
+                        Si no hay, página con el aviso de "no se encontraron resultados"
+- GET  /pdf/<nombre>?kb=N  PDF sintético y determinista de N KB, enviado por bloques
+
+Para usarlo con normas_github: ELPERUANO_BASE_URL=servidor.url (configurar()).
+"""
+
+import glob
+import hashlib
+import http.server
+import os
+import threading
+import re
+import time
+from datetime import datetime, timedelta
+from urllib.parse import parse_qs, urlparse
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+FORMULARIO = """<!DOCTYPE html>
+<html lang="es"><head><meta charset="utf-8"><title>Normas Legales</title></head>
+<body><main>
+  <form id="frmFiltro" action="/Normas/Filtro" method="post">
+    <input type="text" id="cddesde" name="cddesde" value="">
+    <input type="text" id="cdhasta" name="cdhasta" value="">
+    <input type="checkbox" id="tipo" name="tipo">
+    <input type="hidden" name="__RequestVerificationToken" value="tkn-benchmark">
+    <button id="btnBuscar" name="btnBuscar" value="Filtrar">Filtrar</button>
+  </form>
+</main></body></html>
+"""
+
+SIN_RESULTADOS = """<!DOCTYPE html>
+<html lang="es"><head><meta charset="utf-8"></head>
+<body><main><div class="alerta">No se encontraron normas para los filtros seleccionados.</div></main></body></html>
+"""
+
+
+def fixtures_por_edicion():
+    """{(ddmmaaaa, es_extraordinaria): ruta} de las páginas grabadas"""
+    paginas = {}
+    for ruta in glob.glob(os.path.join(FIXTURES, "*.html")):
+        tipo, fecha, _ = os.path.basename(ruta).split("_", 2)
+        paginas[(fecha, tipo == "extraordinaria")] = ruta
+    return paginas
+
+
+_RE_LISTADO = re.compile(r'(<section id="listado"[^>]*>)(.*?)(</section>)', re.S)
+
+
+def pagina_rango(rutas):
+    """Primera página del rango con los artículos de todas (en orden de fecha) en su listado"""
+    contenidos = []
+    for ruta in rutas:
+        with open(ruta, encoding="utf-8") as f:
+            contenidos.append(f.read())
+    articulos = "".join(_RE_LISTADO.search(html).group(2) for html in contenidos)
+    return _RE_LISTADO.sub(lambda m: m.group(1) + articulos + m.group(3), contenidos[0], count=1)
+
+
+def contenido_pdf(nombre, kb):
+    """Bytes deterministas que empiezan con %PDF (pasa la validación de magic bytes)"""
+    semilla = hashlib.sha256(nombre.encode("utf-8")).digest()
+    cuerpo = (semilla * (kb * 1024 // len(semilla) + 1))[:max(0, kb * 1024 - 9)]
+    return b"%PDF-1.4\n" + cuerpo
+
+
+class ServidorLocal:
+    """
+    Servidor en un hilo; `latencia` (s) se agrega a cada respuesta para simular la red y
+    `latencia_busqueda` (s), además, a cada búsqueda (el sitio real tarda segundos en filtrar)
+    """
+
+    def __init__(self, latencia=0.0, bloque=64 * 1024, latencia_busqueda=0.0):
+        self.latencia = latencia
+        self.latencia_busqueda = latencia_busqueda
+        self.paginas = fixtures_por_edicion()
+        self.pedidos = {"formulario": 0, "busqueda": 0, "pdf": 0, "bytes_pdf": 0}
+        servidor = self
+
+        class Manejador(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _responder(self, cuerpo, tipo):
+                time.sleep(servidor.latencia)
+                self.send_response(200)
+                self.send_header("Content-Type", tipo)
+                self.send_header("Content-Length", str(len(cuerpo)))
+                self.end_headers()
+                for i in range(0, len(cuerpo), bloque):
+                    self.wfile.write(cuerpo[i:i + bloque])
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path == "/Normas":
+                    servidor.pedidos["formulario"] += 1
+                    self._responder(FORMULARIO.encode("utf-8"), "text/html; charset=utf-8")
+                elif url.path.startswith("/pdf/"):
+                    kb = int(parse_qs(url.query).get("kb", ["200"])[0])
+                    cuerpo = contenido_pdf(url.path, kb)
+                    servidor.pedidos["pdf"] += 1
+                    servidor.pedidos["bytes_pdf"] += len(cuerpo)
+                    self._responder(cuerpo, "application/pdf")
+                else:
+                    self.send_error(404)
+
+            def do_POST(self):
+                largo = int(self.headers.get("Content-Length", "0"))
+                datos = parse_qs(self.rfile.read(largo).decode("utf-8"))
+                if urlparse(self.path).path != "/Normas/Filtro":
+                    self.send_error(404)
+                    return
+                servidor.pedidos["busqueda"] += 1
+                time.sleep(servidor.latencia_busqueda)
+                desde = datos.get("cddesde", [""])[0]
+                hasta = datos.get("cdhasta", [desde])[0] or desde
+                rutas = servidor.rutas_rango(desde, hasta, "tipo" in datos)
+                if len(rutas) == 1:
+                    with open(rutas[0], "rb") as f:
+                        self._responder(f.read(), "text/html; charset=utf-8")
+                elif rutas:
+                    self._responder(pagina_rango(rutas).encode("utf-8"), "text/html; charset=utf-8")
+                else:
+                    self._responder(SIN_RESULTADOS.encode("utf-8"), "text/html; charset=utf-8")
+
+            def log_message(self, *args):
+                pass
+
+        self._http = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Manejador)
+        self._http.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._http.server_address[1]}"
+
+    def rutas_rango(self, desde, hasta, es_extraordinaria):
+        """Páginas grabadas del tipo pedido con fecha entre desde y hasta (dd/mm/aaaa)"""
+        try:
+            dia = datetime.strptime(desde, "%d/%m/%Y").date()
+            fin = datetime.strptime(hasta, "%d/%m/%Y").date()
+        except ValueError:
+            return []
+        rutas = []
+        while dia <= fin:
+            ruta = self.paginas.get((dia.strftime("%d%m%Y"), es_extraordinaria))
+            if ruta:
+                rutas.append(ruta)
+            dia += timedelta(days=1)
+        return rutas
+
+    def __enter__(self):
+        threading.Thread(target=self._http.serve_forever, name="servidor-local", daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._http.shutdown()
+        self._http.server_close()
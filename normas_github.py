@@ -2,6 +2,10 @@
 =============================================================================
 SISTEMA AUTOMATIZADO DE NORMAS - VERSIÓN FINAL CORREGIDA PARA GITHUB ACTIONS
 =============================================================================
+Importar este módulo no tiene efectos: no lee el entorno, no imprime y no carga
+dependencias pesadas. La configuración y las keywords se preparan en inicializar();
+numpy/scikit-learn, Selenium, BeautifulSoup, requests y googleapiclient se importan
+dentro de la etapa que los usa.
 """
 
 import os
@@ -9,138 +13,736 @@ import re
 import io
 import json
 import time
+import queue
+import random
+import functools
 import base64
+import contextlib
+import gzip
+import hashlib
+import shutil
+import tempfile
+import threading
 import unicodedata
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import date, timedelta
+from html import escape
 
-import requests
-from bs4 import BeautifulSoup
-import pandas as pd
+# =============================================================================
+# CONFIGURACIÓN
+# =============================================================================
+
+def configurar(entorno=None):
+    """
+    Lee la configuración del entorno (os.environ por defecto, o el dict recibido)
+    y la publica como constantes del módulo. Se puede volver a llamar para reconfigurar.
+    """
+    global HOY, DIA_SEMANA, CREDENTIALS_JSON, DRIVE_FOLDER_ID, SPREADSHEET_ID
+    global TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID, TELEGRAM_API_URL, TELEGRAM_LIMITE_MENSAJE, TELEGRAM_INTERVALO
+    global TELEGRAM_REINTENTOS, TELEGRAM_ESPERA_MAX, DIAS_A_REVISAR, CACHE_DIR, INDICE_PDF_DIAS
+    global PDF_WORKERS, USER_AGENT, PDF_CHUNK_KB, PDF_SPOOL_MB, PDF_CHUNK_SUBIDA_MB, PDF_TAMANO_MINIMO
+    global PDF_TIMEOUT_CONEXION, PDF_TIMEOUT_MIN, PDF_TIMEOUT_MAX, PDF_TIMEOUT_FACTOR, PDF_MUESTRAS_MIN
+    global PDF_INTENTOS, PDF_PRESUPUESTO_REINTENTOS, PDF_BACKOFF_BASE, PDF_BACKOFF_MAX, PDF_COBERTURA_PERCENTIL
+    global DRIVER_POOL_SIZE, EXTRACCION_RANGO_DIAS, COLA_PIPELINE, ESPERA_PAGINA_MAX, ESPERA_RESULTADOS_MAX, ESPERA_SCROLL_MAX, SCROLLS_ESTABLES
+    global ESPERA_SIN_ARTICULOS
+    global MODO_EXTRACCION, PARSER_HTML, MOTOR_EXTRACCION, ELPERUANO_BASE_URL, ELPERUANO_RUTA_BUSQUEDA
+    global NORMALIZACION_CACHE, CORPUS_VIDA_MEDIA_AUTO, CORPUS_PESO_MINIMO
+    global INDICE_NORMAS_DIAS, INDICE_NORMAS_MAX, BACKFILL_LOTE_DIAS, METRICAS_PATH, METRICAS_HISTORIAL_MAX, GITHUB_STEP_SUMMARY
+    global _normalizar
+
+    env = os.environ if entorno is None else entorno
+
+    HOY = date.today()
+    DIA_SEMANA = HOY.weekday()
+
+    CREDENTIALS_JSON = env.get('GOOGLE_CREDENTIALS_JSON')
+    DRIVE_FOLDER_ID = env.get('DRIVE_FOLDER_ID')
+    SPREADSHEET_ID = env.get('SPREADSHEET_ID')
+    TELEGRAM_BOT_TOKEN = env.get('TELEGRAM_BOT_TOKEN')
+    TELEGRAM_CHAT_ID = env.get('TELEGRAM_CHAT_ID')
+
+    # Bot API de Telegram (configurable para probar contra un servidor local). El resumen se parte
+    # en mensajes de hasta TELEGRAM_LIMITE_MENSAJE caracteres, enviados con al menos
+    # TELEGRAM_INTERVALO s entre uno y otro; un 429 se espera (retry_after, hasta
+    # TELEGRAM_ESPERA_MAX s) y se reintenta hasta TELEGRAM_REINTENTOS veces.
+    TELEGRAM_API_URL = env.get('TELEGRAM_API_URL', 'https://api.telegram.org').rstrip('/')
+    TELEGRAM_LIMITE_MENSAJE = min(4096, max(512, int(env.get('TELEGRAM_LIMITE_MENSAJE', '4096'))))
+    TELEGRAM_INTERVALO = max(0.0, float(env.get('TELEGRAM_INTERVALO', '1')))
+    TELEGRAM_REINTENTOS = max(0, int(env.get('TELEGRAM_REINTENTOS', '3')))
+    TELEGRAM_ESPERA_MAX = float(env.get('TELEGRAM_ESPERA_MAX', '60'))
+
+    # Lunes (0): revisa Viernes, Sábado y Domingo = 3 ediciones
+    # Otros días: revisa hoy y ayer = 2 ediciones
+    DIAS_A_REVISAR = 3 if DIA_SEMANA == 0 else 1
+
+    # Caché local entre ejecuciones en el mismo runner (modelo TF-IDF, etc.)
+    CACHE_DIR = env.get('NORMAS_CACHE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache'))
+
+    # Ventana del índice de PDFs ya subidos a Drive (evita duplicados entre ejecuciones)
+    INDICE_PDF_DIAS = max(1, int(env.get('INDICE_PDF_DIAS', '30')))
+
+    # Descargas de PDFs en paralelo sobre una sesión HTTP compartida (keep-alive)
+    PDF_WORKERS = max(1, int(env.get('PDF_WORKERS', '4')))
+    USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+
+    # Los PDFs se descargan en streaming: bloques de PDF_CHUNK_KB a un archivo temporal que
+    # vive en memoria hasta PDF_SPOOL_MB y luego pasa a disco; la subida a Drive es reanudable
+    # en bloques de PDF_CHUNK_SUBIDA_MB (múltiplo de 256 KB). La memoria por PDF queda acotada.
+    PDF_CHUNK_KB = max(8, int(env.get('PDF_CHUNK_KB', '256')))
+    PDF_SPOOL_MB = max(0, int(env.get('PDF_SPOOL_MB', '2')))
+    PDF_CHUNK_SUBIDA_MB = max(1, int(env.get('PDF_CHUNK_SUBIDA_MB', '4')))
+    PDF_TAMANO_MINIMO = 500
+
+    # Timeout de lectura adaptativo: PDF_TIMEOUT_FACTOR × p95 de la espera hasta las cabeceras
+    # de las descargas exitosas (con al menos PDF_MUESTRAS_MIN), acotado a [MIN, MAX] segundos.
+    # Antes de juntar muestras se usa PDF_TIMEOUT_MAX.
+    PDF_TIMEOUT_CONEXION = float(env.get('PDF_TIMEOUT_CONEXION', '10'))
+    PDF_TIMEOUT_MIN = float(env.get('PDF_TIMEOUT_MIN', '5'))
+    PDF_TIMEOUT_MAX = max(PDF_TIMEOUT_MIN, float(env.get('PDF_TIMEOUT_MAX', '60')))
+    PDF_TIMEOUT_FACTOR = float(env.get('PDF_TIMEOUT_FACTOR', '4'))
+    PDF_MUESTRAS_MIN = max(1, int(env.get('PDF_MUESTRAS_MIN', '5')))
+
+    # Reintentos de fallos transitorios (timeout, conexión, 5xx, 429): hasta PDF_INTENTOS por URL,
+    # con espera exponencial y jitter completo, y a lo sumo PDF_PRESUPUESTO_REINTENTOS por ejecución
+    # (incluye las peticiones de cobertura) para que los reintentos no alarguen el job sin límite.
+    PDF_INTENTOS = max(1, int(env.get('PDF_INTENTOS', '3')))
+    PDF_PRESUPUESTO_REINTENTOS = max(0, int(env.get('PDF_PRESUPUESTO_REINTENTOS', '20')))
+    PDF_BACKOFF_BASE = float(env.get('PDF_BACKOFF_BASE', '1'))
+    PDF_BACKOFF_MAX = float(env.get('PDF_BACKOFF_MAX', '20'))
+
+    # Cobertura (hedging): si una descarga supera este percentil de la duración de las anteriores,
+    # se lanza una segunda petición y gana la primera que termine. 0 = desactivada.
+    PDF_COBERTURA_PERCENTIL = min(99.0, max(0.0, float(env.get('PDF_COBERTURA_PERCENTIL', '0'))))
+
+    # Ediciones extraídas en paralelo, cada una con su propio Chrome headless
+    DRIVER_POOL_SIZE = max(1, int(env.get('DRIVER_POOL_SIZE', '3')))
+
+    # Días consecutivos del mismo tipo de edición que se piden en una sola búsqueda
+    # (cddesde..cdhasta); los resultados se reparten por FechaPublicacion. 1 = una búsqueda por día.
+    EXTRACCION_RANGO_DIAS = max(1, int(env.get('EXTRACCION_RANGO_DIAS', '7')))
+
+    # Eventos en tránsito entre las etapas del pipeline (ediciones extraídas y PDFs descargados
+    # esperando subida). Acota la memoria: las descargas se frenan si la subida va más lenta.
+    COLA_PIPELINE = max(1, int(env.get('COLA_PIPELINE', '8')))
+
+    # Límites superiores (segundos) de las esperas explícitas de Selenium.
+    # Cada espera termina apenas se cumple su condición; estos valores solo acotan el peor caso.
+    ESPERA_PAGINA_MAX = float(env.get('ESPERA_PAGINA_MAX', '30'))
+    ESPERA_RESULTADOS_MAX = float(env.get('ESPERA_RESULTADOS_MAX', '30'))
+    # Cada scroll que no trae artículos agota este límite: es el costo fijo de cada chequeo de estabilidad
+    ESPERA_SCROLL_MAX = float(env.get('ESPERA_SCROLL_MAX', '1.5'))
+    # Página de resultados ya cargada y sin artículos durante este tiempo = búsqueda vacía,
+    # aunque el aviso no coincida con MARCADORES_SIN_RESULTADOS
+    ESPERA_SIN_ARTICULOS = float(env.get('ESPERA_SIN_ARTICULOS', '2'))
+    SCROLLS_ESTABLES = max(1, int(env.get('SCROLLS_ESTABLES', '2')))
+
+    # 'script': extrae los artículos nuevos en el navegador con un solo execute_script por scroll
+    # 'html':   parsea page_source con parsear_articulos() al final (comportamiento anterior)
+    MODO_EXTRACCION = env.get('MODO_EXTRACCION', 'script').strip().lower()
+
+    # Backend de parsear_articulos(): 'lxml' (solo los fragmentos <article> de resultados)
+    # o 'bs4' (BeautifulSoup sobre la página completa). Ambos dan los mismos candidatos.
+    PARSER_HTML = env.get('PARSER_HTML', 'lxml').strip().lower()
+
+    # Motor de extracción: 'selenium' (Chrome headless) o 'http' (búsqueda directa sin navegador,
+    # con Selenium como respaldo si la respuesta no se reconoce). La URL base es configurable
+    # para poder apuntar a un servidor local con respuestas grabadas.
+    MOTOR_EXTRACCION = env.get('MOTOR_EXTRACCION', 'selenium').strip().lower()
+    ELPERUANO_BASE_URL = env.get('ELPERUANO_BASE_URL', 'https://diariooficial.elperuano.pe').rstrip('/')
+    ELPERUANO_RUTA_BUSQUEDA = env.get('ELPERUANO_RUTA_BUSQUEDA', '/Normas/Filtro')
+
+    # Caché LRU de normalizar_texto (entradas); con el tamaño por defecto se conserva la del import
+    NORMALIZACION_CACHE = max(0, int(env.get('NORMALIZACION_CACHE', str(NORMALIZACION_CACHE_DEFECTO))))
+    if _normalizar.cache_parameters()['maxsize'] != NORMALIZACION_CACHE:
+        _normalizar = functools.lru_cache(maxsize=NORMALIZACION_CACHE)(_normalizar_sin_cache)
+
+    # Decaimiento de las entradas 'auto' del corpus
+    CORPUS_VIDA_MEDIA_AUTO = float(env.get('CORPUS_VIDA_MEDIA_AUTO', '180'))  # días; 0 = sin decaimiento
+    CORPUS_PESO_MINIMO = float(env.get('CORPUS_PESO_MINIMO', '0.25'))  # debajo de esto se poda
+
+    # Tamaño del índice de normas ya procesadas (por antigüedad y por cantidad)
+    INDICE_NORMAS_DIAS = max(1, int(env.get('INDICE_NORMAS_DIAS', '120')))
+    INDICE_NORMAS_MAX = max(100, int(env.get('INDICE_NORMAS_MAX', '20000')))
+
+    # Backfill: días por lote (cada lote pasa junto por filtrado, Drive, Sheets y corpus
+    # y es la unidad que se registra como completada para poder reanudar)
+    BACKFILL_LOTE_DIAS = max(1, int(env.get('BACKFILL_LOTE_DIAS', '7')))
+
+    # Métricas de la ejecución: JSON completo (artefacto del workflow), historial resumido
+    # en CACHE_DIR para comparar con ejecuciones anteriores y tabla en el resumen de GitHub
+    METRICAS_PATH = env.get('METRICAS_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'metricas_normas.json'))
+    METRICAS_HISTORIAL_MAX = max(1, int(env.get('METRICAS_HISTORIAL_MAX', '90')))
+    GITHUB_STEP_SUMMARY = env.get('GITHUB_STEP_SUMMARY')
+
+def inicializar(entorno=None):
+    """Arranque explícito: configuración, keywords compiladas y banner. Lo llama el punto de entrada."""
+    print("="*100)
+    print("🚀 SISTEMA DE NORMAS - VERSIÓN FINAL CORREGIDA PARA GITHUB")
+    print("="*100)
 
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+    configurar(entorno)
 
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
+    print(f"📅 HOY: {HOY.strftime('%d/%m/%Y')} - DÍA: {['Lun','Mar','Mié','Jue','Vie','Sáb','Dom'][DIA_SEMANA]}")
+    print(f"🔍 DÍAS A REVISAR: {DIAS_A_REVISAR}")
+    print(f"📥 WORKERS DE DESCARGA PDF: {PDF_WORKERS}")
+    print(f"🌐 POOL DE NAVEGADORES: {DRIVER_POOL_SIZE}")
+    print(f"⚙️ MOTOR DE EXTRACCIÓN: {MOTOR_EXTRACCION}")
+    print("="*100)
 
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaIoBaseUpload, MediaIoBaseDownload
+    compilar_palabras_clave()
 
 # =============================================================================
-# CONFIGURACIÓN
+# MÉTRICAS DE EJECUCIÓN
 # =============================================================================
 
-print("="*100)
-print("🚀 SISTEMA DE NORMAS - VERSIÓN FINAL CORREGIDA PARA GITHUB")
-print("="*100)
+NOMBRE_HISTORIAL_METRICAS = 'metricas_historial.jsonl'
+
+# Contadores que siempre aparecen (en 0 si no hubo nada), para comparar ejecuciones
+CONTADORES = [
+    'busquedas', 'articulos', 'candidatos', 'evaluados', 'ya_procesadas', 'aceptados', 'prioritarios',
+    'pdfs_descargados', 'pdfs_fallidos', 'pdfs_subidos', 'pdfs_reutilizados',
+    'bytes_pdf_descargados', 'bytes_drive_subidos', 'bytes_drive_descargados',
+    'fallback_selenium', 'reintentos_pdf', 'coberturas', 'reintentos_telegram'
+]
+
+ICONOS_ESTADO = {'ok': '✅', 'alerta': '⚠️', 'error': '❌'}
 
-HOY = date.today()
-DIA_SEMANA = HOY.weekday()
+class Metricas:
+    """
+    Tiempos y contadores de una ejecución; se puede usar desde cualquier hilo.
+    - paso(numero, nombre): abre un PASO de main() y cierra el anterior (son secuenciales)
+    - tramo(nombre, **etiquetas): mide una operación (búsqueda, llamada a Drive/Sheets/Telegram).
+      Si lanza excepción queda con error y la excepción sigue; el dict que entrega se puede
+      completar (p. ej. t['ok'] = False cuando la función no lanza pero falló)
+    - contar(nombre, n): artículos, candidatos, PDFs, bytes, reintentos (por causa)...
+    Cada descarga de PDF queda como tramo 'pdf' con su URL, intentos y resultado.
+    - alerta(mensaje): un fallo que no corta la ejecución; marca el PASO en curso
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reiniciar()
+
+    def reiniciar(self):
+        with self._lock:
+            self.inicio = time.time()
+            self._t0 = time.perf_counter()
+            self.pasos = []
+            self.tramos = []
+            self.contadores = dict.fromkeys(CONTADORES, 0)
+            self.alertas = []
+            self.error = None
+            self.segundos = None
+
+    def _reloj(self):
+        return time.perf_counter() - self._t0
+
+    def _paso_abierto(self):
+        return self.pasos[-1] if self.pasos and self.pasos[-1]['segundos'] is None else None
+
+    def _cerrar_paso(self):
+        paso = self._paso_abierto()
+        if paso:
+            paso['segundos'] = self._reloj() - paso['inicio']
+
+    def paso(self, numero, nombre):
+        with self._lock:
+            self._cerrar_paso()
+            self.pasos.append({'paso': numero, 'nombre': nombre, 'inicio': self._reloj(), 'segundos': None, 'estado': 'ok'})
+
+    @contextlib.contextmanager
+    def tramo(self, nombre, **etiquetas):
+        registro = {'nombre': nombre, 'ok': True, **etiquetas}
+        inicio = self._reloj()
+        try:
+            yield registro
+        except BaseException as e:
+            registro['ok'] = False
+            registro['error'] = f"{type(e).__name__}: {e}"[:200]
+            raise
+        finally:
+            registro['inicio'] = round(inicio, 4)
+            registro['segundos'] = round(self._reloj() - inicio, 4)
+            registro['hilo'] = threading.current_thread().name
+            with self._lock:
+                self.tramos.append(registro)
+
+    def contar(self, nombre, n=1):
+        with self._lock:
+            self.contadores[nombre] = self.contadores.get(nombre, 0) + n
+
+    def alerta(self, mensaje):
+        with self._lock:
+            paso = self._paso_abierto()
+            if paso and paso['estado'] == 'ok':
+                paso['estado'] = 'alerta'
+            self.alertas.append({'paso': paso['paso'] if paso else None, 'mensaje': mensaje})
+
+    def finalizar(self, error=None):
+        with self._lock:
+            paso = self._paso_abierto()
+            if paso and error is not None:
+                paso['estado'] = 'error'
+            self._cerrar_paso()
+            if error is not None:
+                self.error = f"{type(error).__name__}: {error}"
+            self.segundos = round(self._reloj(), 4)
+
+    @property
+    def estado(self):
+        return 'error' if self.error else ('alerta' if self.alertas else 'ok')
+
+    def operaciones(self):
+        """Por nombre de tramo: llamadas, errores, total y percentiles (s)"""
+        por_nombre = {}
+        for t in self.tramos:
+            por_nombre.setdefault(t['nombre'], []).append(t)
+        resumen = {}
+        for nombre, tramos in sorted(por_nombre.items()):
+            tiempos = sorted(t['segundos'] for t in tramos)
+
+            def percentil(q):
+                return tiempos[min(len(tiempos) - 1, int(round(q * (len(tiempos) - 1))))]
+            resumen[nombre] = {
+                'llamadas': len(tramos),
+                'errores': sum(1 for t in tramos if not t['ok']),
+                'segundos_total': round(sum(tiempos), 4),
+                'p50': percentil(0.5),
+                'p95': percentil(0.95),
+                'max': tiempos[-1],
+            }
+        return resumen
+
+    def a_dict(self):
+        with self._lock:
+            return {
+                'version': 1,
+                'fecha': HOY.isoformat(),
+                'inicio': time.strftime('%Y-%m-%dT%H:%M:%S%z', time.localtime(self.inicio)),
+                'estado': self.estado,
+                'error': self.error,
+                'segundos': self.segundos,
+                'pasos': [dict(p, inicio=round(p['inicio'], 4),
+                               segundos=None if p['segundos'] is None else round(p['segundos'], 4))
+                          for p in self.pasos],
+                'contadores': dict(self.contadores),
+                'alertas': list(self.alertas),
+                'operaciones': self.operaciones(),
+                'tramos': list(self.tramos),
+            }
 
-CREDENTIALS_JSON = os.getenv('GOOGLE_CREDENTIALS_JSON')
-DRIVE_FOLDER_ID = os.getenv('DRIVE_FOLDER_ID')
-SPREADSHEET_ID = os.getenv('SPREADSHEET_ID')
-TELEGRAM_BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
-TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
+METRICAS = Metricas()
+
+def ejecutar_api(operacion, pedido):
+    """pedido.execute() de googleapiclient medido como tramo (p. ej. 'drive.files.list')"""
+    with METRICAS.tramo(operacion):
+        return pedido.execute()
+
+def _formato_contador(nombre, valor):
+    if nombre.startswith('bytes_'):
+        return f"{valor / 1024 / 1024:.2f} MB"
+    return str(valor)
+
+def resumen_markdown(datos, anterior=None):
+    """Resumen para GITHUB_STEP_SUMMARY; `anterior` es la línea de historial de la ejecución previa"""
+    titulos = {'ok': 'Completada', 'alerta': 'Completada con alertas', 'error': 'Falló'}
+    lineas = [
+        f"## 🔍 Búsqueda de Normas — {ICONOS_ESTADO[datos['estado']]} {titulos[datos['estado']]}",
+        "",
+        f"**📅 Fecha:** {datos['inicio']} · **⏱️ Duración:** {datos['segundos'] or 0:.1f} s",
+    ]
+    if datos['error']:
+        lineas += ["", f"**❌ Error:** `{datos['error']}`"]
+
+    previos = (anterior or {}).get('pasos', {})
+    lineas += ["", "| PASO | Etapa | Duración | Anterior | Estado |", "|---|---|---:|---:|:---:|"]
+    for p in datos['pasos']:
+        previo = f"{previos[p['paso']]:.1f} s" if p['paso'] in previos else "—"
+        lineas.append(f"| {p['paso']} | {p['nombre']} | {p['segundos'] or 0:.1f} s | {previo} | "
+                      f"{ICONOS_ESTADO[p['estado']]} |")
+
+    if datos['alertas']:
+        lineas += ["", "**⚠️ Alertas:**"]
+        lineas += [f"- PASO {a['paso'] or '—'}: {a['mensaje']}" for a in datos['alertas'][:20]]
+        if len(datos['alertas']) > 20:
+            lineas.append(f"- … y {len(datos['alertas']) - 20} más")
+
+    contadores_previos = (anterior or {}).get('contadores', {})
+    lineas += ["", "| Contador | Valor | Anterior |", "|---|---:|---:|"]
+    for nombre, valor in datos['contadores'].items():
+        previo = _formato_contador(nombre, contadores_previos[nombre]) if nombre in contadores_previos else "—"
+        lineas.append(f"| {nombre} | {_formato_contador(nombre, valor)} | {previo} |")
+
+    if datos['operaciones']:
+        lineas += ["", "| Operación | Llamadas | Errores | Total | p50 | p95 | Máx. |", "|---|---:|---:|---:|---:|---:|---:|"]
+        for nombre, o in datos['operaciones'].items():
+            lineas.append(f"| {nombre} | {o['llamadas']} | {o['errores']} | {o['segundos_total']:.2f} s | "
+                          f"{o['p50']:.2f} s | {o['p95']:.2f} s | {o['max']:.2f} s |")
+
+    if datos['estado'] != 'error':
+        lineas += ["", "📱 Revisa tu Telegram para ver los resultados"]
+    return "\n".join(lineas) + "\n"
+
+def exportar_metricas(error=None):
+    """
+    Cierra las métricas de la ejecución y las escribe: JSON completo en METRICAS_PATH,
+    una línea resumida en el historial de CACHE_DIR (últimas METRICAS_HISTORIAL_MAX
+    ejecuciones) y, en GitHub Actions, las tablas en GITHUB_STEP_SUMMARY.
+    """
+    METRICAS.finalizar(error)
+    datos = METRICAS.a_dict()
 
-# Lunes (0): revisa Viernes, Sábado y Domingo = 3 ediciones
-# Otros días: revisa hoy y ayer = 2 ediciones
-DIAS_A_REVISAR = 3 if DIA_SEMANA == 0 else 1
+    ruta_historial = os.path.join(CACHE_DIR, NOMBRE_HISTORIAL_METRICAS)
+    historial = []
+    try:
+        with open(ruta_historial, encoding='utf-8') as f:
+            historial = [linea for linea in f.read().splitlines() if linea.strip()]
+    except OSError:
+        pass
+    try:
+        anterior = json.loads(historial[-1]) if historial else None
+    except ValueError:
+        anterior = None
+
+    resumen = {
+        'inicio': datos['inicio'],
+        'estado': datos['estado'],
+        'segundos': datos['segundos'],
+        'pasos': {p['paso']: p['segundos'] for p in datos['pasos']},
+        'contadores': datos['contadores'],
+    }
+    historial = historial[-(METRICAS_HISTORIAL_MAX - 1):] if METRICAS_HISTORIAL_MAX > 1 else []
+    historial.append(json.dumps(resumen, ensure_ascii=False))
 
-print(f"📅 HOY: {HOY.strftime('%d/%m/%Y')} - DÍA: {['Lun','Mar','Mié','Jue','Vie','Sáb','Dom'][DIA_SEMANA]}")
-print(f"🔍 DÍAS A REVISAR: {DIAS_A_REVISAR}")
-print("="*100)
+    try:
+        with open(METRICAS_PATH, 'w', encoding='utf-8') as f:
+            json.dump(datos, f, ensure_ascii=False, indent=1)
+        print(f"\n📈 Métricas guardadas en {METRICAS_PATH}")
+    except OSError as e:
+        print(f"\n⚠️ No se pudieron guardar las métricas: {e}")
+    guardar_cache_local(NOMBRE_HISTORIAL_METRICAS, ("\n".join(historial) + "\n").encode('utf-8'))
+
+    if GITHUB_STEP_SUMMARY:
+        try:
+            with open(GITHUB_STEP_SUMMARY, 'a', encoding='utf-8') as f:
+                f.write(resumen_markdown(datos, anterior))
+        except OSError as e:
+            print(f"⚠️ No se pudo escribir el resumen de GitHub: {e}")
+    return datos
 
 # =============================================================================
 # GOOGLE DRIVE CLIENT
 # =============================================================================
 
 class GoogleDriveClient:
-    def __init__(self, credentials_json):
+    # Metadatos que se piden al buscar o validar un archivo (y que guarda la caché)
+    CAMPOS_ARCHIVO = 'id, name, md5Checksum, trashed, parents, appProperties'
+
+    def __init__(self, credentials_json, cache_path=None, drive_service=None, sheets_service=None):
         print("\n🔐 INICIALIZANDO GOOGLE DRIVE CLIENT...")
-        credentials_dict = json.loads(base64.b64decode(credentials_json))
-        credentials = service_account.Credentials.from_service_account_info(
-            credentials_dict,
-            scopes=[
-                'https://www.googleapis.com/auth/drive',
-                'https://www.googleapis.com/auth/spreadsheets'
-            ]
-        )
-        self.drive_service = build('drive', 'v3', credentials=credentials)
-        self.sheets_service = build('sheets', 'v4', credentials=credentials)
+        self.credentials = None
+        if credentials_json:
+            from google.oauth2 import service_account
+
+            credentials_dict = json.loads(base64.b64decode(credentials_json))
+            self.credentials = service_account.Credentials.from_service_account_info(
+                credentials_dict,
+                scopes=[
+                    'https://www.googleapis.com/auth/drive',
+                    'https://www.googleapis.com/auth/spreadsheets'
+                ]
+            )
+        # Los servicios se construyen al primer uso (Sheets no se usa en todas las ejecuciones).
+        # También se pueden recibir ya construidos (p. ej. los dobles en memoria de benchmarks/).
+        self._drive_service = drive_service
+        self._sheets_service = sheets_service
+
+        # Caché nombre → ID: "carpeta/nombre" → file id (persistible entre ejecuciones)
+        # y metadatos ya verificados en esta ejecución (file id → dict)
+        self.cache_path = cache_path
+        self._ids = {}
+        self._verificados = {}
+        # en_memoria: ya verificado en esta ejecución, sin llamadas (ahorra un files().list);
+        # verificados: un files().get en lugar del files().list (no ahorra llamadas);
+        # invalidos: files().get + files().list (una llamada de más); fallos: files().list
+        self.cache_stats = {'en_memoria': 0, 'verificados': 0, 'fallos': 0, 'invalidos': 0}
+        self._cargar_cache_ids()
+
+        # Índice md5Checksum → webViewLink de los PDFs ya subidos (se arma al primer upload_pdf)
+        self._indice_pdf = None
+        self.pdf_reutilizados = 0
         print("   ✅ Cliente inicializado correctamente")
 
-    def get_file_by_name(self, folder_id, filename):
+    def _construir_servicio(self, nombre, version):
+        from googleapiclient.discovery import build
+        # static_discovery: documento de discovery empaquetado con googleapiclient, sin pedirlo por red;
+        # cache_discovery=False evita el intento (y el aviso) de la caché de discovery basada en archivos
+        return build(nombre, version, credentials=self.credentials,
+                     static_discovery=True, cache_discovery=False)
+
+    @property
+    def drive_service(self):
+        if self._drive_service is None:
+            self._drive_service = self._construir_servicio('drive', 'v3')
+        return self._drive_service
+
+    @property
+    def sheets_service(self):
+        if self._sheets_service is None:
+            self._sheets_service = self._construir_servicio('sheets', 'v4')
+        return self._sheets_service
+
+    def _cargar_cache_ids(self):
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return
+        try:
+            with open(self.cache_path, encoding='utf-8') as f:
+                self._ids = json.load(f)
+            print(f"   🗂️ Caché de IDs de Drive: {len(self._ids)} entradas")
+        except (OSError, ValueError) as e:
+            print(f"   ⚠️ Caché de IDs ilegible, se ignora: {e}")
+
+    def guardar_cache_ids(self):
+        if not self.cache_path:
+            return
         try:
-            query = f"name='{filename}' and '{folder_id}' in parents and trashed=false"
-            results = self.drive_service.files().list(q=query, fields='files(id, name)').execute()
-            files = results.get('files', [])
-            if files:
-                print(f"   ✅ Archivo encontrado: {filename} (ID: {files[0]['id']})")
+            os.makedirs(os.path.dirname(self.cache_path) or '.', exist_ok=True)
+            with open(self.cache_path + '.tmp', 'w', encoding='utf-8') as f:
+                json.dump(self._ids, f, ensure_ascii=False)
+            os.replace(self.cache_path + '.tmp', self.cache_path)
+        except OSError as e:
+            print(f"   ⚠️ No se pudo guardar la caché de IDs: {e}")
+
+    def _recordar(self, folder_id, filename, meta):
+        self._ids[f"{folder_id}/{filename}"] = meta['id']
+        self._verificados[meta['id']] = meta
+
+    def _verificar(self, file_id, folder_id, filename):
+        """Un ID cacheado sirve si el archivo existe, no está en la papelera y sigue en esa carpeta con ese nombre"""
+        try:
+            meta = ejecutar_api('drive.files.get',
+                                self.drive_service.files().get(fileId=file_id, fields=self.CAMPOS_ARCHIVO))
+        except Exception:
+            return None
+        if meta.get('trashed') or meta.get('name') != filename or folder_id not in meta.get('parents', []):
+            return None
+        return meta
+
+    def find_file(self, folder_id, filename, app_properties=None):
+        """
+        Metadatos del archivo (id, md5Checksum, appProperties, ...) o None si no existe.
+        Primero la caché nombre → ID (verificada una vez por ejecución con files().get);
+        si no hay entrada válida, una consulta files().list.
+        Con app_properties, el archivo solo cuenta si tiene esas propiedades.
+        """
+        clave = f"{folder_id}/{filename}"
+        meta = None
+        file_id = self._ids.get(clave)
+        if file_id:
+            meta = self._verificados.get(file_id)
+            if meta:
+                self.cache_stats['en_memoria'] += 1
             else:
+                meta = self._verificar(file_id, folder_id, filename)
+                if meta:
+                    self._verificados[file_id] = meta
+                    self.cache_stats['verificados'] += 1
+            if meta is None:
+                self.cache_stats['invalidos'] += 1
+                self._ids.pop(clave, None)
+
+        if meta is None:
+            self.cache_stats['fallos'] += 1
+            try:
+                query = f"name='{filename}' and '{folder_id}' in parents and trashed=false"
+                results = ejecutar_api('drive.files.list', self.drive_service.files().list(
+                    q=query, fields=f'files({self.CAMPOS_ARCHIVO})'))
+                files = results.get('files', [])
+            except Exception as e:
+                print(f"   ❌ Error buscando {filename}: {e}")
+                return None
+            if not files:
                 print(f"   ℹ️ Archivo NO existe: {filename}")
-            return files[0]['id'] if files else None
-        except Exception as e:
-            print(f"   ❌ Error buscando {filename}: {e}")
+                return None
+            meta = files[0]
+            self._recordar(folder_id, filename, meta)
+
+        propiedades = meta.get('appProperties') or {}
+        if any(propiedades.get(k) != v for k, v in (app_properties or {}).items()):
+            print(f"   ℹ️ {filename} existe pero con otras propiedades")
             return None
+        print(f"   ✅ Archivo encontrado: {filename} (ID: {meta['id']})")
+        return meta
+
+    def get_file_by_name(self, folder_id, filename, app_properties=None):
+        file = self.find_file(folder_id, filename, app_properties)
+        return file['id'] if file else None
+
+    def download_bytes(self, file_id):
+        from googleapiclient.http import MediaIoBaseDownload
 
-    def download_text_file(self, file_id):
         try:
             print(f"   ⬇️ Descargando archivo ID: {file_id}...")
-            request = self.drive_service.files().get_media(fileId=file_id)
-            fh = io.BytesIO()
-            downloader = MediaIoBaseDownload(fh, request)
-            done = False
-            while not done:
-                _, done = downloader.next_chunk()
-            content = fh.getvalue().decode('utf-8')
-            print(f"   ✅ Descargado: {len(content)} chars, {len(content.split())} palabras")
-            return content
+            with METRICAS.tramo('drive.files.get_media'):
+                request = self.drive_service.files().get_media(fileId=file_id)
+                fh = io.BytesIO()
+                downloader = MediaIoBaseDownload(fh, request)
+                done = False
+                while not done:
+                    _, done = downloader.next_chunk()
+            METRICAS.contar('bytes_drive_descargados', fh.tell())
+            return fh.getvalue()
         except Exception as e:
             print(f"   ❌ Error descargando: {e}")
+            return None
+
+    def download_text_file(self, file_id):
+        data = self.download_bytes(file_id)
+        if data is None:
             return ""
+        content = data.decode('utf-8')
+        print(f"   ✅ Descargado: {len(content)} chars, {len(content.split())} palabras")
+        return content
 
-    def upload_text_file(self, folder_id, filename, content):
-        try:
-            print(f"\n💾 SUBIENDO/ACTUALIZANDO: {filename}")
-            print(f"   📊 Tamaño: {len(content)} chars, {len(content.split())} palabras")
+    def upload_bytes(self, folder_id, filename, data, mimetype, app_properties=None):
+        """
+        Crea o reemplaza (mismo nombre en la carpeta) un archivo con el contenido dado.
+        Si el MD5 del contenido coincide con el md5Checksum que ya tiene Drive, no sube nada.
+        """
+        from googleapiclient.http import MediaIoBaseUpload
 
+        try:
             file_metadata = {
                 'name': filename,
                 'parents': [folder_id],
-                'mimeType': 'text/plain'
+                'mimeType': mimetype
             }
+            if app_properties:
+                file_metadata['appProperties'] = app_properties
             media = MediaIoBaseUpload(
-                io.BytesIO(content.encode('utf-8')),
-                mimetype='text/plain',
+                io.BytesIO(data),
+                mimetype=mimetype,
                 resumable=True
             )
-            existing_id = self.get_file_by_name(folder_id, filename)
+            existente = self.find_file(folder_id, filename)
+            existing_id = existente['id'] if existente else None
+
+            if existente and existente.get('md5Checksum') == hashlib.md5(data).hexdigest():
+                print(f"   ⚡ Sin cambios (MD5 igual al de Drive), no se sube {filename}")
+                return True
 
             if existing_id:
-                self.drive_service.files().update(
+                file = ejecutar_api('drive.files.update', self.drive_service.files().update(
                     fileId=existing_id,
-                    media_body=media
-                ).execute()
-                print(f"   ✅ Corpus actualizado en Drive (ID: {existing_id})")
+                    body={'appProperties': app_properties} if app_properties else None,
+                    media_body=media,
+                    fields=self.CAMPOS_ARCHIVO
+                ))
+                print(f"   ✅ Archivo actualizado en Drive (ID: {existing_id})")
             else:
-                file = self.drive_service.files().create(
+                file = ejecutar_api('drive.files.create', self.drive_service.files().create(
                     body=file_metadata,
                     media_body=media,
-                    fields='id'
-                ).execute()
-                print(f"   ✅ Corpus creado en Drive (ID: {file.get('id')})")
+                    fields=self.CAMPOS_ARCHIVO
+                ))
+                print(f"   ✅ Archivo creado en Drive (ID: {file.get('id')})")
+            METRICAS.contar('bytes_drive_subidos', len(data))
+            if file and file.get('id'):
+                self._recordar(folder_id, filename, file)
             return True
         except Exception as e:
             print(f"   ❌ Error subiendo: {e}")
             return False
 
-    def upload_pdf(self, folder_id, filename, pdf_bytes):
+    def upload_text_file(self, folder_id, filename, content):
+        print(f"\n💾 SUBIENDO/ACTUALIZANDO: {filename}")
+        print(f"   📊 Tamaño: {len(content)} chars, {len(content.split())} palabras")
+        return self.upload_bytes(folder_id, filename, content.encode('utf-8'), 'text/plain')
+
+    def _listar_todo(self, query, fields):
+        """files().list con paginación: todos los archivos que cumplen `query`"""
+        archivos = []
+        page_token = None
+        while True:
+            results = ejecutar_api('drive.files.list', self.drive_service.files().list(
+                q=query,
+                fields=f'nextPageToken, files({fields})',
+                pageSize=1000,
+                pageToken=page_token
+            ))
+            archivos.extend(results.get('files', []))
+            page_token = results.get('nextPageToken')
+            if not page_token:
+                return archivos
+
+    def _carpetas_del_arbol(self, desde):
+        """
+        DRIVE_FOLDER_ID y sus subcarpetas (un nivel: la carpeta de cada día o lote de backfill)
+        creadas después de `desde`. Por createdTime y no por la fecha del nombre: la carpeta de un
+        lote de backfill lleva fechas viejas pero sus PDFs se subieron recién.
+        """
+        if not DRIVE_FOLDER_ID:
+            return []
+        subcarpetas = self._listar_todo(
+            f"'{DRIVE_FOLDER_ID}' in parents and mimeType='application/vnd.google-apps.folder' and trashed=false "
+            f"and createdTime > '{desde}'",
+            'id')
+        return [DRIVE_FOLDER_ID] + [c['id'] for c in subcarpetas]
+
+    def _cargar_indice_pdf(self, carpetas_por_consulta=40):
+        """
+        Índice de PDFs ya subidos, armado con los md5Checksum que calcula Drive.
+        Solo cuenta los PDFs del árbol de DRIVE_FOLDER_ID (no los de otras carpetas que la
+        cuenta de servicio pueda ver, ni los de la papelera), modificados en los últimos
+        INDICE_PDF_DIAS días: suficiente para cubrir el solapamiento de ediciones entre
+        ejecuciones (p. ej. lunes vs. jueves-sábado). Las subcarpetas creadas antes de esa
+        ventana no se listan: el costo no crece con la historia de la carpeta raíz.
+        """
+        indice = {}
+        desde = f"{(HOY - timedelta(days=INDICE_PDF_DIAS)).isoformat()}T00:00:00"
         try:
+            carpetas = self._carpetas_del_arbol(desde)
+            # Varias carpetas por consulta ('a' in parents or 'b' in parents ...) sin exceder el largo de q
+            for i in range(0, len(carpetas), carpetas_por_consulta):
+                padres = " or ".join(f"'{c}' in parents" for c in carpetas[i:i + carpetas_por_consulta])
+                query = (f"({padres}) and mimeType='application/pdf' and trashed=false "
+                         f"and modifiedTime > '{desde}'")
+                for f in self._listar_todo(query, 'id, md5Checksum, webViewLink'):
+                    if f.get('md5Checksum') and f.get('webViewLink'):
+                        indice.setdefault(f['md5Checksum'], f['webViewLink'])
+            print(f"   🗂️ Índice de PDFs en Drive: {len(indice)} archivos en {len(carpetas)} carpetas "
+                  f"(últimos {INDICE_PDF_DIAS} días)")
+        except Exception as e:
+            print(f"   ⚠️ No se pudo armar el índice de PDFs ({e}), se suben sin verificar duplicados")
+        return indice
+
+    def upload_pdf(self, folder_id, filename, pdf, md5=None):
+        """
+        Sube un PDF con subida reanudable por bloques. `pdf` puede ser bytes o un archivo
+        abierto (p. ej. el temporal de descargar_pdf); en ese caso `md5` debe venir
+        precalculado para no releerlo entero.
+        """
+        from googleapiclient.http import MediaIoBaseUpload
+
+        try:
+            if isinstance(pdf, (bytes, bytearray)):
+                md5 = md5 or hashlib.md5(pdf).hexdigest()
+                pdf = io.BytesIO(pdf)
+            tamano = pdf.seek(0, io.SEEK_END)
+            pdf.seek(0)
             print(f"\n📤 SUBIENDO PDF: {filename}")
-            print(f"   📊 Tamaño: {len(pdf_bytes) / 1024:.2f} KB")
+            print(f"   📊 Tamaño: {tamano / 1024:.2f} KB")
+
+            # Direccionado por contenido: el mismo PDF ya subido se reutiliza
+            if self._indice_pdf is None:
+                self._indice_pdf = self._cargar_indice_pdf()
+            existente = self._indice_pdf.get(md5) if md5 else None
+            if existente:
+                self.pdf_reutilizados += 1
+                METRICAS.contar('pdfs_reutilizados')
+                print(f"   ⚡ PDF ya existe en Drive (MD5 {md5[:12]}…), no se vuelve a subir")
+                print(f"   🔗 Link: {existente}")
+                return existente
 
             file_metadata = {
                 'name': filename,
@@ -148,17 +750,22 @@ class GoogleDriveClient:
                 'mimeType': 'application/pdf'
             }
             media = MediaIoBaseUpload(
-                io.BytesIO(pdf_bytes),
+                pdf,
                 mimetype='application/pdf',
+                chunksize=PDF_CHUNK_SUBIDA_MB * 1024 * 1024,
                 resumable=True
             )
-            file = self.drive_service.files().create(
+            file = ejecutar_api('drive.files.create', self.drive_service.files().create(
                 body=file_metadata,
                 media_body=media,
-                fields='id, webViewLink'
-            ).execute()
+                fields='id, webViewLink, md5Checksum'
+            ))
+            METRICAS.contar('pdfs_subidos')
+            METRICAS.contar('bytes_drive_subidos', tamano)
 
             link = file.get('webViewLink', '')
+            if link and (file.get('md5Checksum') or md5):
+                self._indice_pdf[file.get('md5Checksum') or md5] = link
             print(f"   ✅ PDF subido exitosamente")
             print(f"   🔗 Link: {link}")
             return link
@@ -181,11 +788,12 @@ class GoogleDriveClient:
                 'parents': [parent_id],
                 'mimeType': 'application/vnd.google-apps.folder'
             }
-            folder = self.drive_service.files().create(
+            folder = ejecutar_api('drive.files.create', self.drive_service.files().create(
                 body=file_metadata,
-                fields='id'
-            ).execute()
+                fields=self.CAMPOS_ARCHIVO
+            ))
             folder_id = folder.get('id')
+            self._recordar(parent_id, folder_name, folder)
             print(f"   ✅ Carpeta creada (ID: {folder_id})")
             return folder_id
         except Exception as e:
@@ -195,13 +803,13 @@ class GoogleDriveClient:
     def append_to_sheet(self, spreadsheet_id, range_name, values):
         try:
             body = {'values': values}
-            result = self.sheets_service.spreadsheets().values().append(
+            result = ejecutar_api('sheets.values.append', self.sheets_service.spreadsheets().values().append(
                 spreadsheetId=spreadsheet_id,
                 range=range_name,
                 valueInputOption='RAW',
                 insertDataOption='INSERT_ROWS',
                 body=body
-            ).execute()
+            ))
             print(f"   ✅ {len(values)} filas agregadas a Sheets")
             return result
         except Exception as e:
@@ -212,37 +820,204 @@ class GoogleDriveClient:
 # TELEGRAM
 # =============================================================================
 
-def enviar_telegram(mensaje, bot_token, chat_id):
+def _largo_telegram(texto):
+    """Largo como lo cuenta Telegram (unidades UTF-16); las etiquetas se cuentan, queda del lado seguro"""
+    return len(texto.encode('utf-16-le')) // 2
+
+def _espera_telegram(response):
+    """retry_after (s) de una respuesta 429 de la Bot API, acotado a TELEGRAM_ESPERA_MAX"""
     try:
-        url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
-        data = {'chat_id': chat_id, 'text': mensaje, 'parse_mode': 'HTML'}
-        response = requests.post(url, data=data, timeout=10)
-        response.raise_for_status()
-        print("   ✅ Telegram enviado")
-        return True
-    except Exception as e:
-        print(f"   ❌ Error Telegram: {e}")
-        return False
+        retry_after = float(response.json().get('parameters', {}).get('retry_after', 1))
+    except Exception:
+        retry_after = float(response.headers.get('Retry-After', '1') or 1)
+    return min(TELEGRAM_ESPERA_MAX, max(0.0, retry_after))
+
+def enviar_telegram(mensaje, bot_token, chat_id):
+    """
+    Un sendMessage con parse_mode=HTML. Si Telegram responde 429 espera su retry_after
+    y reintenta (hasta TELEGRAM_REINTENTOS veces). Retorna True si el mensaje fue aceptado.
+    """
+    import requests
+
+    with METRICAS.tramo('telegram.sendMessage') as tramo:
+        try:
+            url = f"{TELEGRAM_API_URL}/bot{bot_token}/sendMessage"
+            data = {'chat_id': chat_id, 'text': mensaje, 'parse_mode': 'HTML'}
+            for intento in range(TELEGRAM_REINTENTOS + 1):
+                response = requests.post(url, data=data, timeout=10)
+                if response.status_code != 429 or intento == TELEGRAM_REINTENTOS:
+                    break
+                espera = _espera_telegram(response)
+                METRICAS.contar('reintentos_telegram')
+                print(f"   ⏳ Telegram pidió esperar {espera:.0f} s (429)")
+                time.sleep(espera)
+            tramo['http'] = response.status_code
+            if not response.ok:
+                # La descripción de la Bot API explica el rechazo y no incluye el token
+                try:
+                    descripcion = response.json().get('description', '')
+                except Exception:
+                    descripcion = ''
+                tramo.update(ok=False, error=f"HTTP {response.status_code}")
+                print(f"   ❌ Error Telegram: HTTP {response.status_code} {descripcion}")
+                return False
+            print("   ✅ Telegram enviado")
+            return True
+        except Exception as e:
+            # El token va en la URL: no se copia el texto de la excepción a las métricas
+            tramo.update(ok=False, error=type(e).__name__)
+            print(f"   ❌ Error Telegram: {e}")
+            return False
+
+def enviar_mensajes_telegram(mensajes, bot_token, chat_id):
+    """
+    Envía las partes del resumen en orden, de a una: entre dos partes deja al menos
+    TELEGRAM_INTERVALO s (límite por chat de la Bot API); los 429 que lleguen igual
+    los espera enviar_telegram(). Una parte fallida no frena las siguientes.
+    Retorna True si se enviaron todas.
+    """
+    enviados = 0
+    ultimo = None  # time.monotonic() del último sendMessage a este chat
+    for mensaje in mensajes:
+        if ultimo is not None:
+            espera = TELEGRAM_INTERVALO - (time.monotonic() - ultimo)
+            if espera > 0:
+                time.sleep(espera)
+        enviados += bool(enviar_telegram(mensaje, bot_token, chat_id))
+        ultimo = time.monotonic()
+    if len(mensajes) > 1:
+        print(f"   📨 Telegram: {enviados}/{len(mensajes)} partes enviadas")
+    return enviados == len(mensajes)
+
+def _recortar_escapado(texto, maximo):
+    """
+    `texto` escapado para el HTML de Telegram en hasta `maximo` caracteres; si no entra se
+    recorta el texto sin escapar (así nunca queda una entidad &lt; partida) y termina en "…"
+    """
+    escapado = escape(texto, quote=False)
+    if _largo_telegram(escapado) <= maximo:
+        return escapado
+    if maximo < 1:
+        return ""
+    # Prefijo más largo que, escapado y con "…", entra en `maximo`
+    bajo, alto = 0, len(texto)
+    while bajo < alto:
+        medio = (bajo + alto + 1) // 2
+        if _largo_telegram(escape(texto[:medio], quote=False)) + 1 <= maximo:
+            bajo = medio
+        else:
+            alto = medio - 1
+    return escape(texto[:bajo], quote=False) + "…"
+
+def bloque_norma_telegram(norma, limite=None):
+    """
+    Título en negrita y sumilla de una norma, escapados, en hasta `limite` caracteres:
+    se recorta primero la sumilla y, si el título solo ya no entra, también el título.
+    """
+    limite = limite or TELEGRAM_LIMITE_MENSAJE
+    tipo_etiqueta = ""
+    if str(norma.get('TipoEdicion', '')).strip().lower() == "extraordinaria":
+        tipo_etiqueta = " (Extraordinaria)"
+    marco = _largo_telegram(f"<b>{tipo_etiqueta}</b>\n\n\n")
+    titulo = _recortar_escapado(str(norma.get('titulo', '')), limite - marco)
+    sumilla = _recortar_escapado(str(norma.get('Sumilla', '')), limite - marco - _largo_telegram(titulo))
+    return f"<b>{titulo}{tipo_etiqueta}</b>\n{sumilla}\n\n"
+
+def partir_mensaje(encabezado, bloques, limite=None):
+    """
+    Arma mensajes de hasta `limite` caracteres sin partir ningún bloque: el encabezado va
+    en el primero y, si hay más de uno, cada mensaje termina con "(parte k/n)".
+    """
+    limite = limite or TELEGRAM_LIMITE_MENSAJE
+    pie_reservado = _largo_telegram("<i>(parte 999/999)</i>")
+    mensajes = []
+    actual = encabezado
+    for bloque in bloques:
+        if actual.strip() and _largo_telegram(actual) + _largo_telegram(bloque) > limite - pie_reservado:
+            mensajes.append(actual)
+            actual = ""
+        actual += bloque
+    mensajes.append(actual)
+    if len(mensajes) > 1:
+        mensajes = [f"{m}<i>(parte {k}/{len(mensajes)})</i>" for k, m in enumerate(mensajes, 1)]
+    return mensajes
+
+def armar_mensajes_telegram(aceptados):
+    """
+    Resumen del PASO 12 (HTML de Telegram) con las normas aceptadas o el aviso de que no hubo.
+    Retorna la lista de mensajes (partir_mensaje) a enviar en orden.
+    """
+    if aceptados:
+        if DIA_SEMANA == 0:
+            fecha_inicio = (HOY - timedelta(days=3)).strftime('%d/%m/%y')
+            fecha_fin = HOY.strftime('%d/%m/%y')
+            encabezado = f"Buen día equipo, se envía la revisión de normas relevantes al sector del {fecha_inicio} al {fecha_fin}\n\n"
+        else:
+            encabezado = f"Buen día equipo, se envía la revisión de normas relevantes al sector {HOY.strftime('%d/%m/%y')}\n\n"
+
+        # Reserva para el encabezado y el pie de "(parte k/n)": un bloque solo siempre entra
+        limite_bloque = TELEGRAM_LIMITE_MENSAJE - _largo_telegram(encabezado) - 32
+        return partir_mensaje(encabezado, [bloque_norma_telegram(n, limite_bloque) for n in aceptados])
+
+    if DIA_SEMANA == 0:
+        fecha_inicio = (HOY - timedelta(days=3)).strftime('%d/%m/%y')
+        fecha_fin = HOY.strftime('%d/%m/%y')
+        mensaje = (
+            f"Buen día equipo, el día de hoy no se encontraron normas relevantes del sector.\n\n"
+            f"📅 Periodo revisado: del {fecha_inicio} al {fecha_fin}"
+        )
+    else:
+        ayer = HOY - timedelta(days=1)
+        mensaje = (
+            f"Buen día equipo, el día de hoy no se encontraron normas relevantes del sector.\n\n"
+            f"📅 Extraordinaria {ayer.strftime('%d/%m/%y')}\n"
+            f"📅 Ordinaria {HOY.strftime('%d/%m/%y')}"
+        )
+    return [mensaje]
 
 # =============================================================================
 # NORMALIZACIÓN
 # =============================================================================
 
+# Tabla de traducción ASCII: todo lo que no sea [a-z0-9] ni espacio en blanco → ' '
+# (equivale a re.sub(r'[^a-z0-9\s]', ' ', ...) sobre texto ya convertido a ASCII)
+_TABLA_NORMALIZACION = {
+    i: ' ' for i in range(128)
+    if not (chr(i).isdigit() or 'a' <= chr(i) <= 'z' or chr(i).isspace())
+}
+
+def _normalizar_sin_cache(texto):
+    texto = texto.lower()
+    if not texto.isascii():
+        texto = unicodedata.normalize('NFKD', texto).encode('ascii', 'ignore').decode('ascii')
+    # split() sin argumentos colapsa cualquier secuencia de espacios y recorta extremos
+    return ' '.join(texto.translate(_TABLA_NORMALIZACION).split())
+
+# Lista desde el import, sin configurar(); esta solo la recrea si NORMALIZACION_CACHE pide otro tamaño
+NORMALIZACION_CACHE_DEFECTO = 4096
+_normalizar = functools.lru_cache(maxsize=NORMALIZACION_CACHE_DEFECTO)(_normalizar_sin_cache)
+
 def normalizar_texto(texto):
+    """minúsculas, sin tildes, solo [a-z0-9] separados por un espacio (con caché LRU acotada)"""
     if not isinstance(texto, str):
         return ""
-    texto = texto.lower()
-    texto = unicodedata.normalize('NFKD', texto).encode('ascii', 'ignore').decode('utf-8')
-    texto = re.sub(r'[^a-z0-9\s]', ' ', texto)
-    texto = re.sub(r'\s+', ' ', texto).strip()
-    return texto
+    return _normalizar(texto)
+
+def normalizar_lote(textos):
+    """Normaliza una lista completa (candidatos, columna de Sheets); los repetidos se calculan una vez"""
+    unicos = {}
+    for texto in textos:
+        if isinstance(texto, str) and texto not in unicos:
+            unicos[texto] = _normalizar(texto)
+    return [unicos.get(texto, "") if isinstance(texto, str) else "" for texto in textos]
 
 # =============================================================================
 # KEYWORDS Y FILTROS
 # =============================================================================
+# Listas tal como se escriben; compilar_palabras_clave() las normaliza y arma el autómata.
 
 # Entidades del sector → aceptar SIEMPRE, sin importar keywords ni sector
-ENTIDADES_SECTOR = set([normalizar_texto(x) for x in [
+ENTIDADES_SECTOR = [
     'osinergmin',
     'perupetro',
     'minem',
@@ -251,10 +1026,10 @@ ENTIDADES_SECTOR = set([normalizar_texto(x) for x in [
     'oefa',
     'organismo supervisor de la inversion en energia y mineria',
     'organismo de evaluacion y fiscalizacion ambiental'
-]])
+]
 
 # Sectores en <h4> que son siempre relevantes
-SECTORES_PRIORITARIOS = set([normalizar_texto(x) for x in [
+SECTORES_PRIORITARIOS = [
     'energia y minas',
     'energia minas',
     'minem',
@@ -263,10 +1038,10 @@ SECTORES_PRIORITARIOS = set([normalizar_texto(x) for x in [
     'organismo supervisor de la inversion en energia y mineria',
     'perupetro',
     'oefa'
-]])
+]
 
 # Sectores que pueden tener normas relevantes → umbral más bajo
-SECTORES_SECUNDARIOS = set([normalizar_texto(x) for x in [
+SECTORES_SECUNDARIOS = [
     'decretos de urgencia',
     'decreto de urgencia',
     'presidencia del consejo de ministros',
@@ -275,17 +1050,17 @@ SECTORES_SECUNDARIOS = set([normalizar_texto(x) for x in [
     'organismo tecnico especializado',
     'organismos reguladores',
     'organismo regulador'
-]])
+]
 
 # Sectores que nunca son relevantes → descartar siempre
-SECTORES_EXCLUIR = set([normalizar_texto(x) for x in [
+SECTORES_EXCLUIR = [
     'educacion', 'salud', 'defensa', 'interior', 'mujer',
     'desarrollo social', 'trabajo', 'migraciones', 'cultura',
     'vivienda', 'comunicaciones', 'justicia', 'relaciones exteriores', 'midis'
-]])
+]
 
 # Palabras obligatorias ampliadas → al menos una debe aparecer para pasar al TF-IDF
-PALABRAS_OBLIGATORIAS = set([normalizar_texto(x) for x in [
+PALABRAS_OBLIGATORIAS = [
     'hidrocarburos', 'hidrocarburo', 'petroleo', 'gas natural',
     'perupetro', 'gnv', 'glp', 'oleoducto', 'gasoducto', 'refineria',
     'osinergmin', 'oefa', 'banda de precios', 'combustible',
@@ -295,9 +1070,9 @@ PALABRAS_OBLIGATORIAS = set([normalizar_texto(x) for x in [
     'tarifa de transporte', 'precio de gas', 'precio del gas',
     'electromovilidad', 'vehiculo electrico', 'estacion de carga',
     'biocombustible', 'biodiesel', 'etanol'
-]])
+]
 
-KEYWORDS_MANUAL = [normalizar_texto(x) for x in [
+KEYWORDS_MANUAL = [
     'hidrocarburos', 'hidrocarburo', 'petroleo', 'gas natural', 'gnv', 'glp',
     'perupetro', 'osinergmin', 'minem', 'oefa', 'refineria', 'oleoducto', 'gasoducto',
     'exploracion', 'explotacion', 'combustible', 'diesel', 'gasolina', 'kerosene',
@@ -310,21 +1085,121 @@ KEYWORDS_MANUAL = [normalizar_texto(x) for x in [
     'contrato de servicios', 'lote petrolero', 'actividades de hidrocarburos',
     'instalaciones de gas', 'red de distribucion', 'vehiculo electrico',
     'estacion de carga', 'biocombustible', 'combustibles liquidos'
-]]
-
-tokens_tecnicos = set()
-for kw in KEYWORDS_MANUAL:
-    for token in kw.split():
-        if len(token) > 2:
-            tokens_tecnicos.add(token)
-
-print(f"\n🧠 CONFIGURACIÓN DE FILTRADO:")
-print(f"   Entidades sector (siempre aceptar): {len(ENTIDADES_SECTOR)}")
-print(f"   Sectores prioritarios: {len(SECTORES_PRIORITARIOS)}")
-print(f"   Sectores secundarios: {len(SECTORES_SECUNDARIOS)}")
-print(f"   Palabras obligatorias: {len(PALABRAS_OBLIGATORIAS)}")
-print(f"   Keywords manuales: {len(KEYWORDS_MANUAL)}")
-print(f"   Tokens técnicos: {len(tokens_tecnicos)}")
+]
+
+# =============================================================================
+# MATCHER MULTI-PATRÓN (AHO-CORASICK)
+# =============================================================================
+
+class MatcherPalabras:
+    """
+    Autómata Aho-Corasick compilado una sola vez con todas las listas de keywords.
+    buscar() recorre el texto normalizado en una sola pasada y reporta, por categoría,
+    los patrones que aparecen como subcadena (mismo criterio que `patron in texto`).
+    El costo por texto no depende de cuántos patrones haya.
+    """
+
+    def __init__(self, categorias):
+        # categorias: {nombre: iterable de patrones}; el orden de iteración define
+        # cuál patrón se reporta primero (igual que el primer match del bucle original)
+        self.categorias = list(categorias)
+        self.orden = {}
+        self.siempre = []  # patrones vacíos: '' in texto siempre es True
+        transiciones = [{}]
+        salidas = [[]]
+
+        for categoria, patrones in categorias.items():
+            for posicion, patron in enumerate(patrones):
+                self.orden[(categoria, patron)] = posicion
+                if not patron:
+                    self.siempre.append((categoria, patron))
+                    continue
+                estado = 0
+                for ch in patron:
+                    siguiente = transiciones[estado].get(ch)
+                    if siguiente is None:
+                        siguiente = len(transiciones)
+                        transiciones[estado][ch] = siguiente
+                        transiciones.append({})
+                        salidas.append([])
+                    estado = siguiente
+                salidas[estado].append((categoria, patron))
+
+        # Enlaces de falla (BFS) y tabla de transiciones completa (DFA):
+        # cada estado conoce su destino para todo carácter que aparece en algún patrón;
+        # cualquier otro carácter vuelve a la raíz.
+        falla = [0] * len(transiciones)
+        dfa = [dict(t) for t in transiciones]
+        cola = list(transiciones[0].values())
+        i = 0
+        while i < len(cola):
+            estado = cola[i]
+            i += 1
+            salidas[estado] = salidas[estado] + salidas[falla[estado]]
+            for ch, destino in dfa[falla[estado]].items():
+                dfa[estado].setdefault(ch, destino)
+            for ch, hijo in transiciones[estado].items():
+                falla[hijo] = dfa[falla[estado]].get(ch, 0) if estado else 0
+                if falla[hijo] == hijo:
+                    falla[hijo] = 0
+                cola.append(hijo)
+
+        self._dfa = dfa
+        self._salidas = [tuple(s) for s in salidas]
+        self.num_estados = len(dfa)
+
+    def buscar(self, texto):
+        """Retorna {categoria: set(patrones encontrados)} para todas las categorías"""
+        encontrados = {c: set() for c in self.categorias}
+        for categoria, patron in self.siempre:
+            encontrados[categoria].add(patron)
+        dfa = self._dfa
+        salidas = self._salidas
+        estado = 0
+        for ch in texto:
+            estado = dfa[estado].get(ch, 0)
+            if salidas[estado]:
+                for categoria, patron in salidas[estado]:
+                    encontrados[categoria].add(patron)
+        return encontrados
+
+    def primero(self, categoria, encontrados):
+        """El patrón encontrado que el bucle original habría devuelto primero (o None)"""
+        patrones = encontrados.get(categoria)
+        if not patrones:
+            return None
+        return min(patrones, key=lambda p: self.orden[(categoria, p)])
+
+MATCHER_PALABRAS = None  # se compila en compilar_palabras_clave()
+
+def compilar_palabras_clave():
+    """Normaliza las listas de keywords y compila MATCHER_PALABRAS (requiere configurar())"""
+    global MATCHER_PALABRAS
+
+    def normalizadas(lista):
+        # dict.fromkeys: sin repetidos y en el orden en que están escritas
+        return dict.fromkeys(normalizar_lote(lista))
+
+    keywords = normalizadas(KEYWORDS_MANUAL)
+    tokens_tecnicos = dict.fromkeys(t for kw in keywords for t in kw.split() if len(t) > 2)
+    categorias = {
+        'entidad': normalizadas(ENTIDADES_SECTOR),
+        'prioritario': normalizadas(SECTORES_PRIORITARIOS),
+        'secundario': normalizadas(SECTORES_SECUNDARIOS),
+        'excluir': normalizadas(SECTORES_EXCLUIR),
+        'obligatoria': normalizadas(PALABRAS_OBLIGATORIAS),
+        'token': tokens_tecnicos
+    }
+    MATCHER_PALABRAS = MatcherPalabras(categorias)
+
+    print(f"\n🧠 CONFIGURACIÓN DE FILTRADO:")
+    print(f"   Entidades sector (siempre aceptar): {len(categorias['entidad'])}")
+    print(f"   Sectores prioritarios: {len(categorias['prioritario'])}")
+    print(f"   Sectores secundarios: {len(categorias['secundario'])}")
+    print(f"   Palabras obligatorias: {len(categorias['obligatoria'])}")
+    print(f"   Keywords manuales: {len(keywords)}")
+    print(f"   Tokens técnicos: {len(tokens_tecnicos)}")
+    print(f"   Autómata de keywords: {MATCHER_PALABRAS.num_estados} estados")
 
 # =============================================================================
 # CORPUS INICIAL ENRIQUECIDO
@@ -446,137 +1321,625 @@ norma agriculture ganaderia riego canal
 resolucion pesca acuicultura marina recursos hidrobiologicos
 """
 
+# =============================================================================
+# CORPUS DEDUPLICADO Y PONDERADO
+# =============================================================================
+
+NOMBRE_CORPUS = 'corpus_hidrocarburos.json.gz'
+# Formatos anteriores, se migran automáticamente
+NOMBRE_CORPUS_JSON = 'corpus_hidrocarburos.json'
+NOMBRE_CORPUS_TXT = 'corpus_hidrocarburos.txt'
+
+PESO_FEEDBACK = 3  # una norma confirmada con "S" pesa como 3 apariciones
+
+class CorpusNormas:
+    """
+    Corpus de entrenamiento con cada línea normalizada una sola vez.
+    Cada entrada guarda su peso, fuente y fecha en que se vio por primera vez:
+    - 'inicial':  CORPUS_INICIAL
+    - 'feedback': confirmada con "S" en la columna G de Sheets (peso PESO_FEEDBACK)
+    - 'auto':     aceptada automáticamente (PASO 11); su peso decae con el tiempo y se poda
+    - 'migrado':  línea del antiguo corpus_hidrocarburos.txt
+    """
+
+    PRIORIDAD_FUENTE = {'auto': 0, 'migrado': 1, 'inicial': 2, 'feedback': 3}
+
+    def __init__(self, entradas=None, feedback=None, meta=None):
+        self.entradas = entradas if entradas is not None else {}
+        # Feedback ya aplicado por norma de Sheets: {clave_norma: ["S"|"N", texto_normalizado]}
+        self.feedback = feedback if feedback is not None else {}
+        # Otros datos de ingesta que se guardan junto al corpus
+        self.meta = meta if meta is not None else {}
+
+    def __len__(self):
+        return len(self.entradas)
+
+    def agregar(self, texto, fuente, fecha, peso=1):
+        """Agrega una línea (se normaliza); si ya existe conserva el mayor peso y la fuente más fuerte"""
+        texto = normalizar_texto(texto)
+        if not texto:
+            return False
+        entrada = self.entradas.get(texto)
+        if entrada is None:
+            self.entradas[texto] = {'peso': peso, 'fuente': fuente, 'primera_vez': fecha.isoformat()}
+            return True
+        entrada['peso'] = max(entrada['peso'], peso)
+        if self.PRIORIDAD_FUENTE.get(fuente, 0) > self.PRIORIDAD_FUENTE.get(entrada['fuente'], 0):
+            entrada['fuente'] = fuente
+        return False
+
+    def peso_efectivo(self, entrada, hoy):
+        """Las entradas 'auto' decaen a la mitad cada CORPUS_VIDA_MEDIA_AUTO días (por semanas completas)"""
+        if entrada['fuente'] != 'auto' or CORPUS_VIDA_MEDIA_AUTO <= 0:
+            return entrada['peso']
+        edad = (hoy - date.fromisoformat(entrada['primera_vez'])).days
+        edad = max(0, edad // 7 * 7)  # escalonado semanal: el modelo no cambia todos los días
+        return entrada['peso'] * 0.5 ** (edad / CORPUS_VIDA_MEDIA_AUTO)
+
+    def podar(self, hoy):
+        """Elimina entradas automáticas cuyo peso decayó por debajo de CORPUS_PESO_MINIMO"""
+        viejas = [t for t, e in self.entradas.items() if self.peso_efectivo(e, hoy) < CORPUS_PESO_MINIMO]
+        for texto in viejas:
+            del self.entradas[texto]
+        return len(viejas)
+
+    def datos_entrenamiento(self, hoy):
+        """(líneas únicas, pesos efectivos) en orden estable para el vectorizador"""
+        lineas = sorted(self.entradas)
+        return lineas, [self.peso_efectivo(self.entradas[t], hoy) for t in lineas]
+
+    def quitar_feedback(self, texto):
+        """Retira una línea que venía de feedback "S" si ninguna otra fila "S" la respalda"""
+        if any(v == "S" and t == texto for v, t in self.feedback.values()):
+            return False
+        entrada = self.entradas.get(texto)
+        if entrada and entrada['fuente'] == 'feedback':
+            del self.entradas[texto]
+            return True
+        return False
+
+    def a_json(self):
+        entradas = [{'texto': t, **e} for t, e in self.entradas.items()]
+        return json.dumps(
+            {'version': 1, 'entradas': entradas, 'feedback': self.feedback, 'meta': self.meta},
+            ensure_ascii=False, separators=(',', ':')
+        )
+
+    @classmethod
+    def desde_json(cls, texto):
+        datos = json.loads(texto)
+        return cls(
+            {
+                e['texto']: {'peso': e['peso'], 'fuente': e['fuente'], 'primera_vez': e['primera_vez']}
+                for e in datos.get('entradas', [])
+            },
+            feedback=datos.get('feedback', {}),
+            meta=datos.get('meta', {})
+        )
+
+    @classmethod
+    def desde_texto_plano(cls, texto, fecha):
+        """Migra el formato anterior: cada línea repetida se guarda una vez, con peso = repeticiones"""
+        iniciales = set(normalizar_lote(CORPUS_INICIAL.splitlines()))
+        conteo = {}
+        for linea in normalizar_lote(texto.splitlines()):
+            if linea:
+                conteo[linea] = conteo.get(linea, 0) + 1
+        corpus = cls()
+        for linea, veces in conteo.items():
+            fuente = 'inicial' if linea in iniciales else 'migrado'
+            corpus.agregar(linea, fuente, fecha, peso=min(veces, PESO_FEEDBACK))
+        return corpus
+
+    def sembrar_inicial(self, fecha):
+        for linea in CORPUS_INICIAL.splitlines():
+            self.agregar(linea, 'inicial', fecha)
+
 # =============================================================================
 # GESTIÓN DE CORPUS CON FEEDBACK
 # =============================================================================
 
+def cargar_corpus(drive_client, drive_folder_id):
+    """
+    Lee el corpus de Drive (JSON comprimido). Si solo existe un formato anterior
+    (.json sin comprimir o .txt) lo migra; si no hay nada, corpus vacío (se siembra el inicial).
+    """
+    for nombre, comprimido in ((NOMBRE_CORPUS, True), (NOMBRE_CORPUS_JSON, False)):
+        file_id = drive_client.get_file_by_name(drive_folder_id, nombre)
+        data = drive_client.download_bytes(file_id) if file_id else None
+        if not data:
+            continue
+        try:
+            if comprimido:
+                data = gzip.decompress(data)
+            corpus = CorpusNormas.desde_json(data.decode('utf-8'))
+            print(f"   ✅ Corpus existente encontrado en Drive ({nombre}): {len(corpus)} líneas únicas")
+            return corpus
+        except (OSError, ValueError, KeyError) as e:
+            print(f"   ⚠️ Corpus {nombre} ilegible ({e}), se intenta el formato anterior")
+
+    txt_id = drive_client.get_file_by_name(drive_folder_id, NOMBRE_CORPUS_TXT)
+    if txt_id:
+        texto = drive_client.download_text_file(txt_id)
+        corpus = CorpusNormas.desde_texto_plano(texto, HOY)
+        print(f"   🔄 Migrado {NOMBRE_CORPUS_TXT}: {len(texto.splitlines())} líneas → {len(corpus)} únicas")
+        return corpus
+
+    print("   📝 Corpus no existe — creando con corpus inicial enriquecido")
+    return CorpusNormas()
+
+def guardar_corpus(drive_client, drive_folder_id, corpus):
+    """
+    Único punto de escritura del corpus en la ejecución. gzip con mtime=0: el mismo
+    contenido produce los mismos bytes, así upload_bytes omite la subida si nada cambió.
+    """
+    crudo = corpus.a_json().encode('utf-8')
+    data = gzip.compress(crudo, compresslevel=9, mtime=0)
+    print(f"\n💾 GUARDANDO CORPUS: {len(corpus)} líneas únicas, {len(crudo) / 1024:.1f} KB → {len(data) / 1024:.1f} KB gzip")
+    return drive_client.upload_bytes(drive_folder_id, NOMBRE_CORPUS, data, 'application/gzip')
+
+def rangos_contiguos(filas):
+    """[2, 3, 4, 9, 10] → [(2, 4), (9, 10)]"""
+    rangos = []
+    for fila in sorted(filas):
+        if rangos and fila == rangos[-1][1] + 1:
+            rangos[-1] = (rangos[-1][0], fila)
+        else:
+            rangos.append((fila, fila))
+    return rangos
+
+def leer_textos_filas(drive_client, spreadsheet_id, filas, lote=100):
+    """
+    Lee solo las columnas B (título) y D (sumilla) de las filas indicadas con batchGet,
+    agrupando filas contiguas. Retorna {fila: texto_normalizado}.
+    """
+    textos = {}
+    rangos = rangos_contiguos(filas)
+    for i in range(0, len(rangos), lote):
+        grupo = rangos[i:i + lote]
+        pedidos = [f"{col}{a}:{col}{b}" for a, b in grupo for col in ("B", "D")]
+        result = ejecutar_api('sheets.values.batchGet', drive_client.sheets_service.spreadsheets().values().batchGet(
+            spreadsheetId=spreadsheet_id,
+            ranges=pedidos
+        ))
+        valores = result.get('valueRanges', [])
+        for j, (a, b) in enumerate(grupo):
+            titulos = valores[2 * j].get('values', []) if 2 * j < len(valores) else []
+            sumillas = valores[2 * j + 1].get('values', []) if 2 * j + 1 < len(valores) else []
+            crudos = []
+            for k in range(b - a + 1):
+                titulo = titulos[k][0] if k < len(titulos) and titulos[k] else ""
+                sumilla = sumillas[k][0] if k < len(sumillas) and sumillas[k] else ""
+                crudos.append(f"{titulo} {sumilla}")
+            for k, texto in enumerate(normalizar_lote(crudos)):
+                textos[a + k] = texto
+    return textos
+
+def leer_claves_filas(drive_client, spreadsheet_id, filas, lote=100):
+    """
+    Lee solo las columnas B (título), C (fecha de publicación) y F (tipo) de las filas
+    indicadas con batchGet, agrupando filas contiguas. Retorna {fila: clave_norma}.
+    """
+    claves = {}
+    rangos = rangos_contiguos(filas)
+    for i in range(0, len(rangos), lote):
+        grupo = rangos[i:i + lote]
+        pedidos = [f"{col}{a}:{col}{b}" for a, b in grupo for col in ("B", "C", "F")]
+        result = ejecutar_api('sheets.values.batchGet', drive_client.sheets_service.spreadsheets().values().batchGet(
+            spreadsheetId=spreadsheet_id,
+            ranges=pedidos
+        ))
+        valores = result.get('valueRanges', [])
+        for j, (a, b) in enumerate(grupo):
+            columnas = [valores[3 * j + c].get('values', []) if 3 * j + c < len(valores) else [] for c in range(3)]
+            for k in range(b - a + 1):
+                titulo, fecha, tipo = (col[k][0] if k < len(col) and col[k] else "" for col in columnas)
+                claves[a + k] = clave_norma({'titulo': titulo, 'FechaPublicacion': fecha, 'TipoEdicion': tipo})
+    return claves
+
+def leer_etiquetas_feedback(drive_client, spreadsheet_id, por_fila):
+    """
+    Lee entera solo la columna G (S/N) y la compara con la huella de la ejecución anterior
+    (`por_fila`: {fila: [valor, clave_norma]} de las filas etiquetadas). Solo las filas cuyo
+    valor cambió se identifican con B, C y F (leer_claves_filas).
+    Si una fila que cambió ya no tiene la norma que la huella decía, o la que tiene figura en
+    otra fila sin cambios (se insertaron, borraron u ordenaron filas), la huella no sirve: se
+    vuelven a identificar todas las etiquetadas. Ordenar filas de igual valor no cambia G ni
+    lo aplicado; reemplazar la norma de una fila sin tocar G no se detecta.
+    Retorna ({clave_norma: (valor, fila)}, nueva huella, filas leídas de B/C/F).
+    Si una norma aparece en varias filas etiquetadas vale la última.
+    """
+    result = ejecutar_api('sheets.values.get', drive_client.sheets_service.spreadsheets().values().get(
+        spreadsheetId=spreadsheet_id,
+        range='G2:G'  # Desde fila 2 para saltar encabezado
+    ))
+    valores = {}
+    for idx, celda in enumerate(result.get('values', [])):
+        valor = celda[0].strip().upper() if celda else ""
+        if valor in ("S", "N"):
+            valores[idx + 2] = valor
+
+    previas = {int(fila): tuple(v) for fila, v in por_fila.items()}
+    cambiadas = [fila for fila in sorted(set(valores) | set(previas))
+                 if valores.get(fila) != previas.get(fila, (None,))[0]]
+    claves = leer_claves_filas(drive_client, spreadsheet_id, cambiadas) if cambiadas else {}
+    leidas = len(cambiadas)
+    # La huella deja de servir si una fila cambiada tenía otra norma o si la norma leída
+    # figura también en una fila sin cambios (las filas se corrieron)
+    conservadas = {previas[fila][1] for fila in valores if fila not in claves}
+    if any(fila in previas and claves[fila] != previas[fila][1] for fila in cambiadas) or \
+            any(claves[fila] in conservadas for fila in cambiadas if fila in valores):
+        print("   🔀 Filas insertadas, borradas u ordenadas: se identifican todas las etiquetadas")
+        faltan = [fila for fila in valores if fila not in claves]
+        if faltan:
+            claves.update(leer_claves_filas(drive_client, spreadsheet_id, faltan))
+            leidas += len(faltan)
+    else:
+        for fila in valores:
+            if fila not in claves:
+                claves[fila] = previas[fila][1]
+
+    huella = {str(fila): [valor, claves[fila]] for fila, valor in valores.items()}
+    etiquetas = {claves[fila]: (valor, fila) for fila, valor in sorted(valores.items())}
+    return etiquetas, huella, leidas
+
+def ingerir_feedback(drive_client, spreadsheet_id, corpus):
+    """
+    Aplica al corpus solo el feedback nuevo o editado de la columna G.
+    - Se lee entera solo la columna G; B, C y F solo de las filas cuyo valor cambió desde
+      la ejecución anterior (huella por fila en corpus.meta['feedback_filas'])
+    - Cada etiqueta se identifica por la norma de su fila (clave_norma de B, C y F), no por el
+      número de fila, y se compara con lo ya aplicado (corpus.feedback)
+    - Solo para las normas "S" nuevas o cambiadas se piden las columnas B y D
+    - Una norma que deja de ser "S" (o cuya fila se borró) retira su línea del corpus
+    """
+    # Las versiones anteriores guardaban el feedback por número de fila: esas entradas quedan
+    # como retiradas y sus líneas se conservan si alguna norma "S" actual las respalda
+    for obsoleta in ('ultima_fila', 'sheet_modificado'):
+        corpus.meta.pop(obsoleta, None)
+
+    print("   📊 Leyendo columna G de Sheets...")
+    actuales, huella, leidas = leer_etiquetas_feedback(
+        drive_client, spreadsheet_id, corpus.meta.get('feedback_filas', {}))
+    print(f"   📊 {len(huella)} filas etiquetadas, {leidas} identificadas con B, C y F")
+
+    aplicados = corpus.feedback
+    cambiadas = {clave: v for clave, (v, _) in actuales.items() if aplicados.get(clave, [None])[0] != v}
+    retiradas = [clave for clave in aplicados if clave not in actuales]
+    nuevas = sum(1 for clave in cambiadas if clave not in aplicados)
+    print(f"   📊 Normas etiquetadas: {len(actuales)} — nuevas: {nuevas}, "
+          f"editadas: {len(cambiadas) - nuevas}, sin etiqueta ahora: {len(retiradas)}")
+
+    filas_s = {clave: actuales[clave][1] for clave, v in cambiadas.items() if v == "S"}
+    textos = leer_textos_filas(drive_client, spreadsheet_id, list(filas_s.values())) if filas_s else {}
+
+    positivos = negativos = retirados = 0
+    for clave, valor in cambiadas.items():
+        anterior = aplicados.get(clave)
+        if valor == "S":
+            texto = textos.get(filas_s[clave], "")
+            aplicados[clave] = ["S", texto]
+            if texto:
+                corpus.agregar(texto, 'feedback', HOY, peso=PESO_FEEDBACK)
+                positivos += 1
+        else:
+            aplicados[clave] = ["N", anterior[1] if anterior else ""]
+            negativos += 1
+        if anterior and anterior[0] == "S" and valor != "S":
+            retirados += corpus.quitar_feedback(anterior[1])
+
+    for clave in retiradas:
+        anterior = aplicados.pop(clave)
+        if anterior[0] == "S":
+            retirados += corpus.quitar_feedback(anterior[1])
+
+    # La huella se guarda con el corpus: solo si todo lo anterior se aplicó
+    corpus.meta['feedback_filas'] = huella
+    print(f"   ✅ Feedback aplicado: {positivos} positivos, {negativos} negativos, {retirados} líneas retiradas")
+    # Los negativos NO se agregan (el TF-IDF no los aprende como relevantes)
+
 def gestionar_corpus(drive_client, spreadsheet_id, drive_folder_id):
     """
     Lee el corpus desde Drive. Si no existe, lo crea con el corpus inicial.
-    Lee feedback de columna G de Sheets (S/N) y actualiza el corpus.
-    Retorna el texto del corpus listo para entrenar el vectorizador.
+    Aplica el feedback nuevo o editado de la columna G de Sheets (S/N).
+    Retorna el CorpusNormas listo para entrenar el vectorizador.
     """
     print("\n🧠 GESTIONANDO CORPUS...")
 
     # Leer corpus existente o crear desde cero
-    corpus_file_id = drive_client.get_file_by_name(drive_folder_id, 'corpus_hidrocarburos.txt')
-
-    if corpus_file_id:
-        print("   ✅ Corpus existente encontrado en Drive")
-        texto_corpus = drive_client.download_text_file(corpus_file_id)
-        if len(texto_corpus.strip()) < 200:
-            print("   ⚠️ Corpus muy pequeño, reiniciando con corpus inicial enriquecido")
-            texto_corpus = CORPUS_INICIAL
-    else:
-        print("   📝 Corpus no existe — creando con corpus inicial enriquecido")
-        texto_corpus = CORPUS_INICIAL
+    corpus = cargar_corpus(drive_client, drive_folder_id)
+    if len(corpus) < 10:
+        print("   ⚠️ Corpus muy pequeño, completando con corpus inicial enriquecido")
+        corpus.sembrar_inicial(HOY)
 
-    # Leer feedback de Sheets (columna G = "Relevante S/N")
+    podadas = corpus.podar(HOY)
+    if podadas:
+        print(f"   🍂 {podadas} normas automáticas antiguas podadas (peso < {CORPUS_PESO_MINIMO})")
+
+    # Leer feedback de Sheets (columna G = "Relevante S/N"), solo lo nuevo o editado
     try:
-        print("   📊 Leyendo feedback de Sheets (columna G)...")
-        result = drive_client.sheets_service.spreadsheets().values().get(
-            spreadsheetId=spreadsheet_id,
-            range='A2:G'  # Desde fila 2 para saltar encabezado
-        ).execute()
+        ingerir_feedback(drive_client, spreadsheet_id, corpus)
+    except Exception as e:
+        print(f"   ⚠️ No se pudo leer feedback de Sheets: {e}")
+        METRICAS.alerta(f"No se pudo leer el feedback de Sheets: {e}")
 
-        filas = result.get('values', [])
-        textos_positivos = []
-        textos_negativos = []
+    # El corpus se guarda una sola vez al final de la ejecución (PASO 11)
+    return corpus
 
-        for fila in filas:
-            if len(fila) >= 7:
-                feedback = fila[6].strip().upper()
-                titulo = fila[1] if len(fila) > 1 else ""
-                sumilla = fila[3] if len(fila) > 3 else ""
-                texto = normalizar_texto(f"{titulo} {sumilla}")
+# =============================================================================
+# MODELO TF-IDF PERSISTENTE
+# =============================================================================
 
-                if feedback == "S" and texto:
-                    textos_positivos.append(texto)
-                elif feedback == "N" and texto:
-                    textos_negativos.append(texto)
+PARAMETROS_TFIDF = {'lowercase': True, 'ngram_range': (1, 2), 'max_features': 3000}
+NOMBRE_MODELO = 'modelo_tfidf.npz'
+VERSION_MODELO = 2
 
-        print(f"   📊 Feedback leído: {len(textos_positivos)} positivos ✅, {len(textos_negativos)} negativos ❌")
+def clave_modelo(lineas, pesos):
+    """Hash de las líneas, sus pesos y los parámetros: si no cambian, el modelo ajustado sirve tal cual"""
+    h = hashlib.sha256()
+    h.update(f"v{VERSION_MODELO}|{sorted(PARAMETROS_TFIDF.items())}|".encode('utf-8'))
+    for linea, peso in zip(lineas, pesos):
+        h.update(f"{peso!r}\t{linea}\n".encode('utf-8'))
+    return h.hexdigest()
 
-        # Reforzar corpus con positivos (x3 para dar más peso al feedback humano)
-        if textos_positivos:
-            texto_corpus += "\n" + "\n".join(textos_positivos * 3)
-            print(f"   ✅ Corpus reforzado con {len(textos_positivos)} normas confirmadas")
+def ajustar_vectorizador(lineas, pesos):
+    """
+    Equivale a ajustar TfidfVectorizer sobre un único documento donde cada línea
+    aparece `peso` veces, sin materializar las repeticiones:
+    - vocabulario = los max_features n-gramas con mayor frecuencia ponderada
+    - con un solo documento el IDF (suavizado) vale 1 para todos los términos
+    - X_base = frecuencias ponderadas normalizadas (L2)
+    Los bigramas no cruzan de una línea a otra.
+    """
+    import numpy as np
+    from scipy.sparse import csr_matrix
+    from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
+    from sklearn.preprocessing import normalize
+
+    conteo = CountVectorizer(lowercase=PARAMETROS_TFIDF['lowercase'], ngram_range=PARAMETROS_TFIDF['ngram_range'])
+    C = conteo.fit_transform(lineas).tocsc()
+    totales = np.asarray(C.T @ np.asarray(pesos, dtype=np.float64)).ravel()
+
+    terminos = conteo.get_feature_names_out()
+    elegidos = np.argsort(-totales, kind='stable')[:PARAMETROS_TFIDF['max_features']]
+    elegidos = elegidos[np.argsort(terminos[elegidos])]  # índices en orden alfabético, como sklearn
+
+    vectorizador = TfidfVectorizer(**PARAMETROS_TFIDF)
+    vectorizador.vocabulary_ = {str(terminos[j]): i for i, j in enumerate(elegidos)}
+    vectorizador.idf_ = np.ones(len(elegidos))
+
+    X_base = normalize(csr_matrix(totales[elegidos].reshape(1, -1)))
+    return vectorizador, X_base
+
+def serializar_modelo(clave, vectorizador, X_base):
+    """Vocabulario (ordenado por índice), pesos IDF y la fila X_base en un .npz comprimido"""
+    import numpy as np
+
+    vocabulario = [None] * len(vectorizador.vocabulary_)
+    for termino, idx in vectorizador.vocabulary_.items():
+        vocabulario[idx] = termino
+    X_base = X_base.tocsr()
+    buffer = io.BytesIO()
+    np.savez_compressed(
+        buffer,
+        clave=np.array(clave),
+        vocabulario=np.array(vocabulario),
+        idf=vectorizador.idf_,
+        base_indices=X_base.indices,
+        base_datos=X_base.data
+    )
+    return buffer.getvalue()
 
-        # Los negativos NO se agregan (el TF-IDF no los aprende como relevantes)
-        if textos_negativos:
-            print(f"   🚫 {len(textos_negativos)} normas marcadas como no relevantes excluidas del corpus")
+def deserializar_modelo(data, clave):
+    """Reconstruye (vectorizador, X_base) desde el .npz; None si la clave no coincide o está dañado"""
+    import numpy as np
+    from scipy.sparse import csr_matrix
+    from sklearn.feature_extraction.text import TfidfVectorizer
 
+    try:
+        with np.load(io.BytesIO(data), allow_pickle=False) as npz:
+            if str(npz['clave']) != clave:
+                return None
+            vocabulario = npz['vocabulario'].tolist()
+            vectorizador = TfidfVectorizer(**PARAMETROS_TFIDF)
+            vectorizador.vocabulary_ = {termino: idx for idx, termino in enumerate(vocabulario)}
+            vectorizador.idf_ = npz['idf']
+            indices = npz['base_indices']
+            X_base = csr_matrix(
+                (npz['base_datos'], indices, np.array([0, len(indices)])),
+                shape=(1, len(vocabulario))
+            )
+        return vectorizador, X_base
     except Exception as e:
-        print(f"   ⚠️ No se pudo leer feedback de Sheets: {e}")
+        print(f"   ⚠️ Modelo guardado ilegible: {e}")
+        return None
+
+def obtener_vectorizador(drive_client, drive_folder_id, corpus):
+    """
+    Retorna (vectorizador, X_base) para el CorpusNormas dado:
+    1. caché local (CACHE_DIR) si la clave coincide → ni siquiera se descarga de Drive
+    2. artefacto en la carpeta de Drive con la misma clave (appProperties)
+    3. si no, ajusta el TF-IDF y guarda el artefacto en ambos lugares
+    """
+    lineas, pesos = corpus.datos_entrenamiento(HOY)
+    clave = clave_modelo(lineas, pesos)
+    ruta_local = os.path.join(CACHE_DIR, NOMBRE_MODELO)
+    print(f"   🔑 Clave del corpus: {clave[:12]}…")
+
+    if os.path.exists(ruta_local):
+        with open(ruta_local, 'rb') as f:
+            modelo = deserializar_modelo(f.read(), clave)
+        if modelo:
+            print("   ⚡ Modelo cargado desde caché local (sin reajustar)")
+            return modelo
+
+    file_id = drive_client.get_file_by_name(drive_folder_id, NOMBRE_MODELO, app_properties={'clave': clave})
+    if file_id:
+        data = drive_client.download_bytes(file_id)
+        modelo = deserializar_modelo(data, clave) if data else None
+        if modelo:
+            guardar_cache_local(NOMBRE_MODELO, data)
+            print("   ⚡ Modelo cargado desde Drive (sin reajustar)")
+            return modelo
+
+    print("   🔧 Corpus cambió o no hay modelo guardado — ajustando TF-IDF...")
+    vectorizador, X_base = ajustar_vectorizador(lineas, pesos)
+
+    data = serializar_modelo(clave, vectorizador, X_base)
+    guardar_cache_local(NOMBRE_MODELO, data)
+    print(f"   💾 Guardando modelo ({len(data) / 1024:.1f} KB)")
+    drive_client.upload_bytes(drive_folder_id, NOMBRE_MODELO, data, 'application/octet-stream',
+                              app_properties={'clave': clave})
+    return vectorizador, X_base
+
+def guardar_cache_local(nombre, data):
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        ruta = os.path.join(CACHE_DIR, nombre)
+        with open(ruta + '.tmp', 'wb') as f:
+            f.write(data)
+        os.replace(ruta + '.tmp', ruta)
+    except OSError as e:
+        print(f"   ⚠️ No se pudo escribir caché local {nombre}: {e}")
 
-    # Guardar corpus actualizado en Drive
-    drive_client.upload_text_file(drive_folder_id, 'corpus_hidrocarburos.txt', texto_corpus)
-    print(f"   ✅ Corpus guardado: {len(texto_corpus)} chars, {len(texto_corpus.split())} palabras")
+# =============================================================================
+# ÍNDICE PERSISTENTE DE NORMAS PROCESADAS
+# =============================================================================
 
-    return texto_corpus
+NOMBRE_INDICE_NORMAS = 'normas_procesadas.json.gz'
+
+def clave_norma(c):
+    """Misma identidad que la deduplicación del PASO 7: (título, fecha de publicación, tipo de edición)"""
+    partes = (
+        c['titulo'].strip().lower(),
+        c.get('FechaPublicacion', ''),
+        c.get('TipoEdicion', '').strip().lower()
+    )
+    return hashlib.sha1("|".join(partes).encode('utf-8')).hexdigest()[:20]
+
+class IndiceNormas:
+    """
+    Normas ya procesadas en ejecuciones anteriores: {clave: fecha de proceso}.
+    Pertenencia O(1) con un dict; tamaño acotado por antigüedad (INDICE_NORMAS_DIAS)
+    y por cantidad (INDICE_NORMAS_MAX, se descartan las más antiguas).
+    """
+
+    def __init__(self, entradas=None):
+        self.entradas = entradas if entradas is not None else {}
+
+    def __len__(self):
+        return len(self.entradas)
+
+    def __contains__(self, clave):
+        return clave in self.entradas
+
+    def agregar(self, clave, fecha):
+        self.entradas.pop(clave, None)  # reinsertar al final: el orden es de más antigua a más reciente
+        self.entradas[clave] = fecha.isoformat()
+
+    def podar(self, hoy):
+        limite = (hoy - timedelta(days=INDICE_NORMAS_DIAS)).isoformat()
+        self.entradas = {k: f for k, f in self.entradas.items() if f >= limite}
+        exceso = len(self.entradas) - INDICE_NORMAS_MAX
+        if exceso > 0:
+            self.entradas = dict(list(self.entradas.items())[exceso:])
+
+    def a_bytes(self):
+        crudo = json.dumps({'version': 1, 'normas': self.entradas}, separators=(',', ':')).encode('utf-8')
+        return gzip.compress(crudo, compresslevel=9, mtime=0)
+
+    @classmethod
+    def desde_bytes(cls, data):
+        return cls(json.loads(gzip.decompress(data).decode('utf-8')).get('normas', {}))
+
+def cargar_indice_normas(drive_client, drive_folder_id):
+    """
+    Drive es la fuente de verdad; la copia en CACHE_DIR se usa si su MD5 coincide
+    con el md5Checksum del archivo en Drive (así no se descarga de nuevo).
+    """
+    try:
+        meta = drive_client.find_file(drive_folder_id, NOMBRE_INDICE_NORMAS)
+        if not meta:
+            print("   📝 Índice de normas procesadas no existe — se crea vacío")
+            return IndiceNormas()
+
+        ruta_local = os.path.join(CACHE_DIR, NOMBRE_INDICE_NORMAS)
+        data = None
+        if os.path.exists(ruta_local):
+            with open(ruta_local, 'rb') as f:
+                data = f.read()
+            if hashlib.md5(data).hexdigest() != meta.get('md5Checksum'):
+                data = None
+            else:
+                print("   ⚡ Índice de normas procesadas desde caché local")
+        if data is None:
+            data = drive_client.download_bytes(meta['id'])
+            if data:
+                guardar_cache_local(NOMBRE_INDICE_NORMAS, data)
+        indice = IndiceNormas.desde_bytes(data) if data else IndiceNormas()
+        print(f"   🗂️ Índice de normas procesadas: {len(indice)} normas")
+        return indice
+    except Exception as e:
+        print(f"   ⚠️ No se pudo leer el índice de normas procesadas ({e}) — se procesará todo")
+        return IndiceNormas()
+
+def guardar_indice_normas(drive_client, drive_folder_id, indice):
+    indice.podar(HOY)
+    data = indice.a_bytes()
+    guardar_cache_local(NOMBRE_INDICE_NORMAS, data)
+    print(f"\n💾 GUARDANDO ÍNDICE DE NORMAS PROCESADAS: {len(indice)} normas, {len(data) / 1024:.1f} KB")
+    return drive_client.upload_bytes(drive_folder_id, NOMBRE_INDICE_NORMAS, data, 'application/gzip')
 
 # =============================================================================
 # FUNCIONES DE EVALUACIÓN
 # =============================================================================
 
 def es_sector_prioritario(sector):
-    sector_norm = normalizar_texto(sector)
-    for s in SECTORES_PRIORITARIOS:
-        if s in sector_norm:
-            return True, s
-    return False, None
+    encontrados = MATCHER_PALABRAS.buscar(normalizar_texto(sector))
+    s = MATCHER_PALABRAS.primero('prioritario', encontrados)
+    return (True, s) if s else (False, None)
 
-def es_sector_secundario(sector):
-    sector_norm = normalizar_texto(sector)
-    for s in SECTORES_SECUNDARIOS:
-        if s in sector_norm:
-            return True, s
-    return False, None
-
-def es_entidad_sector(texto):
-    """Detecta si MINEM, OSINERGMIN, PERUPETRO u OEFA aparecen en cualquier parte del texto"""
-    texto_norm = normalizar_texto(texto)
-    for entidad in ENTIDADES_SECTOR:
-        if entidad in texto_norm:
-            return True, entidad
-    return False, None
-
-def evaluar_relevancia(texto_candidato, sector, vectorizador, X_base):
+def evaluar_relevancia(texto_candidato, sector, vectorizador, X_base, tfidf_score=None):
+    """
+    Niveles 1-4 de relevancia. Si se pasa tfidf_score (precalculado en lote con
+    calcular_scores_tfidf) no se llama al vectorizador para este candidato.
+    """
     texto_norm = normalizar_texto(texto_candidato)
     sector_norm = normalizar_texto(sector)
 
+    # Una sola pasada del autómata por texto y por sector: todas las categorías a la vez
+    en_texto = MATCHER_PALABRAS.buscar(texto_norm)
+    en_sector = MATCHER_PALABRAS.buscar(sector_norm)
+
     # NIVEL 1: Excluir sectores irrelevantes siempre
-    for s in SECTORES_EXCLUIR:
-        if s in sector_norm:
-            return False, f"Sector excluido: {s}"
+    s = MATCHER_PALABRAS.primero('excluir', en_sector)
+    if s:
+        return False, f"Sector excluido: {s}"
 
     # NIVEL 2: Entidad del sector en título o sumilla → aceptar siempre sin más análisis
-    encontrada, entidad = es_entidad_sector(texto_candidato)
-    if encontrada:
+    entidad = MATCHER_PALABRAS.primero('entidad', en_texto)
+    if entidad:
         return True, f"✅ Entidad del sector: {entidad}"
 
     # NIVEL 3: Verificar palabra obligatoria
-    tiene_obligatoria = False
-    for palabra in PALABRAS_OBLIGATORIAS:
-        if palabra in texto_norm:
-            tiene_obligatoria = True
-            break
+    tiene_obligatoria = bool(en_texto['obligatoria'])
+    count_tokens = len(en_texto['token'])
 
     if not tiene_obligatoria:
         # Sector secundario con tokens técnicos → umbral más permisivo
-        es_sec, _ = es_sector_secundario(sector)
-        count_tokens = sum(1 for token in tokens_tecnicos if token in texto_norm)
+        es_sec = bool(en_sector['secundario'])
         if es_sec and count_tokens >= 2:
             return True, f"✅ Sector secundario + {count_tokens} tokens técnicos"
         return False, "Sin palabra obligatoria ni entidad del sector"
 
     # NIVEL 4: Análisis TF-IDF
-    count_tokens = sum(1 for token in tokens_tecnicos if token in texto_norm)
-    try:
-        Y = vectorizador.transform([texto_norm])
-        tfidf_score = float(cosine_similarity(X_base, Y)[0][0])
-    except:
-        tfidf_score = 0.0
+    if tfidf_score is None:
+        from sklearn.metrics.pairwise import cosine_similarity
+        try:
+            Y = vectorizador.transform([texto_norm])
+            tfidf_score = float(cosine_similarity(X_base, Y)[0][0])
+        except:
+            tfidf_score = 0.0
 
     relevante = count_tokens >= 2 or tfidf_score >= 0.15
     razon = (
@@ -586,18 +1949,105 @@ def evaluar_relevancia(texto_candidato, sector, vectorizador, X_base):
     )
     return relevante, razon
 
+def calcular_scores_tfidf(textos_norm, vectorizador, X_base):
+    """
+    Similitud coseno de cada texto normalizado con el corpus base.
+    Un solo transform() para todos los textos únicos y un solo producto disperso
+    contra X_base, en lugar de una llamada a scikit-learn por candidato.
+    """
+    if not textos_norm:
+        return []
+    from sklearn.metrics.pairwise import cosine_similarity
+
+    unicos = list(dict.fromkeys(textos_norm))
+    try:
+        Y = vectorizador.transform(unicos)
+        similitudes = cosine_similarity(X_base, Y)[0]
+        por_texto = {t: float(sim) for t, sim in zip(unicos, similitudes)}
+    except Exception as e:
+        # Mismo resultado que la ruta individual: 0.0 solo para los textos que fallen
+        print(f"   ⚠️ TF-IDF en lote falló ({e}), calculando uno por uno")
+        por_texto = {}
+        for t in unicos:
+            try:
+                por_texto[t] = float(cosine_similarity(X_base, vectorizador.transform([t]))[0][0])
+            except Exception:
+                por_texto[t] = 0.0
+    return [por_texto[t] for t in textos_norm]
+
+def evaluar_relevancia_lote(candidatos, vectorizador, X_base):
+    """evaluar_relevancia() para una lista de candidatos con los scores TF-IDF calculados en lote"""
+    textos_norm = normalizar_lote([c['texto_completo'] for c in candidatos])
+    scores = calcular_scores_tfidf(textos_norm, vectorizador, X_base)
+    return [
+        evaluar_relevancia(c['texto_completo'], c['sector'], vectorizador, X_base, tfidf_score=score)
+        for c, score in zip(candidatos, scores)
+    ]
+
+def deduplicar(candidatos, vistos):
+    """
+    Candidatos cuya clave (título, fecha de publicación, tipo de edición) no está en `vistos`;
+    `vistos` se actualiza, así sirve para ediciones que llegan de a una.
+    """
+    unicos = []
+    for c in candidatos:
+        key = (
+            c['titulo'].strip().lower(),
+            c.get('FechaPublicacion', ''),
+            c.get('TipoEdicion', '').strip().lower()
+        )
+        if key not in vistos and key[0]:
+            vistos.add(key)
+            unicos.append(c)
+    return unicos
+
+def filtrar_relevancia(candidatos, vectorizador, X_base):
+    """PASO 8 sobre una lista de candidatos. Retorna (aceptados, prioritarios)"""
+    # Normalizar todos los textos y sectores de una vez: las evaluaciones siguientes usan la caché
+    normalizar_lote([c['texto_completo'] for c in candidatos] + [c['sector'] for c in candidatos])
+    aceptados = []
+    prioritarios = []
+
+    # Nivel 1: sector prioritario en <h4>
+    es_prioritario = [es_sector_prioritario(c['sector'])[0] for c in candidatos]
+
+    # Niveles 2-4 (entidad en texto, palabras obligatorias, TF-IDF) para el resto, en lote
+    resto = [c for c, prio in zip(candidatos, es_prioritario) if not prio]
+    evaluaciones = iter(evaluar_relevancia_lote(resto, vectorizador, X_base))
+
+    for i, (c, prio) in enumerate(zip(candidatos, es_prioritario), 1):
+        if prio:
+            aceptados.append(c)
+            prioritarios.append(c)
+            print(f"   [{i}/{len(candidatos)}] ⭐ SECTOR PRIORITARIO: {c['titulo'][:60]}")
+        else:
+            relevante, razon = next(evaluaciones)
+            if relevante:
+                aceptados.append(c)
+                print(f"   [{i}/{len(candidatos)}] ✅ RELEVANTE ({razon}): {c['titulo'][:60]}")
+            else:
+                print(f"   [{i}/{len(candidatos)}] ❌ DESCARTADO ({razon}): {c['titulo'][:60]}")
+
+    return aceptados, prioritarios
+
 # =============================================================================
 # SELENIUM - FUNCIONES AUXILIARES
 # =============================================================================
 
-def crear_driver():
+def crear_driver(perfil_dir=None):
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+
     options = Options()
     options.add_argument("--headless=new")
     options.add_argument("--no-sandbox")
     options.add_argument("--disable-dev-shm-usage")
     options.add_argument("--disable-gpu")
     options.add_argument("--window-size=1920,1080")
-    options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36")
+    options.add_argument(f"user-agent={USER_AGENT}")
+    if perfil_dir:
+        # Perfil propio por worker: cookies, caché y sesión aisladas entre navegadores
+        options.add_argument(f"--user-data-dir={perfil_dir}")
     driver = webdriver.Chrome(options=options)
     driver.set_page_load_timeout(90)
     return driver
@@ -610,10 +2060,10 @@ def complete_href(href):
     if href.startswith("//"):
         return "https:" + href
     if href.startswith("/"):
-        return "https://diariooficial.elperuano.pe" + href
+        return ELPERUANO_BASE_URL + href
     if href.startswith("http"):
         return href
-    return "https://diariooficial.elperuano.pe/" + href.lstrip("./")
+    return ELPERUANO_BASE_URL + "/" + href.lstrip("./")
 
 def sanitize_filename(nombre):
     """Limpia nombre para usar como nombre de archivo"""
@@ -621,35 +2071,426 @@ def sanitize_filename(nombre):
     nombre = re.sub(r'\s+', '_', nombre.strip())
     return nombre[:150]
 
+# =============================================================================
+# SELENIUM - ESPERAS POR CONDICIÓN
+# =============================================================================
+
+# Mismo criterio que el filtro de BeautifulSoup: clase que contiene "edicionesoficiales_articulos"
+SELECTOR_ARTICULOS = 'article[class*="edicionesoficiales_articulos"]'
+
+# Textos que podría mostrar la página cuando la búsqueda no tiene resultados. No están
+# verificados contra el sitio real: si no coinciden, JS_ESTADO_RESULTADOS igual da la búsqueda
+# por vacía cuando la página de resultados cargó sin artículos (ESPERA_SIN_ARTICULOS)
+MARCADORES_SIN_RESULTADOS = [
+    'no se encontraron',
+    'no existen normas',
+    'no hay resultados',
+    'sin resultados'
+]
+
+# Antes de buscar se marcan los artículos y el documento: btnBuscar envía el formulario
+# (POST) y la página de resultados llega como un documento nuevo, sin las marcas
+JS_MARCAR_ARTICULOS_PREVIOS = """
+    document.querySelectorAll(arguments[0]).forEach(function (a) {
+        a.setAttribute('data-previo', '1');
+    });
+    document.documentElement.setAttribute('data-previo', '1');
+"""
+
+# 'resultados' si hay artículos nuevos; 'vacio' si aparece un aviso de MARCADORES_SIN_RESULTADOS
+# o si el documento nuevo terminó de cargar y sigue sin artículos durante arguments[2] ms
+JS_ESTADO_RESULTADOS = """
+    var nuevos = document.querySelectorAll(arguments[0] + ':not([data-previo])').length;
+    if (nuevos > 0) {
+        return 'resultados';
+    }
+    var texto = ((document.body && document.body.innerText) || '').toLowerCase();
+    for (var i = 0; i < arguments[1].length; i++) {
+        if (texto.indexOf(arguments[1][i]) >= 0) {
+            return 'vacio';
+        }
+    }
+    if (document.documentElement.hasAttribute('data-previo') || document.readyState !== 'complete') {
+        return false;
+    }
+    window.sinArticulosDesde = window.sinArticulosDesde || Date.now();
+    return Date.now() - window.sinArticulosDesde >= arguments[2] ? 'vacio' : false;
+"""
+
+def esperar(driver, condicion, timeout, descripcion):
+    """
+    Espera explícita (WebDriverWait) hasta que condicion(driver) sea verdadera.
+    Registra cuánto tardó realmente. Retorna el valor de la condición,
+    o None si se alcanzó el límite (el llamador decide cómo continuar).
+    """
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.common.exceptions import TimeoutException
+
+    inicio = time.perf_counter()
+    try:
+        resultado = WebDriverWait(driver, timeout, poll_frequency=0.2).until(condicion)
+        print(f"   ⏱️ {descripcion}: {time.perf_counter() - inicio:.2f} s")
+        return resultado
+    except TimeoutException:
+        print(f"   ⏳ {descripcion}: sin cambios tras {time.perf_counter() - inicio:.2f} s (límite {timeout:g} s)")
+        return None
+
+def formulario_listo(driver):
+    return driver.execute_script("""
+        return document.readyState === 'complete' &&
+            ['cddesde', 'cdhasta', 'tipo', 'btnBuscar'].every(function (id) {
+                return document.getElementById(id) !== null;
+            });
+    """)
+
+def resultados_listos(driver):
+    """'resultados' si hay artículos nuevos, 'vacio' si la búsqueda no devolvió resultados"""
+    return driver.execute_script(JS_ESTADO_RESULTADOS, SELECTOR_ARTICULOS, MARCADORES_SIN_RESULTADOS,
+                                 int(ESPERA_SIN_ARTICULOS * 1000))
+
+def contar_articulos(driver):
+    return driver.execute_script("return document.querySelectorAll(arguments[0]).length;", SELECTOR_ARTICULOS)
+
+# =============================================================================
+# EXTRACCIÓN DE DATOS DE ARTÍCULOS
+# =============================================================================
+#
+# Cada <article> se reduce primero a un dict "crudo" con los textos y atributos
+# tal cual aparecen en el HTML; armar_candidato() aplica sobre ese dict las mismas
+# reglas sin importar si vino de BeautifulSoup (page_source) o del navegador (JS).
+#
+# Estructura confirmada:
+#   <p><b>Fecha: ...</b> <strong class="extraordinaria">Edición Extraordinaria</strong></p>
+#   <p>texto de la sumilla</p>
+
+# Extrae en el navegador los artículos aún no recolectados y los marca como tales.
+# textoDe() replica get_text(" ", strip=True) de BeautifulSoup, que tampoco devuelve
+# el contenido de <script>, <style> ni <template>.
+JS_EXTRAER_ARTICULOS_NUEVOS = """
+    var OMITIR = {SCRIPT: true, STYLE: true, TEMPLATE: true};
+    function visible(nodo) {
+        return OMITIR[nodo.parentNode.nodeName] ? NodeFilter.FILTER_REJECT : NodeFilter.FILTER_ACCEPT;
+    }
+    function textoDe(el) {
+        if (!el) { return ''; }
+        var partes = [];
+        var walker = document.createTreeWalker(el, NodeFilter.SHOW_TEXT, {acceptNode: visible});
+        while (walker.nextNode()) {
+            var t = walker.currentNode.nodeValue.trim();
+            if (t) { partes.push(t); }
+        }
+        return partes.join(' ');
+    }
+    var todos = document.querySelectorAll(arguments[0]);
+    var nuevos = [];
+    for (var i = 0; i < todos.length; i++) {
+        var art = todos[i];
+        if (art.hasAttribute('data-extraido')) { continue; }
+        art.setAttribute('data-extraido', '1');
+
+        var h5 = art.querySelector('h5');
+        var h5a = h5 ? h5.querySelector('a') : null;
+        var parrafos = [];
+        art.querySelectorAll('p').forEach(function (p) {
+            parrafos.push({
+                con_b: p.querySelector('b') !== null,
+                extraordinaria: p.querySelector('strong.extraordinaria') !== null,
+                texto: textoDe(p)
+            });
+        });
+        var inputs = [];
+        art.querySelectorAll('input').forEach(function (inp) {
+            if (inp.hasAttribute('data-url')) {
+                inputs.push({data_url: inp.getAttribute('data-url'), value: inp.getAttribute('value') || ''});
+            }
+        });
+        var hrefs = [];
+        art.querySelectorAll('a[href]').forEach(function (a) {
+            hrefs.push(a.getAttribute('href'));
+        });
+        nuevos.push({
+            sector: textoDe(art.querySelector('h4')),
+            titulo: h5a ? textoDe(h5a) : textoDe(h5),
+            parrafos: parrafos,
+            inputs: inputs,
+            hrefs: hrefs
+        });
+    }
+    return {total: todos.length, nuevos: nuevos};
+"""
+
+def recolectar_articulos_nuevos(driver, datos_crudos):
+    """Agrega a datos_crudos los artículos nuevos desde el último scroll. Retorna el total en página."""
+    resultado = driver.execute_script(JS_EXTRAER_ARTICULOS_NUEVOS, SELECTOR_ARTICULOS) or {}
+    datos_crudos.extend(resultado.get('nuevos', []))
+    return resultado.get('total', 0)
+
+def datos_articulo_html(art):
+    """Reduce un <article> de BeautifulSoup al dict crudo que consume armar_candidato()"""
+    sector_tag = art.find("h4")
+    titulo_tag = art.find("h5")
+    titulo = ""
+    if titulo_tag:
+        link = titulo_tag.find("a")
+        titulo = link.get_text(" ", strip=True) if link else titulo_tag.get_text(" ", strip=True)
+
+    return {
+        "sector": sector_tag.get_text(" ", strip=True) if sector_tag else "",
+        "titulo": titulo,
+        "parrafos": [
+            {
+                "con_b": p.find("b") is not None,
+                "extraordinaria": p.find("strong", class_="extraordinaria") is not None,
+                "texto": p.get_text(" ", strip=True)
+            }
+            for p in art.find_all("p")
+        ],
+        "inputs": [
+            {"data_url": inp["data-url"], "value": inp.get("value", "") or ""}
+            for inp in art.find_all("input") if inp.has_attr("data-url")
+        ],
+        "hrefs": [a["href"] for a in art.find_all("a", href=True)]
+    }
+
+def armar_candidato(crudo):
+    """
+    Construye el dict candidato a partir de los datos crudos de un artículo.
+    - El tipo de edición se detecta del <strong class="extraordinaria">, no del checkbox
+    - La sumilla es el <p> sin <b>; si no hay, se usa el título
+    Retorna None si el artículo no tiene URL de PDF.
+    """
+    sector = crudo.get("sector") or ""
+    titulo = crudo.get("titulo") or ""
+    fecha_pub = ""
+    sumilla = ""
+    tipo_edicion_detectado = "Ordinaria"  # default
+
+    for p in crudo.get("parrafos", []):
+        texto = p.get("texto") or ""
+        if p.get("con_b"):
+            # Campo de fecha
+            if "fecha:" in texto.lower():
+                fecha_pub = texto.replace("Fecha:", "").replace("fecha:", "").strip()
+
+            # Detectar tipo directamente del HTML — más confiable que el checkbox
+            if p.get("extraordinaria"):
+                tipo_edicion_detectado = "Extraordinaria"
+        else:
+            # <p> sin <b> = sumilla
+            if len(texto) > 10:
+                sumilla = texto
+
+    # Limpiar texto "Extraordinaria" si quedó pegado en fecha_pub
+    if "extraordinaria" in fecha_pub.lower():
+        fecha_pub = re.sub(r'(?i)edici[oó]n\s+extraordinaria', '', fecha_pub).strip()
+
+    # Fallback: si sumilla vacía, usar título
+    if not sumilla and titulo:
+        sumilla = titulo
+
+    # Buscar PDF URL en inputs
+    pdf_url = ""
+    for inp in crudo.get("inputs", []):
+        val = (inp.get("value") or "").lower()
+        if "descarga individual" in val or "descarga" in val:
+            pdf_url = complete_href(inp["data_url"])
+            break
+        if not pdf_url:
+            pdf_url = complete_href(inp["data_url"])
+
+    # Fallback: buscar en enlaces directos
+    if not pdf_url:
+        for href in crudo.get("hrefs", []):
+            if ".pdf" in href.lower():
+                pdf_url = complete_href(href)
+                break
+
+    if not pdf_url:
+        return None
+
+    return {
+        "sector": sector,
+        "titulo": titulo,
+        "FechaPublicacion": fecha_pub,
+        "Sumilla": sumilla,
+        "pdf_url": pdf_url,
+        "NombreArchivo": sanitize_filename(titulo or sumilla[:60]) + ".pdf",
+        "TipoEdicion": tipo_edicion_detectado,
+        "texto_completo": f"{sector} {titulo} {sumilla}"
+    }
+
+def articulos_html(html):
+    """Artículos <article class="...edicionesoficiales_articulos..."> de una página de resultados"""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    return soup.find_all("article", class_=lambda c: c and "edicionesoficiales_articulos" in c)
+
+# Apertura de un <article> de resultados (mismo criterio: la clase contiene "edicionesoficiales_articulos"),
+# o un bloque que se salta entero: comentarios, <script> y <style> (pueden traer plantillas con <article>)
+_RE_INICIO_ARTICULO = re.compile(
+    r'<!--.*?(?:-->|\Z)|<(script|style)\b.*?(?:</\1\s*>|\Z)'
+    r'|(<article\b[^>]*?\sclass\s*=\s*["\']?[^"\'>]*edicionesoficiales_articulos)',
+    re.I | re.S
+)
+_RE_FIN_ARTICULO = re.compile(r'</article\s*>', re.I)
+
+def fragmentos_articulos(html):
+    """Recorta de la página solo el marcado de cada <article> de resultados (sin menús, scripts, etc.)"""
+    fragmentos = []
+    pos = 0
+    while True:
+        m = _RE_INICIO_ARTICULO.search(html, pos)
+        if not m:
+            return fragmentos
+        if not m.group(2):
+            pos = m.end()
+            continue
+        fin = _RE_FIN_ARTICULO.search(html, m.end())
+        pos = fin.end() if fin else len(html)
+        fragmentos.append(html[m.start():pos])
+
+def texto_lxml(el):
+    """
+    Equivalente a get_text(" ", strip=True) de BeautifulSoup para un elemento de lxml
+    (articulos_lxml() ya quitó <script> y <style>, cuyo texto bs4 no devuelve)
+    """
+    if el is None:
+        return ""
+    return " ".join(t for t in (s.strip() for s in el.itertext()) if t)
+
+def datos_articulo_lxml(art):
+    """Reduce un <article> de lxml al dict crudo que consume armar_candidato() (igual que datos_articulo_html)"""
+    sector_tag = art.find(".//h4")
+    titulo_tag = art.find(".//h5")
+    titulo = ""
+    if titulo_tag is not None:
+        link = titulo_tag.find(".//a")
+        titulo = texto_lxml(link if link is not None else titulo_tag)
+
+    return {
+        "sector": texto_lxml(sector_tag),
+        "titulo": titulo,
+        "parrafos": [
+            {
+                "con_b": p.find(".//b") is not None,
+                "extraordinaria": any("extraordinaria" in (s.get("class") or "").split() for s in p.iter("strong")),
+                "texto": texto_lxml(p)
+            }
+            for p in art.iter("p")
+        ],
+        "inputs": [
+            {"data_url": inp.get("data-url"), "value": inp.get("value", "") or ""}
+            for inp in art.iter("input") if inp.get("data-url") is not None
+        ],
+        "hrefs": [a.get("href") for a in art.iter("a") if a.get("href") is not None]
+    }
+
+def articulos_lxml(html):
+    """
+    Artículos de resultados parseados con lxml: un único parseo de los fragmentos recortados.
+    Se quitan <script> y <style> (el texto que sigue a cada uno se conserva).
+    """
+    import lxml.html
+    from lxml import etree
+
+    fragmentos = fragmentos_articulos(html)
+    if not fragmentos:
+        return []
+    elementos = lxml.html.fragments_fromstring("".join(fragmentos))
+    articulos = [el for el in elementos if getattr(el, "tag", None) == "article"]
+    for art in articulos:
+        etree.strip_elements(art, "script", "style", with_tail=False)
+    return articulos
+
+def parsear_articulos(html, backend=None):
+    """
+    Artículos de una página de resultados como dicts crudos para construir_candidatos().
+    - 'lxml': recorta los <article> de resultados y parsea solo esos fragmentos
+    - 'bs4':  BeautifulSoup (html.parser) sobre la página completa
+    Por defecto usa PARSER_HTML.
+    """
+    backend = backend or PARSER_HTML
+    if backend == "lxml":
+        return [datos_articulo_lxml(art) for art in articulos_lxml(html)]
+    if backend == "bs4":
+        return [datos_articulo_html(art) for art in articulos_html(html)]
+    raise ValueError(f"PARSER_HTML desconocido: {backend!r} (usar 'lxml' o 'bs4')")
+
+def construir_candidatos(datos_crudos):
+    """
+    Convierte los artículos (dicts crudos o <article> de BeautifulSoup) en candidatos.
+    Un artículo con error o sin PDF se omite sin afectar al resto.
+    """
+    print("7️⃣ Extrayendo datos de artículos...")
+    candidatos = []
+
+    for idx, crudo in enumerate(datos_crudos, 1):
+        try:
+            if not isinstance(crudo, dict):
+                crudo = datos_articulo_html(crudo)
+            candidato = armar_candidato(crudo)
+            if candidato is None:
+                print(f"   ⚠️ Artículo {idx} sin PDF URL, omitiendo")
+                continue
+
+            candidatos.append(candidato)
+
+            # Debug del primer artículo
+            if idx == 1:
+                print(f"\n   📋 DEBUG PRIMER ARTÍCULO:")
+                print(f"      Sector:  {candidato['sector'][:60]}")
+                print(f"      Título:  {candidato['titulo'][:60]}")
+                print(f"      Sumilla: {candidato['Sumilla'][:80]}")
+                print(f"      Fecha:   {candidato['FechaPublicacion']}")
+                print(f"      Tipo:    {candidato['TipoEdicion']}")
+                print(f"      PDF URL: {candidato['pdf_url'][:80]}")
+
+        except Exception as e:
+            print(f"   ⚠️ Error en artículo {idx}: {e}")
+            continue
+
+    METRICAS.contar('articulos', len(datos_crudos))
+    METRICAS.contar('candidatos', len(candidatos))
+    print(f"\n8️⃣ CANDIDATOS EXTRAÍDOS: {len(candidatos)}")
+    print(f"{'='*100}\n")
+
+    return candidatos
+
 # =============================================================================
 # SELENIUM - EXTRACCIÓN PRINCIPAL
 # =============================================================================
 
-def extraer_normas(driver, fecha_obj, es_extraordinaria=False):
+def extraer_normas(driver, fecha_obj, es_extraordinaria=False, fecha_hasta=None):
     """
-    Extrae normas del Diario El Peruano para una fecha dada.
+    Extrae normas del Diario El Peruano para una fecha dada (o el rango fecha_obj..fecha_hasta).
     - El tipo de edición se detecta directamente del HTML (<strong class="extraordinaria">)
     - La sumilla se extrae del <p> sin <b> según estructura HTML confirmada
     - El checkbox usa .click() para disparar el evento change correctamente
+    Si la extracción falla registra la alerta y relanza la excepción: una caída del navegador
+    o del sitio no se confunde con una edición sin normas (extraer_ediciones la marca fallida).
     """
     tipo_edicion = "Extraordinaria" if es_extraordinaria else "Ordinaria"
+    fecha_hasta = fecha_hasta or fecha_obj
     fecha_str = fecha_obj.strftime("%d/%m/%Y")
+    hasta_str = fecha_hasta.strftime("%d/%m/%Y")
+    periodo = fecha_str if fecha_hasta == fecha_obj else f"{fecha_str} al {hasta_str}"
 
     print(f"\n{'='*100}")
-    print(f"🔍 EXTRAYENDO: {tipo_edicion} del {fecha_str}")
+    print(f"🔍 EXTRAYENDO: {tipo_edicion} del {periodo}")
     print(f"{'='*100}")
 
     try:
         print("1️⃣ Cargando página...")
-        driver.get("https://diariooficial.elperuano.pe/Normas")
-        time.sleep(5)
+        driver.get(f"{ELPERUANO_BASE_URL}/Normas")
+        if not esperar(driver, formulario_listo, ESPERA_PAGINA_MAX, "Formulario de búsqueda"):
+            print("   ⚠️ Formulario no disponible, se intenta igualmente")
 
-        print(f"2️⃣ Configurando fechas: {fecha_str}")
+        print(f"2️⃣ Configurando fechas: {periodo}")
         driver.execute_script(f"""
             document.getElementById('cddesde').value = '{fecha_str}';
-            document.getElementById('cdhasta').value = '{fecha_str}';
+            document.getElementById('cdhasta').value = '{hasta_str}';
         """)
-        time.sleep(1)
 
         # CORRECCIÓN: usar .click() para disparar el evento change del checkbox
         print(f"3️⃣ Configurando checkbox extraordinaria: {es_extraordinaria}")
@@ -661,25 +2502,43 @@ def extraer_normas(driver, fecha_obj, es_extraordinaria=False):
                 checkbox.click();
             }
         """, es_extraordinaria)
-        time.sleep(1)
+        esperar(
+            driver,
+            lambda d: d.execute_script("return document.getElementById('tipo').checked === arguments[0];", es_extraordinaria),
+            ESPERA_PAGINA_MAX, "Checkbox extraordinaria"
+        )
 
         print("4️⃣ Ejecutando búsqueda...")
+        # Marcar los artículos que ya estaban en la página para distinguirlos de los resultados nuevos
+        driver.execute_script(JS_MARCAR_ARTICULOS_PREVIOS, SELECTOR_ARTICULOS)
         driver.execute_script("document.getElementById('btnBuscar').click();")
-        time.sleep(10)
-
-        # Scroll con detección de estabilidad
-        print("5️⃣ Cargando contenido con scroll inteligente...")
-        last_count = -1
+        estado = esperar(driver, resultados_listos, ESPERA_RESULTADOS_MAX, "Resultados de búsqueda")
+        if estado == "vacio":
+            print("   ℹ️ La búsqueda no devolvió resultados")
+
+        # Scroll: esperar a que aparezcan artículos nuevos; si no llegan, contar como estable.
+        # En modo 'script' cada scroll extrae en el navegador solo los artículos nuevos.
+        print(f"5️⃣ Cargando contenido con scroll inteligente (modo {MODO_EXTRACCION})...")
+        datos_crudos = []
+        if MODO_EXTRACCION == "script":
+            last_count = recolectar_articulos_nuevos(driver, datos_crudos)
+        else:
+            last_count = contar_articulos(driver)
         stable = 0
-        max_scrolls = 40
+        # Un rango de varios días trae más artículos: más scrolls como límite (termina al estabilizarse)
+        max_scrolls = 40 * ((fecha_hasta - fecha_obj).days + 1) if estado != "vacio" else 0
 
         for i in range(max_scrolls):
             driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(1.2)
-
-            soup = BeautifulSoup(driver.page_source, "html.parser")
-            articles = soup.find_all("article", class_=lambda c: c and "edicionesoficiales_articulos" in c)
-            count = len(articles)
+            esperar(
+                driver,
+                lambda d: contar_articulos(d) > last_count,
+                ESPERA_SCROLL_MAX, f"Scroll {i+1}/{max_scrolls}"
+            )
+            if MODO_EXTRACCION == "script":
+                count = recolectar_articulos_nuevos(driver, datos_crudos)
+            else:
+                count = contar_articulos(driver)
 
             print(f"   Scroll {i+1}/{max_scrolls}: {count} artículos")
 
@@ -689,167 +2548,854 @@ def extraer_normas(driver, fecha_obj, es_extraordinaria=False):
                 stable = 0
                 last_count = count
 
-            if stable >= 3:
+            if stable >= SCROLLS_ESTABLES:
                 print("   ✅ Contenido estable, finalizando scroll")
                 break
 
-        print("6️⃣ Parseando HTML final...")
-        soup = BeautifulSoup(driver.page_source, "html.parser")
-        articles = soup.find_all("article", class_=lambda c: c and "edicionesoficiales_articulos" in c)
+        if MODO_EXTRACCION != "script":
+            print("6️⃣ Parseando HTML final...")
+            datos_crudos = parsear_articulos(driver.page_source)
+        else:
+            print("6️⃣ Artículos recolectados en el navegador (sin parsear page_source)")
 
-        print(f"   📄 TOTAL ARTÍCULOS: {len(articles)}")
+        print(f"   📄 TOTAL ARTÍCULOS: {len(datos_crudos)}")
 
-        if not articles:
+        if not datos_crudos:
             print("   ⚠️ NO SE ENCONTRARON ARTÍCULOS")
             return []
 
-        print("7️⃣ Extrayendo datos de artículos...")
-        candidatos = []
+        return construir_candidatos(datos_crudos)
 
-        for idx, art in enumerate(articles, 1):
-            try:
-                # Extraer sector desde <h4>
-                sector = ""
-                sector_tag = art.find("h4")
-                if sector_tag:
-                    sector = sector_tag.get_text(" ", strip=True)
-
-                # Extraer título desde <h5><a>
-                titulo = ""
-                titulo_tag = art.find("h5")
-                if titulo_tag:
-                    link = titulo_tag.find("a")
-                    titulo = link.get_text(" ", strip=True) if link else titulo_tag.get_text(" ", strip=True)
-
-                # CORRECCIÓN: extraer fecha, sumilla y tipo desde HTML real
-                # Estructura confirmada:
-                #   <p><b>Fecha: ...</b> <strong class="extraordinaria">Edición Extraordinaria</strong></p>
-                #   <p>texto de la sumilla</p>
-                p_tags = art.find_all("p")
-                fecha_pub = ""
-                sumilla = ""
-                tipo_edicion_detectado = "Ordinaria"  # default
-
-                for p in p_tags:
-                    if p.find("b"):
-                        # Campo de fecha
-                        texto_fecha = p.get_text(" ", strip=True)
-                        if "fecha:" in texto_fecha.lower():
-                            fecha_pub = texto_fecha.replace("Fecha:", "").replace("fecha:", "").strip()
-
-                        # Detectar tipo directamente del HTML — más confiable que el checkbox
-                        strong_ext = p.find("strong", class_="extraordinaria")
-                        if strong_ext:
-                            tipo_edicion_detectado = "Extraordinaria"
-                    else:
-                        # <p> sin <b> = sumilla
-                        candidato = p.get_text(" ", strip=True)
-                        if len(candidato) > 10:
-                            sumilla = candidato
-
-                # Limpiar texto "Extraordinaria" si quedó pegado en fecha_pub
-                if "extraordinaria" in fecha_pub.lower():
-                    fecha_pub = re.sub(r'(?i)edici[oó]n\s+extraordinaria', '', fecha_pub).strip()
-
-                # Fallback: si sumilla vacía, usar título
-                if not sumilla and titulo:
-                    sumilla = titulo
-
-                # Buscar PDF URL en inputs
-                pdf_url = ""
-                for inp in art.find_all("input"):
-                    if inp.has_attr("data-url"):
-                        val = (inp.get("value", "") or "").lower()
-                        if "descarga individual" in val or "descarga" in val:
-                            pdf_url = complete_href(inp['data-url'])
-                            break
-                        if not pdf_url:
-                            pdf_url = complete_href(inp['data-url'])
-
-                # Fallback: buscar en enlaces directos
-                if not pdf_url:
-                    for a in art.find_all("a", href=True):
-                        if ".pdf" in a['href'].lower():
-                            pdf_url = complete_href(a['href'])
-                            break
-
-                if not pdf_url:
-                    print(f"   ⚠️ Artículo {idx} sin PDF URL, omitiendo")
-                    continue
+    except Exception as e:
+        print(f"❌ ERROR CRÍTICO en extracción: {e}")
+        import traceback
+        traceback.print_exc()
+        METRICAS.alerta(f"Extracción fallida: {tipo_edicion} del {periodo} ({type(e).__name__})")
+        raise
 
-                texto_completo = f"{sector} {titulo} {sumilla}"
-                nombre_archivo = sanitize_filename(titulo or sumilla[:60]) + ".pdf"
-
-                candidatos.append({
-                    "sector": sector,
-                    "titulo": titulo,
-                    "FechaPublicacion": fecha_pub,
-                    "Sumilla": sumilla,
-                    "pdf_url": pdf_url,
-                    "NombreArchivo": nombre_archivo,
-                    "TipoEdicion": tipo_edicion_detectado,
-                    "texto_completo": texto_completo
-                })
-
-                # Debug del primer artículo
-                if idx == 1:
-                    print(f"\n   📋 DEBUG PRIMER ARTÍCULO:")
-                    print(f"      Sector:  {sector[:60]}")
-                    print(f"      Título:  {titulo[:60]}")
-                    print(f"      Sumilla: {sumilla[:80]}")
-                    print(f"      Fecha:   {fecha_pub}")
-                    print(f"      Tipo:    {tipo_edicion_detectado}")
-                    print(f"      PDF URL: {pdf_url[:80]}")
+# =============================================================================
+# HTTP - EXTRACCIÓN SIN NAVEGADOR
+# =============================================================================
 
+class RespuestaNoReconocida(Exception):
+    """La búsqueda HTTP respondió algo que no parece una página de resultados"""
+
+_RE_FECHA_PUBLICACION = re.compile(r'(\d{1,2})/(\d{1,2})/(\d{4})')
+
+def fecha_publicacion(candidato):
+    """date de FechaPublicacion (dd/mm/aaaa) o None si no se reconoce"""
+    m = _RE_FECHA_PUBLICACION.search(candidato.get('FechaPublicacion', ''))
+    try:
+        return date(int(m.group(3)), int(m.group(2)), int(m.group(1))) if m else None
+    except ValueError:
+        return None
+
+def verificar_resultados(candidatos, desde, hasta, es_extraordinaria):
+    """
+    Comprueba que la búsqueda HTTP respondió lo pedido: cada candidato con fecha dentro de
+    desde..hasta y del tipo de edición pedido. Si el sitio ignoró algún campo del formulario
+    (y devolvió, p. ej., el listado por defecto) lanza RespuestaNoReconocida, para recurrir a Selenium.
+    """
+    tipo = "Extraordinaria" if es_extraordinaria else "Ordinaria"
+    fuera = [c for c in candidatos
+             if not (fecha_publicacion(c) and desde <= fecha_publicacion(c) <= hasta) or c.get('TipoEdicion') != tipo]
+    if fuera:
+        c = fuera[0]
+        raise RespuestaNoReconocida(
+            f"{len(fuera)} de {len(candidatos)} resultados no coinciden con la búsqueda "
+            f"(p. ej. {c.get('FechaPublicacion', '')!r} {c.get('TipoEdicion', '')}, se pidió {tipo} "
+            f"del {desde.strftime('%d/%m/%Y')} al {hasta.strftime('%d/%m/%Y')})")
+
+def formulario_busqueda(session):
+    """
+    Lee el formulario de /Normas: URL de envío, método y campos ocultos (tokens, etc.).
+    Si no se encuentra el formulario se usa ELPERUANO_RUTA_BUSQUEDA con POST.
+    """
+    from bs4 import BeautifulSoup
+
+    response = session.get(f"{ELPERUANO_BASE_URL}/Normas", timeout=(10, 30))
+    response.raise_for_status()
+    soup = BeautifulSoup(response.text, "html.parser")
+
+    campo = soup.find(id="cddesde")
+    form = campo.find_parent("form") if campo else None
+    action = (form.get("action") or "").strip() if form else ""
+    metodo = (form.get("method") or "post").strip().lower() if form else "post"
+
+    ocultos = {}
+    if form:
+        for inp in form.find_all("input", type="hidden"):
+            if inp.get("name"):
+                ocultos[inp["name"]] = inp.get("value", "") or ""
+
+    url = complete_href(action) if action and not action.startswith("#") else ELPERUANO_BASE_URL + ELPERUANO_RUTA_BUSQUEDA
+    return url, metodo, ocultos
+
+def extraer_normas_http(session, fecha_obj, es_extraordinaria=False, fecha_hasta=None):
+    """
+    Extrae normas enviando directamente el formulario de búsqueda (cddesde, cdhasta, tipo, btnBuscar).
+    Retorna los mismos dicts candidatos que extraer_normas().
+    Lanza excepción si la búsqueda falla, la respuesta no se reconoce o trae normas de otra
+    fecha o de otro tipo de edición (verificar_resultados), para recurrir a Selenium.
+    """
+    tipo_edicion = "Extraordinaria" if es_extraordinaria else "Ordinaria"
+    fecha_hasta = fecha_hasta or fecha_obj
+    fecha_str = fecha_obj.strftime("%d/%m/%Y")
+    hasta_str = fecha_hasta.strftime("%d/%m/%Y")
+    periodo = fecha_str if fecha_hasta == fecha_obj else f"{fecha_str} al {hasta_str}"
+
+    print(f"\n{'='*100}")
+    print(f"🔍 EXTRAYENDO (HTTP): {tipo_edicion} del {periodo}")
+    print(f"{'='*100}")
+
+    url, metodo, datos = formulario_busqueda(session)
+    datos.update({'cddesde': fecha_str, 'cdhasta': hasta_str, 'btnBuscar': 'Filtrar'})
+    if es_extraordinaria:
+        datos['tipo'] = 'on'  # checkbox marcado; desmarcado = campo ausente
+
+    inicio = time.perf_counter()
+    if metodo == "get":
+        response = session.get(url, params=datos, timeout=(10, 60))
+    else:
+        response = session.post(url, data=datos, timeout=(10, 60))
+    response.raise_for_status()
+    print(f"   ⏱️ Búsqueda {metodo.upper()} {url}: {time.perf_counter() - inicio:.2f} s")
+
+    articulos = parsear_articulos(response.text)
+    print(f"   📄 TOTAL ARTÍCULOS: {len(articulos)}")
+
+    if not articulos:
+        from bs4 import BeautifulSoup
+        texto = BeautifulSoup(response.text, "html.parser").get_text(" ", strip=True).lower()
+        if any(m in texto for m in MARCADORES_SIN_RESULTADOS):
+            print("   ℹ️ La búsqueda no devolvió resultados")
+            return []
+        raise RespuestaNoReconocida(f"sin artículos ni aviso de 'sin resultados' ({len(response.text)} bytes)")
+
+    candidatos = construir_candidatos(articulos)
+    verificar_resultados(candidatos, fecha_obj, fecha_hasta, es_extraordinaria)
+    return candidatos
+
+# =============================================================================
+# SELENIUM - POOL DE NAVEGADORES
+# =============================================================================
+
+def agrupar_busquedas(fechas_a_procesar, max_dias=None):
+    """
+    Agrupa las ediciones (fecha, es_extraordinaria) en búsquedas por rango:
+    fechas consecutivas del mismo tipo, hasta max_dias días por búsqueda.
+    Retorna [(desde, hasta, es_extraordinaria, [índices en fechas_a_procesar])].
+    Por defecto usa EXTRACCION_RANGO_DIAS (1 = una búsqueda por edición).
+    """
+    max_dias = max_dias or EXTRACCION_RANGO_DIAS
+    busquedas = []
+    abiertas = {}  # es_extraordinaria -> búsqueda en curso de ese tipo
+    for idx, (fecha, es_ext) in enumerate(fechas_a_procesar):
+        actual = abiertas.get(es_ext)
+        if actual and fecha == actual[1] + timedelta(days=1) and (fecha - actual[0]).days < max_dias:
+            actual[1] = fecha
+            actual[3].append(idx)
+        else:
+            actual = [fecha, fecha, es_ext, [idx]]
+            abiertas[es_ext] = actual
+            busquedas.append(actual)
+    return [tuple(b) for b in busquedas]
+
+def repartir_por_fecha(candidatos, fechas_a_procesar, indices):
+    """
+    Reparte los candidatos de una búsqueda por rango entre sus ediciones según FechaPublicacion.
+    Un candidato sin fecha reconocible o fuera del rango va a la primera edición (con aviso).
+    Retorna {índice: [candidatos]} con una lista (quizá vacía) por cada índice.
+    """
+    por_fecha = {fechas_a_procesar[idx][0]: idx for idx in indices}
+    repartidos = {idx: [] for idx in indices}
+    sin_fecha = 0
+    for c in candidatos:
+        idx = por_fecha.get(fecha_publicacion(c))
+        if idx is None:
+            sin_fecha += 1
+            idx = indices[0]
+        repartidos[idx].append(c)
+    if sin_fecha:
+        print(f"   ⚠️ {sin_fecha} candidatos sin fecha del rango — asignados al "
+              f"{fechas_a_procesar[indices[0]][0].strftime('%d/%m/%Y')}")
+    return repartidos
+
+def extraer_ediciones(fechas_a_procesar, pool_size=None, motor=None, al_extraer=None):
+    """
+    Extrae todas las ediciones (fecha, es_extraordinaria) con un pool de workers.
+    - Las fechas consecutivas del mismo tipo se piden en una sola búsqueda por rango
+      (agrupar_busquedas) y los resultados se reparten por FechaPublicacion: menos
+      cargas de página, esperas fijas y sesiones de scroll que una búsqueda por día.
+    - Cada hilo del pool crea su propio driver con un perfil temporal aislado
+      y lo reutiliza para las búsquedas que le toquen.
+    - Con motor='http' cada hilo usa su propia sesión HTTP y solo abre un navegador
+      si la extracción HTTP de una búsqueda falla (respaldo con Selenium).
+    - El resultado se une en el orden de fechas_a_procesar (no en el de llegada),
+      así la deduplicación del PASO 7 conserva siempre la misma primera ocurrencia.
+    - al_extraer(i, fecha, es_extraordinaria, candidatos, fallida), si se pasa, recibe cada
+      edición apenas ella y todas las anteriores están listas (mismo orden), sin esperar al resto.
+      fallida=True si la búsqueda lanzó (queda sin candidatos, pero no es una edición vacía).
+    Por defecto usa DRIVER_POOL_SIZE, MOTOR_EXTRACCION y EXTRACCION_RANGO_DIAS.
+    """
+    if not fechas_a_procesar:
+        return []
+    pool_size = pool_size or DRIVER_POOL_SIZE
+    motor = motor or MOTOR_EXTRACCION
+    busquedas = agrupar_busquedas(fechas_a_procesar)
+    if len(busquedas) < len(fechas_a_procesar):
+        print(f"   🔎 {len(fechas_a_procesar)} ediciones en {len(busquedas)} búsquedas por rango "
+              f"(hasta {EXTRACCION_RANGO_DIAS} días)")
+
+    local = threading.local()
+    lock = threading.Lock()
+    drivers = []  # (driver, perfil_dir) para cerrarlos al final
+    sesiones = []
+
+    def obtener_driver():
+        if getattr(local, 'driver', None) is None:
+            perfil_dir = tempfile.mkdtemp(prefix="chrome_perfil_")
+            try:
+                local.driver = crear_driver(perfil_dir)
+            except Exception:
+                shutil.rmtree(perfil_dir, ignore_errors=True)
+                raise
+            with lock:
+                drivers.append((local.driver, perfil_dir))
+            print(f"   🌐 Navegador iniciado ({threading.current_thread().name})")
+        return local.driver
+
+    def tarea(desde, hasta, es_ext, indices):
+        METRICAS.contar('busquedas')
+        with METRICAS.tramo('busqueda', desde=desde.isoformat(), hasta=hasta.isoformat(),
+                            tipo="extraordinaria" if es_ext else "ordinaria", motor=motor) as tramo:
+            candidatos = None
+            if motor == "http":
+                if getattr(local, 'session', None) is None:
+                    local.session = crear_sesion_http(1)
+                    with lock:
+                        sesiones.append(local.session)
+                try:
+                    candidatos = extraer_normas_http(local.session, desde, es_extraordinaria=es_ext,
+                                                     fecha_hasta=hasta)
+                except Exception as e:
+                    print(f"   ⚠️ Extracción HTTP falló ({e}) — usando Selenium para {desde.strftime('%d/%m/%Y')}"
+                          + (f" al {hasta.strftime('%d/%m/%Y')}" if hasta != desde else ""))
+                    METRICAS.contar('fallback_selenium')
+                    tramo['motor'] = "selenium"
+            if candidatos is None:
+                driver = obtener_driver()
+                try:
+                    candidatos = extraer_normas(driver, desde, es_extraordinaria=es_ext, fecha_hasta=hasta)
+                except Exception as e:
+                    # extraer_normas ya dejó la alerta; el resto de las búsquedas sigue
+                    tramo.update(ok=False, error=type(e).__name__, candidatos=0)
+                    return {idx: [] for idx in indices}, True
+            tramo['candidatos'] = len(candidatos)
+            if len(indices) == 1:
+                return {indices[0]: candidatos}, False
+            return repartir_por_fecha(candidatos, fechas_a_procesar, indices), False
+
+    resultados = [None] * len(fechas_a_procesar)
+    fallidas = set()  # índices de las ediciones cuya búsqueda lanzó
+    workers = min(pool_size, len(busquedas))
+    entregadas = 0
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="chrome") as pool:
+            futuros = [pool.submit(tarea, *busqueda) for busqueda in busquedas]
+            for futuro in as_completed(futuros):
+                repartidos, fallida = futuro.result()
+                for idx, candidatos in repartidos.items():
+                    resultados[idx] = candidatos
+                    if fallida:
+                        fallidas.add(idx)
+                # Entregar en orden de entrada todas las ediciones consecutivas ya listas
+                while entregadas < len(resultados) and resultados[entregadas] is not None:
+                    fecha, es_ext = fechas_a_procesar[entregadas]
+                    candidatos = resultados[entregadas]
+                    fallida = entregadas in fallidas
+                    entregadas += 1
+                    tipo = "EXTRAORDINARIA" if es_ext else "ORDINARIA"
+                    print(f"   📋 6.{entregadas} — {tipo} DEL {fecha.strftime('%d/%m/%Y')}: "
+                          + ("❌ extracción fallida" if fallida else f"{len(candidatos)} candidatos"))
+                    if al_extraer:
+                        al_extraer(entregadas, fecha, es_ext, candidatos, fallida)
+    finally:
+        for session in sesiones:
+            session.close()
+        for driver, perfil_dir in drivers:
+            try:
+                driver.quit()
             except Exception as e:
-                print(f"   ⚠️ Error en artículo {idx}: {e}")
-                continue
+                print(f"   ⚠️ Error cerrando navegador: {e}")
+            shutil.rmtree(perfil_dir, ignore_errors=True)
+
+    return [c for candidatos in resultados for c in candidatos]
+
+# =============================================================================
+# DESCARGA DE PDFs
+# =============================================================================
+
+def crear_sesion_http(pool_size=None):
+    """Sesión HTTP compartida: reutiliza conexiones TLS (keep-alive) entre descargas"""
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    pool_size = pool_size or PDF_WORKERS
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({'User-Agent': USER_AGENT})
+    return session
 
-        print(f"\n8️⃣ CANDIDATOS EXTRAÍDOS: {len(candidatos)}")
-        print(f"{'='*100}\n")
+# Fallos que vale la pena reintentar: el servidor o la red pueden responder bien al rato
+ESTADOS_HTTP_TRANSITORIOS = {408, 429, 500, 502, 503, 504}
 
-        return candidatos
+class PoliticaDescarga:
+    """
+    Política de descarga de PDFs compartida por los hilos del pool durante una ejecución:
+    - timeout_lectura(): se adapta a la espera hasta las cabeceras observada (p95 × factor)
+    - espera(intento, minimo): backoff exponencial con jitter completo antes de reintentar
+    - tomar_reintento(): descuenta del presupuesto de reintentos de la ejecución
+    - umbral_cobertura(): duración a partir de la cual se lanza una petición de cobertura
+    Lee la configuración (PDF_*) al usarse, así sigue a configurar().
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reiniciar()
+
+    def reiniciar(self):
+        with self._lock:
+            self.cabeceras = []   # s hasta las cabeceras, descargas exitosas
+            self.duraciones = []  # s de la descarga completa, descargas exitosas
+            self.reintentos = 0
+
+    @staticmethod
+    def _percentil(valores, q):
+        ordenados = sorted(valores)
+        return ordenados[min(len(ordenados) - 1, int(round(q * (len(ordenados) - 1))))]
+
+    def registrar(self, segundos_cabeceras, segundos_total):
+        with self._lock:
+            self.cabeceras.append(segundos_cabeceras)
+            self.duraciones.append(segundos_total)
+
+    def timeout_lectura(self):
+        with self._lock:
+            if len(self.cabeceras) < PDF_MUESTRAS_MIN:
+                return PDF_TIMEOUT_MAX
+            p95 = self._percentil(self.cabeceras, 0.95)
+        return min(PDF_TIMEOUT_MAX, max(PDF_TIMEOUT_MIN, PDF_TIMEOUT_FACTOR * p95))
+
+    def umbral_cobertura(self):
+        """None si la cobertura está desactivada o todavía no hay muestras suficientes"""
+        if not PDF_COBERTURA_PERCENTIL:
+            return None
+        with self._lock:
+            if len(self.duraciones) < PDF_MUESTRAS_MIN:
+                return None
+            return self._percentil(self.duraciones, PDF_COBERTURA_PERCENTIL / 100)
+
+    def tomar_reintento(self):
+        """True si queda presupuesto (y lo consume); False si ya se agotó en esta ejecución"""
+        with self._lock:
+            if self.reintentos >= PDF_PRESUPUESTO_REINTENTOS:
+                return False
+            self.reintentos += 1
+            return True
+
+    def espera(self, intento, minimo=0.0):
+        """Segundos antes del intento siguiente: uniforme en [0, base·2^(intento-1)], con tope"""
+        tope = min(PDF_BACKOFF_MAX, PDF_BACKOFF_BASE * 2 ** (intento - 1))
+        return min(PDF_BACKOFF_MAX, max(minimo, random.uniform(0, tope)))
 
+POLITICA_PDF = PoliticaDescarga()
+
+def _intento_descarga(session, url, timeout_lectura, cancelado):
+    """
+    Una petición GET en streaming. Valida los magic bytes (%PDF) con el primer bloque antes
+    de bajar el resto y deja el contenido en un SpooledTemporaryFile (memoria hasta
+    PDF_SPOOL_MB, luego disco) mientras calcula su MD5. Si `cancelado` se activa (ganó
+    otra petición de cobertura), corta la descarga.
+    Retorna dict con 'archivo' (abierto y rebobinado, o None), 'md5', 'tamano', 'http',
+    'resultado', 'transitorio', 'retry_after', 'cabeceras' (s), 'segundos' y 'log'.
+    """
+    import requests
+
+    r = {'http': None, 'resultado': 'ok', 'transitorio': False, 'retry_after': 0.0, 'cabeceras': None, 'log': []}
+    log = r['log']
+    archivo = None
+    completo = False
+    md5 = hashlib.md5()
+    tamano = 0
+    inicio = time.perf_counter()
+    try:
+        with session.get(
+            url,
+            timeout=(PDF_TIMEOUT_CONEXION, timeout_lectura),  # conexión, lectura (entre bloques)
+            allow_redirects=True,   # sigue redirecciones explícitamente
+            stream=True
+        ) as response:
+            r['http'] = response.status_code
+            r['cabeceras'] = response.elapsed.total_seconds()
+            log.append(f"HTTP Status:  {response.status_code}")
+            log.append(f"URL final:    {response.url}")
+            log.append(f"Content-Type: {response.headers.get('content-type', 'N/A')}")
+
+            bloques = response.iter_content(chunk_size=PDF_CHUNK_KB * 1024)
+            # Verificar con magic bytes (%PDF) — más confiable que content-type
+            cabecera = b''
+            if response.status_code == 200:
+                for bloque in bloques:
+                    cabecera += bloque
+                    if len(cabecera) >= 8:
+                        break
+            elif response.status_code in ESTADOS_HTTP_TRANSITORIOS:
+                r['transitorio'] = True
+                retry_after = response.headers.get('Retry-After', '')
+                r['retry_after'] = float(retry_after) if retry_after.isdigit() else 0.0
+
+            if cabecera[:4] == b'%PDF':
+                archivo = tempfile.SpooledTemporaryFile(max_size=PDF_SPOOL_MB * 1024 * 1024)
+                archivo.write(cabecera)
+                md5.update(cabecera)
+                tamano = len(cabecera)
+                for bloque in bloques:
+                    if cancelado.is_set():
+                        break
+                    archivo.write(bloque)
+                    md5.update(bloque)
+                    tamano += len(bloque)
+            log.append(f"Tamaño:       {tamano if archivo else len(cabecera)} bytes")
+
+            if cancelado.is_set():
+                r['resultado'] = 'cancelado'
+                log.append("↪️ Cancelada: otra petición trajo el PDF antes")
+            elif archivo is None:
+                r['resultado'] = 'no_pdf' if response.status_code == 200 else f"http_{response.status_code}"
+                log.append(f"⚠️ No es PDF válido (magic bytes: {cabecera[:8]})")
+            elif tamano <= PDF_TAMANO_MINIMO:
+                r['resultado'] = 'no_pdf'
+                log.append(f"⚠️ No es PDF válido (solo {tamano} bytes)")
+            else:
+                archivo.seek(0)
+                completo = True
+
+    except requests.exceptions.Timeout:
+        r['resultado'], r['transitorio'] = 'timeout', True
+        log.append(f"❌ Timeout al descargar PDF (lectura {timeout_lectura:.1f} s)")
+    except requests.exceptions.TooManyRedirects:
+        r['resultado'] = 'redirecciones'
+        log.append(f"❌ Demasiadas redirecciones: {url}")
+    except requests.exceptions.ConnectionError as e:
+        r['resultado'], r['transitorio'] = 'conexion', True
+        log.append(f"❌ Error de conexión: {e}")
     except Exception as e:
-        print(f"❌ ERROR CRÍTICO en extracción: {e}")
-        import traceback
-        traceback.print_exc()
-        return []
+        r['resultado'] = 'error'
+        log.append(f"❌ Error inesperado: {e}")
+
+    if archivo is not None and not completo:
+        # La descarga se cortó a medias o no es un PDF: se descarta el parcial
+        archivo.close()
+        archivo = None
+        if r['resultado'] == 'ok':
+            r['resultado'] = 'incompleto'
+
+    r['archivo'] = archivo
+    r['md5'] = md5.hexdigest() if archivo else None
+    r['tamano'] = tamano
+    r['segundos'] = time.perf_counter() - inicio
+    return r
+
+def _intento_con_cobertura(session, url, politica):
+    """
+    Un intento de descarga; si tarda más que politica.umbral_cobertura() y queda presupuesto,
+    lanza una segunda petición igual. Gana la primera que traiga el PDF; la otra se cancela.
+    Retorna (resultado de _intento_descarga, hubo_cobertura).
+    """
+    timeout_lectura = politica.timeout_lectura()
+    cancelado = threading.Event()
+    umbral = politica.umbral_cobertura()
+    if umbral is None:
+        return _intento_descarga(session, url, timeout_lectura, cancelado), False
+
+    terminado = threading.Condition()
+    terminados = []
+    ganador = []
+
+    def correr():
+        r = _intento_descarga(session, url, timeout_lectura, cancelado)
+        with terminado:
+            if r['archivo'] is not None:
+                if ganador:  # llegó segunda: se descarta
+                    r['archivo'].close()
+                    r['archivo'] = None
+                else:
+                    ganador.append(r)
+                    cancelado.set()
+            terminados.append(r)
+            terminado.notify_all()
+
+    hilo = threading.current_thread().name
+    lanzados = 1
+    threading.Thread(target=correr, name=f"{hilo}-a", daemon=True).start()
+    with terminado:
+        terminado.wait_for(lambda: terminados, timeout=umbral)
+        cubierto = not terminados and politica.tomar_reintento()
+        if cubierto:
+            lanzados = 2
+            threading.Thread(target=correr, name=f"{hilo}-b", daemon=True).start()
+        terminado.wait_for(lambda: ganador or len(terminados) == lanzados)
+        resultado = ganador[0] if ganador else terminados[-1]
+    if cubierto:
+        METRICAS.contar('coberturas')
+        resultado['log'].insert(0, f"🔀 Cobertura: segunda petición tras {umbral:.2f} s")
+    return resultado, cubierto
+
+def descargar_pdf(session, norma, politica=None):
+    """
+    Descarga el PDF de una norma según la política (POLITICA_PDF por defecto): timeout de lectura
+    adaptativo, cobertura opcional y, ante fallos transitorios (timeout, conexión, 5xx, 429),
+    hasta PDF_INTENTOS intentos con backoff y jitter mientras quede presupuesto de reintentos.
+    El resultado de cada URL queda como tramo 'pdf' en METRICAS.
+    Se ejecuta en un hilo del pool: no imprime, acumula el log para mostrarlo
+    junto al resultado y no mezclar líneas de distintas descargas.
+    Retorna dict con 'archivo' (abierto y rebobinado, o None), 'md5', 'tamano', 'segundos',
+    'intentos' y 'log'.
+    """
+    politica = politica or POLITICA_PDF
+    log = []
+    inicio = time.perf_counter()
+    with METRICAS.tramo('pdf', url=norma['pdf_url']) as tramo:
+        coberturas = 0
+        for intento in range(1, PDF_INTENTOS + 1):
+            r, cubierto = _intento_con_cobertura(session, norma['pdf_url'], politica)
+            coberturas += cubierto
+            if intento > 1:
+                log.append(f"🔁 Intento {intento}/{PDF_INTENTOS}")
+            log.extend(r['log'])
+            if r['archivo'] is not None:
+                politica.registrar(r['cabeceras'], r['segundos'])
+                break
+            if not r['transitorio'] or intento == PDF_INTENTOS:
+                break
+            if not politica.tomar_reintento():
+                log.append("⚠️ Presupuesto de reintentos de la ejecución agotado: sin reintento")
+                break
+            METRICAS.contar('reintentos_pdf')
+            espera = politica.espera(intento, minimo=r['retry_after'])
+            log.append(f"⏳ Fallo transitorio ({r['resultado']}): reintento en {espera:.1f} s")
+            time.sleep(espera)
+
+        tramo.update(ok=r['archivo'] is not None, resultado=r['resultado'], http=r['http'],
+                     intentos=intento, coberturas=coberturas, bytes=r['tamano'] if r['archivo'] else 0)
+
+    if r['archivo'] is not None:
+        METRICAS.contar('pdfs_descargados')
+        METRICAS.contar('bytes_pdf_descargados', r['tamano'])
+    else:
+        METRICAS.contar('pdfs_fallidos')
+
+    return {
+        'archivo': r['archivo'],
+        'md5': r['md5'],
+        'tamano': r['tamano'],
+        'segundos': time.perf_counter() - inicio,
+        'intentos': intento,
+        'log': log
+    }
+
+def subir_pdf_descargado(drive_client, folder_id, norma, resultado, etiqueta):
+    """
+    Muestra el log de descargar_pdf() y sube el PDF (hilo principal).
+    Si la descarga o la subida fallan, 'drive_link' queda con el pdf_url original.
+    """
+    print(f"\n   [{etiqueta}] Procesando: {norma['titulo'][:50]}...")
+    for linea in resultado['log']:
+        print(f"      {linea}")
+    print(f"      ⏱️ Descarga:     {resultado['segundos']:.2f} s")
+
+    if resultado['archivo']:
+        with resultado['archivo'] as archivo:
+            link = drive_client.upload_pdf(folder_id, norma['NombreArchivo'], archivo, md5=resultado['md5'])
+        norma['drive_link'] = link if link else norma['pdf_url']
+        if link:
+            print(f"      ✅ PDF válido subido correctamente")
+        else:
+            METRICAS.alerta(f"PDF no subido a Drive: {norma['titulo'][:60]}")
+    else:
+        norma['drive_link'] = norma['pdf_url']
+        METRICAS.alerta(f"PDF no descargado: {norma['titulo'][:60]}")
 
 # =============================================================================
-# MAIN
+# PIPELINE: EXTRACCIÓN → FILTRADO → DESCARGA → SUBIDA (PASOS 6-9 SOLAPADOS)
 # =============================================================================
 
-def main():
-    print("\n" + "="*100)
-    print("🚀 INICIANDO PROCESO PRINCIPAL")
-    print("="*100)
+class PipelineNormas:
+    """
+    Productor/consumidor con una cola acotada (COLA_PIPELINE eventos):
+    - un hilo corre extraer_ediciones() y publica cada edición apenas está lista (en orden);
+    - el hilo principal deduplica y filtra esa edición y manda sus aceptados al pool de descargas
+      mientras las ediciones siguientes se siguen extrayendo;
+    - cada descarga terminada vuelve por la misma cola y el hilo principal la sube a Drive
+      (el cliente de googleapiclient no es thread-safe).
+    Si la cola se llena, las descargas esperan: la memoria en tránsito queda acotada.
+    """
+
+    def __init__(self, drive_client, vectorizador, X_base, indice_normas, folder_name):
+        self.drive_client = drive_client
+        self.vectorizador = vectorizador
+        self.X_base = X_base
+        self.indice_normas = indice_normas
+        self.folder_name = folder_name
+        self.folder_id = None
+
+        self.eventos = queue.Queue(maxsize=COLA_PIPELINE)
+        self.vistos = set()
+        self.total_extraidos = 0
+        self.ya_procesadas = 0
+        self.evaluados = []
+        self.aceptados = []
+        self.prioritarios = []
+        self.por_edicion = {}  # i (1-based, orden de fechas_a_procesar) → {'extraidos', 'aceptados'}
+        self.fallidas = set()  # i de las ediciones cuya extracción falló (no se dan por revisadas)
+        self.tiempos = {'extraccion': 0.0, 'filtrado': 0.0, 'descarga': 0.0, 'subida': 0.0}
+
+    def _extraer(self, fechas_a_procesar):
+        """Hilo productor: ediciones → cola; al final ('fin',) o ('error', excepción)"""
+        inicio = time.perf_counter()
+        try:
+            extraer_ediciones(
+                fechas_a_procesar,
+                al_extraer=lambda i, fecha, es_ext, candidatos, fallida: self.eventos.put(
+                    ('edicion', i, candidatos, fallida))
+            )
+            self.tiempos['extraccion'] = time.perf_counter() - inicio
+            self.eventos.put(('fin',))
+        except Exception as e:
+            self.eventos.put(('error', e))
+
+    def _descargar(self, session, norma):
+        """
+        Hilo del pool de descargas: el resultado vuelve al hilo principal por la cola.
+        Siempre se encola un evento 'pdf' (aunque descargar_pdf lance), si no ejecutar()
+        esperaría para siempre una descarga pendiente.
+        """
+        inicio = time.perf_counter()
+        try:
+            resultado = descargar_pdf(session, norma)
+        except Exception as e:
+            METRICAS.contar('pdfs_fallidos')
+            resultado = {'archivo': None, 'md5': None, 'tamano': 0, 'segundos': time.perf_counter() - inicio,
+                         'intentos': 0, 'log': [f"❌ Error inesperado en la descarga: {type(e).__name__}: {e}"]}
+        self.eventos.put(('pdf', norma, resultado))
+
+    def _procesar_edicion(self, i, candidatos):
+        """PASOS 7-8 para una edición; retorna sus aceptados"""
+        inicio = time.perf_counter()
+        self.total_extraidos += len(candidatos)
+        unicos = deduplicar(candidatos, self.vistos)
+        # Descartar las normas ya procesadas en ejecuciones anteriores (ventanas de fechas solapadas)
+        nuevos = [c for c in unicos if clave_norma(c) not in self.indice_normas]
+        self.ya_procesadas += len(unicos) - len(nuevos)
+        print(f"\n🔬 6.{i} — FILTRAR: {len(candidatos)} extraídos, {len(unicos)} únicos, "
+              f"{len(unicos) - len(nuevos)} ya procesados antes → {len(nuevos)} por evaluar")
+
+        aceptados, prioritarios = filtrar_relevancia(nuevos, self.vectorizador, self.X_base)
+        METRICAS.contar('ya_procesadas', len(unicos) - len(nuevos))
+        METRICAS.contar('evaluados', len(nuevos))
+        METRICAS.contar('aceptados', len(aceptados))
+        METRICAS.contar('prioritarios', len(prioritarios))
+        self.evaluados.extend(nuevos)
+        self.aceptados.extend(aceptados)
+        self.prioritarios.extend(prioritarios)
+        self.por_edicion[i] = {'extraidos': len(candidatos), 'aceptados': len(aceptados)}
+
+        # Los descartados quedan registrados ya; los aceptados, cuando lleguen a Sheets (PASO 10)
+        ids_aceptados = {id(c) for c in aceptados}
+        for c in nuevos:
+            if id(c) not in ids_aceptados:
+                self.indice_normas.agregar(clave_norma(c), HOY)
+
+        self.tiempos['filtrado'] += time.perf_counter() - inicio
+        return aceptados
+
+    def _carpeta(self):
+        """Carpeta del día en Drive, creada con el primer aceptado (no quedan carpetas vacías)"""
+        if self.folder_id is None:
+            self.folder_id = self.drive_client.create_folder(DRIVE_FOLDER_ID, self.folder_name) or ''
+            if self.folder_id:
+                print(f"   ✅ Carpeta lista: {self.folder_name}")
+            else:
+                METRICAS.alerta(f"No se pudo crear la carpeta {self.folder_name}: los links quedan al PDF original")
+        return self.folder_id
+
+    def ejecutar(self, fechas_a_procesar):
+        inicio = time.perf_counter()
+        productor = threading.Thread(target=self._extraer, args=(fechas_a_procesar,), name="extraccion", daemon=True)
+        productor.start()
+
+        session = crear_sesion_http(PDF_WORKERS * 2 if PDF_COBERTURA_PERCENTIL else PDF_WORKERS)
+        extrayendo = True
+        pendientes = 0
+        error = None
+        subidos = 0
+        try:
+            with ThreadPoolExecutor(max_workers=PDF_WORKERS, thread_name_prefix="pdf") as pool:
+                # Hasta que terminen la extracción y todas las descargas encoladas. Ante un error
+                # se siguen consumiendo eventos (sin procesarlos) para no dejar hilos bloqueados en put().
+                while extrayendo or pendientes:
+                    evento = self.eventos.get()
+                    tipo = evento[0]
+                    try:
+                        if tipo in ('fin', 'error'):
+                            extrayendo = False
+                            if tipo == 'error':
+                                error = error or evento[1]
+                        elif tipo == 'edicion':
+                            if evento[3]:
+                                self.fallidas.add(evento[1])
+                            if error is None:
+                                for norma in self._procesar_edicion(evento[1], evento[2]):
+                                    if self._carpeta():
+                                        pool.submit(self._descargar, session, norma)
+                                        pendientes += 1
+                                    else:
+                                        norma['drive_link'] = norma['pdf_url']
+                        elif tipo == 'pdf':
+                            pendientes -= 1
+                            norma, resultado = evento[1], evento[2]
+                            self.tiempos['descarga'] += resultado['segundos']
+                            if error is None:
+                                inicio_subida = time.perf_counter()
+                                subidos += 1
+                                subir_pdf_descargado(self.drive_client, self.folder_id, norma, resultado,
+                                                     f"PDF {subidos}")
+                                self.tiempos['subida'] += time.perf_counter() - inicio_subida
+                            elif resultado['archivo']:
+                                resultado['archivo'].close()
+                    except Exception as e:
+                        error = error or e
+        finally:
+            session.close()
+        productor.join()
+
+        if error is not None:
+            raise error
+
+        total = time.perf_counter() - inicio
+        print(f"\n   ⏱️ Pipeline: {total:.2f} s en total — extracción {self.tiempos['extraccion']:.2f} s, "
+              f"filtrado {self.tiempos['filtrado']:.2f} s, descargas {self.tiempos['descarga']:.2f} s "
+              f"(suma, {PDF_WORKERS} workers), subidas {self.tiempos['subida']:.2f} s")
+        return self.aceptados
+
+# =============================================================================
+# MAIN
+# =============================================================================
 
+def preparar_ejecucion():
+    """PASOS 1-3, comunes a la ejecución diaria y al backfill. Retorna (drive_client, corpus, vectorizador, X_base)"""
     # -------------------------------------------------------------------------
     # PASO 1: CONECTAR A GOOGLE DRIVE
     # -------------------------------------------------------------------------
     print("\n📁 PASO 1: CONECTAR A GOOGLE DRIVE")
-    drive_client = GoogleDriveClient(CREDENTIALS_JSON)
+    METRICAS.paso("1", "Conectar a Google Drive")
+    drive_client = GoogleDriveClient(CREDENTIALS_JSON, cache_path=os.path.join(CACHE_DIR, 'drive_ids.json'))
 
     # -------------------------------------------------------------------------
     # PASO 2: GESTIONAR CORPUS (crea, actualiza con feedback de Sheets)
     # -------------------------------------------------------------------------
     print("\n🧠 PASO 2: GESTIONAR CORPUS")
-    texto_base = gestionar_corpus(drive_client, SPREADSHEET_ID, DRIVE_FOLDER_ID)
+    METRICAS.paso("2", "Gestionar corpus")
+    corpus = gestionar_corpus(drive_client, SPREADSHEET_ID, DRIVE_FOLDER_ID)
 
     # -------------------------------------------------------------------------
     # PASO 3: INICIALIZAR VECTORIZADOR TF-IDF
     # -------------------------------------------------------------------------
     print("\n🤖 PASO 3: INICIALIZAR VECTORIZADOR TF-IDF")
-    vectorizador = TfidfVectorizer(lowercase=True, ngram_range=(1, 2), max_features=3000)
-    vectorizador.fit([texto_base])
-    X_base = vectorizador.transform([texto_base])
+    METRICAS.paso("3", "Vectorizador TF-IDF")
+    vectorizador, X_base = obtener_vectorizador(drive_client, DRIVE_FOLDER_ID, corpus)
     print(f"   ✅ Vocabulario: {len(vectorizador.vocabulary_)} términos")
 
+    return drive_client, corpus, vectorizador, X_base
+
+def publicar_resultados(drive_client, corpus, indice_normas, aceptados, mensajes=None):
+    """
+    PASOS 10-12: Sheets y Telegram en hilos; el corpus (Drive) en el hilo principal: Drive y Sheets
+    son servicios distintos de googleapiclient, cada uno con su propia conexión.
+    Sin `mensajes` no se envía Telegram (backfill). Las aceptadas se marcan en el índice solo si
+    llegaron a Sheets; el índice se guarda al final. Retorna True si Sheets quedó al día.
+    Columnas de Sheets: A=Fecha | B=Título | C=FechaPub | D=Sumilla | E=Link | F=Tipo | G=Relevante(S/N)
+    La columna G queda vacía para que puedas marcar feedback manualmente
+    """
+    rows = [
+        [
+            HOY.strftime("%Y-%m-%d"),
+            norma.get('titulo', ''),
+            norma.get('FechaPublicacion', ''),
+            norma.get('Sumilla', ''),
+            norma.get('drive_link', ''),
+            norma.get('TipoEdicion', ''),
+            ''  # Col G: "Relevante (S/N)" — deja vacío para feedback manual
+        ]
+        for norma in aceptados
+    ]
+
+    with ThreadPoolExecutor(max_workers=2, thread_name_prefix="cierre") as pool:
+        futuro_sheets = None
+        if aceptados:
+            drive_client.sheets_service  # construir el servicio aquí, no en el hilo
+            futuro_sheets = pool.submit(drive_client.append_to_sheet, SPREADSHEET_ID, 'A:G', rows)
+        futuro_telegram = None
+        if mensajes is not None:
+            print(f"\n💬 PASO 12: ENVIANDO TELEGRAM ({len(mensajes)} mensaje{'s' if len(mensajes) != 1 else ''})...")
+            futuro_telegram = pool.submit(enviar_mensajes_telegram, mensajes, TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID)
+
+        # PASO 11: corpus con las normas aceptadas
+        # Único punto de escritura: incluye el feedback aplicado en el PASO 2
+        print("\n🧠 PASO 11: ACTUALIZANDO CORPUS...")
+        if aceptados:
+            nuevas = sum(corpus.agregar(n['texto_completo'], 'auto', HOY) for n in aceptados)
+            print(f"   ✅ {nuevas} líneas nuevas ({len(aceptados) - nuevas} ya estaban en el corpus)")
+        if not guardar_corpus(drive_client, DRIVE_FOLDER_ID, corpus):
+            METRICAS.alerta("No se pudo guardar el corpus en Drive")
+
+        sheets_ok = futuro_sheets.result() is not None if futuro_sheets else False
+        if futuro_telegram and not futuro_telegram.result():
+            METRICAS.alerta("No se pudieron enviar todos los mensajes de Telegram")
+
+    if aceptados:
+        print("\n📊 PASO 10: GOOGLE SHEETS")
+        if sheets_ok:
+            for norma in aceptados:
+                indice_normas.agregar(clave_norma(norma), HOY)
+            print(f"   ✅ {len(rows)} filas agregadas")
+        else:
+            print("   ⚠️ Las normas aceptadas no se marcan como procesadas: se reintentarán en la próxima ejecución")
+            METRICAS.alerta(f"No se pudieron agregar {len(rows)} filas a Sheets")
+        print(f"   ℹ️  Recuerda: puedes marcar S o N en columna G para mejorar el filtrado")
+
+    if not guardar_indice_normas(drive_client, DRIVE_FOLDER_ID, indice_normas):
+        METRICAS.alerta("No se pudo guardar el índice de normas procesadas en Drive")
+    return sheets_ok or not aceptados
+
+def main():
+    print("\n" + "="*100)
+    print("🚀 INICIANDO PROCESO PRINCIPAL")
+    print("="*100)
+    METRICAS.reiniciar()
+    POLITICA_PDF.reiniciar()
+
+    drive_client, corpus, vectorizador, X_base = preparar_ejecucion()
+
     # -------------------------------------------------------------------------
     # PASO 4: GENERAR FECHAS A REVISAR
     # -------------------------------------------------------------------------
     print("\n📅 PASO 4: GENERAR FECHAS A REVISAR")
+    METRICAS.paso("4", "Fechas a revisar")
     fechas_a_procesar = []
 
     if DIA_SEMANA == 0:  # Lunes
@@ -873,197 +3419,38 @@ def main():
         print(f"      • Extraordinaria: {ayer.strftime('%d/%m/%Y')}")
 
     # -------------------------------------------------------------------------
-    # PASO 5: INICIAR NAVEGADOR
+    # PASO 5: POOL DE NAVEGADORES
     # -------------------------------------------------------------------------
-    print("\n🌐 PASO 5: INICIAR NAVEGADOR")
-    driver = crear_driver()
-    print("   ✅ Navegador iniciado")
+    print("\n🌐 PASO 5: POOL DE NAVEGADORES")
+    METRICAS.paso("5", "Pool de navegadores")
+    print(f"   ✅ Hasta {min(DRIVER_POOL_SIZE, len(fechas_a_procesar))} workers en paralelo (DRIVER_POOL_SIZE={DRIVER_POOL_SIZE})")
+    print(f"   ⚙️ Motor de extracción: {MOTOR_EXTRACCION}")
 
     # -------------------------------------------------------------------------
-    # PASO 6: EXTRAER NORMAS
+    # PASOS 6-9: EXTRAER, DEDUPLICAR, FILTRAR Y DESCARGAR PDFs — en pipeline:
+    # cada edición se filtra y sus PDFs se descargan mientras se extraen las siguientes
     # -------------------------------------------------------------------------
-    print("\n📰 PASO 6: EXTRAER NORMAS")
-    todos_candidatos = []
-
-    for i, (fecha, es_ext) in enumerate(fechas_a_procesar, 1):
-        tipo = "EXTRAORDINARIA" if es_ext else "ORDINARIA"
-        print(f"\n📋 6.{i} — EXTRAYENDO {tipo} DEL {fecha.strftime('%d/%m/%Y')}:")
-        candidatos = extraer_normas(driver, fecha, es_extraordinaria=es_ext)
-        print(f"   ✅ Extraídos: {len(candidatos)} candidatos")
-        todos_candidatos.extend(candidatos)
-        time.sleep(3)
-
-    driver.quit()
-    print("\n✅ Navegador cerrado")
-
-    # -------------------------------------------------------------------------
-    # PASO 7: DEDUPLICAR — incluye TipoEdicion en la clave
-    # -------------------------------------------------------------------------
-    print("\n🔄 PASO 7: DEDUPLICAR")
-    vistos = set()
-    candidatos_unicos = []
-
-    for c in todos_candidatos:
-        key = (
-            c['titulo'].strip().lower(),
-            c.get('FechaPublicacion', ''),
-            c.get('TipoEdicion', '').strip().lower()
-        )
-        if key not in vistos and key[0]:
-            vistos.add(key)
-            candidatos_unicos.append(c)
-
-    print(f"   Total extraído: {len(todos_candidatos)}")
-    print(f"   ✅ Únicos: {len(candidatos_unicos)}")
-
-    # -------------------------------------------------------------------------
-    # PASO 8: FILTRAR RELEVANCIA
-    # -------------------------------------------------------------------------
-    print("\n🔬 PASO 8: FILTRAR RELEVANCIA")
-    aceptados = []
-    prioritarios = []
-
-    for i, c in enumerate(candidatos_unicos, 1):
-        # Nivel 1: sector prioritario en <h4>
-        es_prioritario, sector_match = es_sector_prioritario(c['sector'])
-
-        if es_prioritario:
-            aceptados.append(c)
-            prioritarios.append(c)
-            print(f"   [{i}/{len(candidatos_unicos)}] ⭐ SECTOR PRIORITARIO: {c['titulo'][:60]}")
-        else:
-            # Niveles 2-4: entidad en texto, palabras obligatorias, TF-IDF
-            relevante, razon = evaluar_relevancia(
-                c['texto_completo'], c['sector'], vectorizador, X_base
-            )
-            if relevante:
-                aceptados.append(c)
-                print(f"   [{i}/{len(candidatos_unicos)}] ✅ RELEVANTE ({razon}): {c['titulo'][:60]}")
-            else:
-                print(f"   [{i}/{len(candidatos_unicos)}] ❌ DESCARTADO ({razon}): {c['titulo'][:60]}")
-
-    print(f"\n✅ TOTAL ACEPTADOS: {len(aceptados)}")
-
-    # -------------------------------------------------------------------------
-    # PASO 9: DESCARGAR Y SUBIR PDFs
-    # -------------------------------------------------------------------------
-    folder_id = None
+    print("\n📰 PASOS 6-9: EXTRAER → FILTRAR → DESCARGAR (en paralelo)")
+    METRICAS.paso("6-9", "Extraer, filtrar y descargar PDFs")
+    indice_normas = cargar_indice_normas(drive_client, DRIVE_FOLDER_ID)
     folder_name = HOY.strftime("%Y-%m-%d")
-
-    if aceptados:
-        print("\n📥 PASO 9: DESCARGAR PDFs")
-        folder_id = drive_client.create_folder(DRIVE_FOLDER_ID, folder_name)
-
-        if folder_id:
-            print(f"   ✅ Carpeta lista: {folder_name}")
-
-            for i, norma in enumerate(aceptados, 1):
-                print(f"\n   [{i}/{len(aceptados)}] Procesando: {norma['titulo'][:50]}...")
-                try:
-                    response = requests.get(
-                        norma['pdf_url'],
-                        timeout=(10, 60),       # 10s conexión, 60s lectura
-                        allow_redirects=True,   # sigue redirecciones explícitamente
-                        headers={'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
-                    )
-                    print(f"      HTTP Status:  {response.status_code}")
-                    print(f"      URL final:    {response.url}")
-                    print(f"      Content-Type: {response.headers.get('content-type', 'N/A')}")
-                    print(f"      Tamaño:       {len(response.content)} bytes")
-
-                    # Verificar con magic bytes (%PDF) — más confiable que content-type
-                    es_pdf_valido = (
-                        response.status_code == 200 and
-                        len(response.content) > 500 and
-                        response.content[:4] == b'%PDF'
-                    )
-
-                    if es_pdf_valido:
-                        filename = norma['NombreArchivo']
-                        link = drive_client.upload_pdf(folder_id, filename, response.content)
-                        norma['drive_link'] = link if link else norma['pdf_url']
-                        print(f"      ✅ PDF válido subido correctamente")
-                    else:
-                        print(f"      ⚠️ No es PDF válido (magic bytes: {response.content[:8]})")
-                        norma['drive_link'] = norma['pdf_url']
-
-                except requests.exceptions.Timeout:
-                    print(f"      ❌ Timeout al descargar PDF")
-                    norma['drive_link'] = norma['pdf_url']
-                except requests.exceptions.TooManyRedirects:
-                    print(f"      ❌ Demasiadas redirecciones: {norma['pdf_url']}")
-                    norma['drive_link'] = norma['pdf_url']
-                except Exception as e:
-                    print(f"      ❌ Error inesperado: {e}")
-                    norma['drive_link'] = norma['pdf_url']
-
-    # -------------------------------------------------------------------------
-    # PASO 10: GOOGLE SHEETS
-    # Columnas: A=Fecha | B=Título | C=FechaPub | D=Sumilla | E=Link | F=Tipo | G=Relevante(S/N)
-    # La columna G queda vacía para que puedas marcar feedback manualmente
-    # -------------------------------------------------------------------------
-    if aceptados:
-        print("\n📊 PASO 10: ACTUALIZANDO GOOGLE SHEETS...")
-        rows = []
-        for norma in aceptados:
-            rows.append([
-                HOY.strftime("%Y-%m-%d"),
-                norma.get('titulo', ''),
-                norma.get('FechaPublicacion', ''),
-                norma.get('Sumilla', ''),
-                norma.get('drive_link', ''),
-                norma.get('TipoEdicion', ''),
-                ''  # Col G: "Relevante (S/N)" — deja vacío para feedback manual
-            ])
-        drive_client.append_to_sheet(SPREADSHEET_ID, 'A:G', rows)
-        print(f"   ✅ {len(rows)} filas agregadas")
-        print(f"   ℹ️  Recuerda: puedes marcar S o N en columna G para mejorar el filtrado")
-
-    # -------------------------------------------------------------------------
-    # PASO 11: ACTUALIZAR CORPUS con normas aceptadas del día
-    # -------------------------------------------------------------------------
-    if aceptados:
-        print("\n🧠 PASO 11: ACTUALIZANDO CORPUS CON NORMAS DE HOY...")
-        nuevo_contenido = "\n".join([n['texto_completo'] for n in aceptados])
-        corpus_actualizado = texto_base + "\n" + nuevo_contenido
-        drive_client.upload_text_file(DRIVE_FOLDER_ID, 'corpus_hidrocarburos.txt', corpus_actualizado)
+    pipeline = PipelineNormas(drive_client, vectorizador, X_base, indice_normas, folder_name)
+    aceptados = pipeline.ejecutar(fechas_a_procesar)
+    prioritarios = pipeline.prioritarios
+    candidatos_unicos = pipeline.evaluados
+    folder_id = pipeline.folder_id
+    print("\n✅ Navegadores cerrados")
+    print(f"   Total extraído: {pipeline.total_extraidos}")
+    print(f"   ♻️ Ya procesadas antes: {pipeline.ya_procesadas}")
+    print(f"   📋 Evaluadas: {len(candidatos_unicos)}")
+    print(f"\n✅ TOTAL ACEPTADOS: {len(aceptados)}")
 
     # -------------------------------------------------------------------------
-    # PASO 12: TELEGRAM
+    # PASOS 10-12: SHEETS, CORPUS Y TELEGRAM — independientes entre sí, en paralelo
     # -------------------------------------------------------------------------
-    print("\n💬 PASO 12: ENVIANDO TELEGRAM...")
-
-    if aceptados:
-        if DIA_SEMANA == 0:
-            fecha_inicio = (HOY - timedelta(days=3)).strftime('%d/%m/%y')
-            fecha_fin = HOY.strftime('%d/%m/%y')
-            mensaje = f"Buen día equipo, se envía la revisión de normas relevantes al sector del {fecha_inicio} al {fecha_fin}\n\n"
-        else:
-            mensaje = f"Buen día equipo, se envía la revisión de normas relevantes al sector {HOY.strftime('%d/%m/%y')}\n\n"
-
-        for norma in aceptados:
-            tipo_etiqueta = ""
-            if str(norma.get('TipoEdicion', '')).strip().lower() == "extraordinaria":
-                tipo_etiqueta = " (Extraordinaria)"
-            mensaje += f"<b>{norma['titulo']}{tipo_etiqueta}</b>\n"
-            mensaje += f"{norma.get('Sumilla', '')}\n\n"
-    else:
-        if DIA_SEMANA == 0:
-            fecha_inicio = (HOY - timedelta(days=3)).strftime('%d/%m/%y')
-            fecha_fin = HOY.strftime('%d/%m/%y')
-            mensaje = (
-                f"Buen día equipo, el día de hoy no se encontraron normas relevantes del sector.\n\n"
-                f"📅 Periodo revisado: del {fecha_inicio} al {fecha_fin}"
-            )
-        else:
-            ayer = HOY - timedelta(days=1)
-            mensaje = (
-                f"Buen día equipo, el día de hoy no se encontraron normas relevantes del sector.\n\n"
-                f"📅 Extraordinaria {ayer.strftime('%d/%m/%y')}\n"
-                f"📅 Ordinaria {HOY.strftime('%d/%m/%y')}"
-            )
-
-    enviar_telegram(mensaje, TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID)
+    print("\n📤 PASOS 10-12: SHEETS, CORPUS Y TELEGRAM (en paralelo)")
+    METRICAS.paso("10-12", "Sheets, corpus y Telegram")
+    publicar_resultados(drive_client, corpus, indice_normas, aceptados, armar_mensajes_telegram(aceptados))
 
     # -------------------------------------------------------------------------
     # RESUMEN FINAL
@@ -1076,14 +3463,152 @@ def main():
     print(f"   📋 Total evaluadas:    {len(candidatos_unicos)}")
     if aceptados and folder_id:
         print(f"   📁 Carpeta Drive:     {folder_name}")
+    stats = drive_client.cache_stats
+    print(f"   ♻️ PDFs reutilizados:  {drive_client.pdf_reutilizados}")
+    print(f"   🗂️ Caché IDs Drive:    {stats['en_memoria']} aciertos sin llamada, "
+          f"{stats['verificados']} verificados (get), {stats['fallos']} consultas list, {stats['invalidos']} IDs inválidos "
+          f"→ {stats['en_memoria'] - stats['invalidos']} llamadas ahorradas")
     print("="*80)
+    drive_client.guardar_cache_ids()
+    exportar_metricas()
+
+# =============================================================================
+# BACKFILL: RANGO DE FECHAS CON REANUDACIÓN
+# =============================================================================
+
+NOMBRE_PROGRESO_BACKFILL = 'backfill_progreso.json'
+
+def cargar_progreso_backfill(drive_client, drive_folder_id):
+    """
+    Fechas ya completadas por backfills anteriores ({'fechas': {aaaa-mm-dd: detalle}}).
+    Se unen la copia de Drive y la de CACHE_DIR: si una no se pudo escribir, la otra
+    igual evita repetir esas fechas.
+    """
+    fuentes = []
+    ruta_local = os.path.join(CACHE_DIR, NOMBRE_PROGRESO_BACKFILL)
+    if os.path.exists(ruta_local):
+        with open(ruta_local, 'rb') as f:
+            fuentes.append(f.read())
+    file_id = drive_client.get_file_by_name(drive_folder_id, NOMBRE_PROGRESO_BACKFILL)
+    data = drive_client.download_bytes(file_id) if file_id else None
+    if data:
+        fuentes.append(data)
+
+    progreso = {'fechas': {}}
+    for data in fuentes:
+        try:
+            progreso['fechas'].update(json.loads(data.decode('utf-8')).get('fechas', {}))
+        except (ValueError, AttributeError) as e:
+            print(f"   ⚠️ Progreso de backfill ilegible, se ignora: {e}")
+    print(f"   🗂️ Progreso de backfill: {len(progreso['fechas'])} fechas ya completadas")
+    return progreso
+
+def guardar_progreso_backfill(drive_client, drive_folder_id, progreso):
+    data = json.dumps(progreso, ensure_ascii=False, indent=1, sort_keys=True).encode('utf-8')
+    guardar_cache_local(NOMBRE_PROGRESO_BACKFILL, data)
+    return drive_client.upload_bytes(drive_folder_id, NOMBRE_PROGRESO_BACKFILL, data, 'application/json')
+
+def backfill(desde, hasta):
+    """
+    Revisa la edición ordinaria y la extraordinaria de cada día entre `desde` y `hasta`
+    (incluidos), en lotes de BACKFILL_LOTE_DIAS días. Cada lote pasa por el mismo pipeline
+    que la ejecución diaria (extracción en paralelo, filtrado, PDFs a Drive) y luego por
+    Sheets, corpus e índice una sola vez. Sus fechas se registran como completadas solo
+    cuando Sheets quedó al día y sus dos ediciones se extrajeron (vacías está bien; con
+    error no): una ejecución interrumpida se reanuda en el lote que faltó y una fecha cuya
+    extracción falló queda pendiente. No envía Telegram.
+    """
+    print("\n" + "="*100)
+    print(f"🚀 BACKFILL: {desde.strftime('%d/%m/%Y')} → {hasta.strftime('%d/%m/%Y')}")
+    print("="*100)
+    METRICAS.reiniciar()
+    POLITICA_PDF.reiniciar()
+
+    if hasta > HOY:
+        print(f"   ⚠️ Fecha final en el futuro, se revisa hasta hoy ({HOY.strftime('%d/%m/%Y')})")
+        hasta = HOY
+    if desde > hasta:
+        raise ValueError(f"Rango vacío: {desde.isoformat()} es posterior a {hasta.isoformat()}")
+
+    drive_client, corpus, vectorizador, X_base = preparar_ejecucion()
+
+    print("\n📅 PASO 4: FECHAS DEL RANGO")
+    METRICAS.paso("4", "Fechas del backfill")
+    progreso = cargar_progreso_backfill(drive_client, DRIVE_FOLDER_ID)
+    dias = [desde + timedelta(days=i) for i in range((hasta - desde).days + 1)]
+    pendientes = [d for d in dias if d.isoformat() not in progreso['fechas']]
+    lotes = [pendientes[i:i + BACKFILL_LOTE_DIAS] for i in range(0, len(pendientes), BACKFILL_LOTE_DIAS)]
+    print(f"   📅 {len(dias)} días en el rango, {len(dias) - len(pendientes)} ya completados → "
+          f"{len(pendientes)} pendientes en {len(lotes)} lotes de hasta {BACKFILL_LOTE_DIAS} días")
+    print(f"   ✅ Hasta {DRIVER_POOL_SIZE} workers en paralelo — motor de extracción: {MOTOR_EXTRACCION}")
+
+    indice_normas = cargar_indice_normas(drive_client, DRIVE_FOLDER_ID) if lotes else None
+    total_aceptados = total_evaluados = 0
+    for n, lote in enumerate(lotes, 1):
+        rango = lote[0].isoformat() if len(lote) == 1 else f"{lote[0].isoformat()}_{lote[-1].isoformat()}"
+        print(f"\n📰 LOTE {n}/{len(lotes)}: {rango} ({len(lote)} días, {2 * len(lote)} ediciones)")
+        METRICAS.paso(f"lote {n}", f"Backfill {rango}")
+
+        fechas_a_procesar = [(dia, es_ext) for dia in lote for es_ext in (False, True)]
+        pipeline = PipelineNormas(drive_client, vectorizador, X_base, indice_normas, f"backfill_{rango}")
+        aceptados = pipeline.ejecutar(fechas_a_procesar)
+        total_aceptados += len(aceptados)
+        total_evaluados += len(pipeline.evaluados)
+        print(f"\n✅ LOTE {n}: {pipeline.total_extraidos} extraídas, {len(pipeline.evaluados)} evaluadas, "
+              f"{len(aceptados)} aceptadas")
+
+        if publicar_resultados(drive_client, corpus, indice_normas, aceptados):
+            fallidos = {fechas_a_procesar[idx - 1][0] for idx in pipeline.fallidas}
+            completados = [dia for dia in lote if dia not in fallidos]
+            for idx, (dia, es_ext) in enumerate(fechas_a_procesar, 1):
+                if dia in fallidos:
+                    continue
+                detalle = progreso['fechas'].setdefault(dia.isoformat(), {'completado': HOY.isoformat()})
+                detalle["extraordinaria" if es_ext else "ordinaria"] = pipeline.por_edicion.get(
+                    idx, {'extraidos': 0, 'aceptados': 0})
+            if completados and not guardar_progreso_backfill(drive_client, DRIVE_FOLDER_ID, progreso):
+                METRICAS.alerta("No se pudo guardar el progreso del backfill en Drive (queda la copia local)")
+            print(f"   💾 Progreso: {len(completados)} fechas más registradas como completadas")
+            if fallidos:
+                print(f"   ⚠️ {len(fallidos)} fechas con extracción fallida quedan pendientes: "
+                      + ", ".join(sorted(d.isoformat() for d in fallidos)))
+        else:
+            print(f"   ⚠️ El lote {rango} no se registra como completado: se repetirá al reanudar")
+
+    print("\n" + "="*80)
+    print("🎉 BACKFILL COMPLETADO")
+    print("="*80)
+    print(f"   📅 Días revisados:     {len(pendientes)} (de {len(dias)} en el rango)")
+    print(f"   ✅ Normas aceptadas:   {total_aceptados}")
+    print(f"   📋 Total evaluadas:    {total_evaluados}")
+    print(f"   ♻️ PDFs reutilizados:  {drive_client.pdf_reutilizados}")
+    print("="*80)
+    drive_client.guardar_cache_ids()
+    exportar_metricas()
 
 
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Búsqueda diaria de normas. Con --desde, backfill de un rango de fechas (reanudable)."
+    )
+    parser.add_argument('--desde', type=date.fromisoformat, help="primera fecha del backfill (aaaa-mm-dd)")
+    parser.add_argument('--hasta', type=date.fromisoformat, help="última fecha del backfill (por defecto, hoy)")
+    args = parser.parse_args()
+    if args.hasta and not args.desde:
+        parser.error("--hasta requiere --desde")
+
     try:
-        main()
+        inicializar()
+        if args.desde:
+            backfill(args.desde, args.hasta or HOY)
+        else:
+            main()
     except Exception as e:
         print(f"\n❌ ERROR CRÍTICO: {e}")
         import traceback
         traceback.print_exc()
+        if 'CACHE_DIR' in globals():  # la configuración llegó a cargarse
+            exportar_metricas(error=e)
         exit(1)
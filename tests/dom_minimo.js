@@ -0,0 +1,113 @@
+/*
+ * DOM mínimo para correr en Node los scripts que normas_github ejecuta en el navegador
+ * (driver.execute_script), sin Chrome. Lee por stdin {arbol, script, args}:
+ *   arbol   documento ya parseado: elemento {t, a, c} o texto (string)
+ *   script  cuerpo de la función; recibe `args` en `arguments`
+ * y escribe por stdout el valor que retorna, en JSON.
+ *
+ * Solo lo que usan esos scripts: querySelector(All) con selectores simples
+ * (etiqueta, .clase, [attr], [attr*="v"], [attr="v"], :not([attr])), atributos,
+ * parentNode/nodeName, innerText (sin <script> ni <style>), createTreeWalker con
+ * SHOW_TEXT y filtro, document.readyState ("complete") y window.
+ * Como en el navegador, el contenido de <template> no forma parte del árbol.
+ */
+
+"use strict";
+
+const NodeFilter = { SHOW_TEXT: 4, FILTER_ACCEPT: 1, FILTER_REJECT: 2, FILTER_SKIP: 3 };
+
+class Texto {
+    constructor(valor, padre) {
+        this.nodeType = 3;
+        this.nodeName = "#text";
+        this.nodeValue = valor;
+        this.parentNode = padre;
+    }
+}
+
+class Elemento {
+    constructor(nodo, padre) {
+        this.nodeType = 1;
+        this.tagName = this.nodeName = nodo.t.toUpperCase();
+        this.atributos = Object.assign({}, nodo.a);
+        this.parentNode = padre;
+        const hijos = this.nodeName === "TEMPLATE" ? [] : nodo.c;
+        this.childNodes = hijos.map((h) => (typeof h === "string" ? new Texto(h, this) : new Elemento(h, this)));
+    }
+
+    hasAttribute(nombre) { return Object.prototype.hasOwnProperty.call(this.atributos, nombre); }
+    getAttribute(nombre) { return this.hasAttribute(nombre) ? this.atributos[nombre] : null; }
+    setAttribute(nombre, valor) { this.atributos[nombre] = String(valor); }
+
+    *descendientes() {
+        for (const hijo of this.childNodes) {
+            yield hijo;
+            if (hijo.nodeType === 1) { yield* hijo.descendientes(); }
+        }
+    }
+
+    querySelectorAll(selector) {
+        const coincide = compilar(selector);
+        return [...this.descendientes()].filter((n) => n.nodeType === 1 && coincide(n));
+    }
+
+    querySelector(selector) { return this.querySelectorAll(selector)[0] || null; }
+
+    get innerText() {
+        return [...this.descendientes()]
+            .filter((n) => n.nodeType === 3 && !["SCRIPT", "STYLE"].includes(n.parentNode.nodeName))
+            .map((n) => n.nodeValue).join("");
+    }
+}
+
+function compilar(selector) {
+    const m = /^([a-z0-9]*)((?:\.[\w-]+)*)((?:\[[^\]]+\])*)((?::not\(\[[^\]]+\]\))*)$/i.exec(selector.trim());
+    if (!m) { throw new Error(`selector no soportado: ${selector}`); }
+    const etiqueta = m[1].toUpperCase();
+    const clases = m[2].split(".").filter(Boolean);
+    const atributo = (texto) => {
+        const [, nombre, op, valor] = /^\[([\w-]+)(?:([*]?=)"([^"]*)")?\]$/.exec(texto);
+        return (el) => el.hasAttribute(nombre) &&
+            (!op || (op === "=" ? el.getAttribute(nombre) === valor : el.getAttribute(nombre).includes(valor)));
+    };
+    const con = (m[3].match(/\[[^\]]+\]/g) || []).map(atributo);
+    const sin = (m[4].match(/\[[^\]]+\]/g) || []).map(atributo);
+    return (el) => (!etiqueta || el.nodeName === etiqueta) &&
+        clases.every((c) => (el.getAttribute("class") || "").split(/\s+/).includes(c)) &&
+        con.every((f) => f(el)) && !sin.some((f) => f(el));
+}
+
+function crearTreeWalker(raiz, mostrar, filtro) {
+    const aceptar = typeof filtro === "function" ? filtro : (filtro ? filtro.acceptNode : null);
+    const nodos = [...raiz.descendientes()].filter((n) => n.nodeType === 3 && (mostrar & NodeFilter.SHOW_TEXT) &&
+        (!aceptar || aceptar(n) === NodeFilter.FILTER_ACCEPT));
+    let i = -1;
+    return {
+        currentNode: raiz,
+        nextNode() {
+            i += 1;
+            this.currentNode = i < nodos.length ? nodos[i] : this.currentNode;
+            return i < nodos.length ? this.currentNode : null;
+        },
+    };
+}
+
+let entrada = "";
+process.stdin.setEncoding("utf8");
+process.stdin.on("data", (parte) => { entrada += parte; });
+process.stdin.on("end", () => {
+    const { arbol, script, args } = JSON.parse(entrada);
+    const raiz = new Elemento(arbol, null);
+    globalThis.NodeFilter = NodeFilter;
+    globalThis.window = globalThis;
+    globalThis.document = {
+        documentElement: raiz,
+        body: raiz.querySelector("body"),
+        readyState: "complete",
+        querySelectorAll: (s) => raiz.querySelectorAll(s),
+        querySelector: (s) => raiz.querySelector(s),
+        createTreeWalker: crearTreeWalker,
+    };
+    const resultado = new Function(script).apply(null, args);
+    process.stdout.write(JSON.stringify(resultado === undefined ? null : resultado));
+});
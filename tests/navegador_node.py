@@ -0,0 +1,36 @@
+"""
+Driver mínimo para los tests: corre en Node (dom_minimo.js) los scripts que normas_github
+ejecuta en el navegador, sobre la página ya parseada con lxml. Cada llamada arranca desde
+el HTML original: lo que un script escribe en el DOM no llega a la siguiente.
+"""
+
+import json
+import os
+import subprocess
+
+DOM_MINIMO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "dom_minimo.js")
+
+
+def arbol(el):
+    """Elemento de lxml como {t, a, c} para dom_minimo.js; los comentarios no son texto"""
+    hijos = [el.text] if el.text else []
+    for hijo in el:
+        if isinstance(hijo.tag, str):
+            hijos.append(arbol(hijo))
+        if hijo.tail:
+            hijos.append(hijo.tail)
+    return {"t": el.tag, "a": dict(el.attrib), "c": hijos}
+
+
+class NavegadorNode:
+    """Lo que usan los pasos de extracción de un driver: execute_script() sobre la página"""
+
+    def __init__(self, html):
+        import lxml.html
+        self.arbol = arbol(lxml.html.document_fromstring(html))
+
+    def execute_script(self, script, *args):
+        entrada = json.dumps({"arbol": self.arbol, "script": script, "args": args})
+        salida = subprocess.run(["node", DOM_MINIMO], input=entrada, capture_output=True,
+                                text=True, encoding="utf-8", check=True)
+        return json.loads(salida.stdout)
@@ -0,0 +1,88 @@
+"""
+backfill(): una fecha cuya extracción falló (el navegador se cae, el sitio no responde) no
+queda registrada como completada; al reanudar se vuelve a revisar solo esa fecha.
+
+    python -m pytest -q tests
+"""
+
+import contextlib
+import io
+import json
+import os
+import sys
+from datetime import date
+
+import pytest
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.join(RAIZ, "benchmarks"))
+
+import normas_github as ng
+from dobles import cliente_en_memoria
+from servidor_local import ServidorLocal
+
+DESDE, HASTA = date(2026, 1, 5), date(2026, 1, 7)
+FECHA_CAIDA = date(2026, 1, 6)
+
+
+class NavegadorCaido:
+    """Driver de Selenium que se cae en la primera llamada"""
+
+    def get(self, url):
+        raise RuntimeError("chrome not reachable")
+
+    def quit(self):
+        pass
+
+
+@pytest.fixture
+def entorno(tmp_path, monkeypatch):
+    with ServidorLocal() as servidor, contextlib.redirect_stdout(io.StringIO()):
+        ng.inicializar({
+            "ELPERUANO_BASE_URL": servidor.url,
+            "MOTOR_EXTRACCION": "http",
+            "EXTRACCION_RANGO_DIAS": "1",
+            "BACKFILL_LOTE_DIAS": "7",
+            "NORMAS_CACHE_DIR": str(tmp_path),
+            "DRIVE_FOLDER_ID": "carpeta-benchmark",
+            "SPREADSHEET_ID": "hoja-benchmark",
+        })
+        cliente = cliente_en_memoria(ng)[0]
+        corpus = ng.CorpusNormas()
+        corpus.sembrar_inicial(ng.HOY)
+        vectorizador, X_base = ng.ajustar_vectorizador(*corpus.datos_entrenamiento(ng.HOY))
+        monkeypatch.setattr(ng, "preparar_ejecucion", lambda: (cliente, corpus, vectorizador, X_base))
+        monkeypatch.setattr(ng, "exportar_metricas", lambda *a, **k: None)
+        yield tmp_path / ng.NOMBRE_PROGRESO_BACKFILL
+
+
+def completadas(ruta):
+    with open(ruta, encoding="utf-8") as f:
+        return sorted(json.load(f)["fechas"])
+
+
+def test_fecha_con_extraccion_fallida_queda_pendiente(entorno, monkeypatch):
+    extraer_http = ng.extraer_normas_http
+
+    def http_sin_respuesta(session, fecha, es_extraordinaria=False, fecha_hasta=None):
+        if fecha == FECHA_CAIDA:
+            raise ng.RespuestaNoReconocida("sitio caído")
+        return extraer_http(session, fecha, es_extraordinaria=es_extraordinaria, fecha_hasta=fecha_hasta)
+
+    monkeypatch.setattr(ng, "extraer_normas_http", http_sin_respuesta)
+    monkeypatch.setattr(ng, "crear_driver", lambda perfil_dir=None: NavegadorCaido())
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        ng.backfill(DESDE, HASTA)
+
+    # Las ediciones vacías (sin página grabada) cuentan como revisadas; la caída no
+    assert completadas(entorno) == ["2026-01-05", "2026-01-07"]
+    assert any("Extracción fallida" in a["mensaje"] for a in ng.METRICAS.alertas)
+
+    # Al reanudar con el sitio disponible solo se revisa la fecha que faltó
+    monkeypatch.setattr(ng, "extraer_normas_http", extraer_http)
+    salida = io.StringIO()
+    with contextlib.redirect_stdout(salida):
+        ng.backfill(DESDE, HASTA)
+    assert "2 ya completados → 1 pendientes" in salida.getvalue()
+    assert completadas(entorno) == ["2026-01-05", "2026-01-06", "2026-01-07"]
@@ -0,0 +1,64 @@
+"""
+resultados_listos(): la espera tras buscar termina apenas hay artículos nuevos, aparece un aviso
+de MARCADORES_SIN_RESULTADOS o la página de resultados ya cargó y sigue sin artículos, aunque
+el aviso real no coincida con los marcadores. Corre JS_ESTADO_RESULTADOS en Node (dom_minimo.js);
+sin Node se saltea.
+
+    python -m pytest -q tests
+"""
+
+import contextlib
+import io
+import os
+import shutil
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import normas_github as ng
+from navegador_node import NavegadorNode
+
+pytestmark = pytest.mark.skipif(shutil.which("node") is None, reason="requiere Node")
+
+ARTICULO = '<article class="edicionesoficiales_articulos"{}><h4>ENERGIA Y MINAS</h4></article>'
+# Documento de antes de buscar: JS_MARCAR_ARTICULOS_PREVIOS ya lo marcó
+PREVIO = '<html data-previo="1"><body>{}</body></html>'
+# Documento nuevo que llegó tras enviar el formulario
+NUEVO = '<html><body>{}</body></html>'
+
+
+@pytest.fixture(scope="module", autouse=True)
+def configuracion():
+    with contextlib.redirect_stdout(io.StringIO()):
+        ng.inicializar({"ESPERA_SIN_ARTICULOS": "0"})
+
+
+def estado(html):
+    return ng.resultados_listos(NavegadorNode(html))
+
+
+def test_articulos_nuevos():
+    assert estado(NUEVO.format(ARTICULO.format(""))) == "resultados"
+
+
+def test_articulos_previos_no_cuentan():
+    assert estado(PREVIO.format(ARTICULO.format(' data-previo="1"'))) is False
+
+
+def test_aviso_conocido():
+    assert estado(PREVIO.format("<p>No se encontraron resultados para su búsqueda</p>")) == "vacio"
+
+
+def test_pagina_nueva_sin_articulos_con_aviso_desconocido():
+    assert estado(NUEVO.format("<div class='alerta'>Sin normas para la fecha indicada</div>")) == "vacio"
+
+
+def test_pagina_previa_sin_articulos_sigue_esperando():
+    assert estado(PREVIO.format("<div class='alerta'>Cargando…</div>")) is False
+
+
+def test_pagina_nueva_espera_el_margen(monkeypatch):
+    monkeypatch.setattr(ng, "ESPERA_SIN_ARTICULOS", 60)
+    assert estado(NUEVO.format("<div class='alerta'>Sin normas para la fecha indicada</div>")) is False
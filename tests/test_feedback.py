@@ -0,0 +1,151 @@
+"""
+ingerir_feedback(): lee entera solo la columna G y aplica lo mismo que leer la hoja completa,
+aunque entre ejecuciones se agreguen, editen, inserten, borren u ordenen filas.
+
+    python -m pytest -q tests
+"""
+
+import contextlib
+import io
+import os
+import random
+import sys
+
+import pytest
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.join(RAIZ, "benchmarks"))
+
+import normas_github as ng
+from dobles import cliente_en_memoria
+
+
+@pytest.fixture(scope="module", autouse=True)
+def configuracion():
+    with contextlib.redirect_stdout(io.StringIO()):
+        ng.inicializar({})
+
+
+def fila(n, marca=""):
+    """Fila A:G como la escribe el PASO 10"""
+    return ["2026-01-05", f"RESOLUCION {n:04d}-2026-MINEM/DM", "05/01/2026",
+            f"Aprueban disposiciones sobre hidrocarburos, expediente {n}", "https://drive.local/x", "Ordinaria", marca]
+
+
+def clave(f):
+    return ng.clave_norma({'titulo': f[1], 'FechaPublicacion': f[2], 'TipoEdicion': f[5]})
+
+
+def esperado(filas):
+    """Lo que aplicaría leer la hoja completa: {clave_norma: S/N}, vale la última fila"""
+    return {clave(f): f[6] for f in filas if f[6] in ("S", "N")}
+
+
+class Hoja:
+    def __init__(self, filas):
+        self.cliente, _, self.sheets = cliente_en_memoria(ng, filas_hoja=filas)
+        self.corpus = ng.CorpusNormas()
+
+    @property
+    def filas(self):
+        return self.sheets.filas
+
+    def ingerir(self):
+        """Corre ingerir_feedback y retorna cuántas llamadas hizo a la API"""
+        antes = self.sheets.llamadas
+        with contextlib.redirect_stdout(io.StringIO()):
+            ng.ingerir_feedback(self.cliente, "hoja-benchmark", self.corpus)
+        return self.sheets.llamadas - antes
+
+    def aplicado(self):
+        return {c: v for c, (v, _) in self.corpus.feedback.items()}
+
+    def texto(self, f):
+        return ng.normalizar_texto(f"{f[1]} {f[3]}")
+
+
+def test_sin_cambios_lee_solo_la_columna_g():
+    hoja = Hoja([fila(i, "SN "[i % 3].strip()) for i in range(30)])
+    assert hoja.ingerir() == 3  # G + B/C/F de las etiquetadas + B/D de las "S"
+    assert hoja.aplicado() == esperado(hoja.filas)
+    hoja.filas.extend(fila(i) for i in range(30, 40))  # el PASO 10 agrega filas sin etiqueta
+    assert hoja.ingerir() == 1
+    assert hoja.aplicado() == esperado(hoja.filas)
+
+
+def test_etiqueta_nueva_y_editada():
+    hoja = Hoja([fila(i, "S" if i == 0 else "") for i in range(10)])
+    hoja.ingerir()
+
+    hoja.filas[4][6] = "S"
+    assert hoja.ingerir() == 3  # G + B/C/F de la fila 6 + B/D de la fila 6
+    assert hoja.aplicado() == esperado(hoja.filas)
+    assert hoja.texto(hoja.filas[4]) in hoja.corpus.entradas
+
+    hoja.filas[4][6] = "N"
+    assert hoja.ingerir() == 2  # G + B/C/F de la fila 6: una "N" no necesita el texto
+    assert hoja.aplicado() == esperado(hoja.filas)
+    assert hoja.texto(hoja.filas[4]) not in hoja.corpus.entradas
+    assert hoja.texto(hoja.filas[0]) in hoja.corpus.entradas
+
+
+def test_filas_ordenadas():
+    hoja = Hoja([fila(i, "SN "[i % 3].strip()) for i in range(12)])
+    hoja.ingerir()
+
+    hoja.filas.sort(key=lambda f: f[6] or "Z")  # ordenar por la columna G
+    hoja.ingerir()
+    assert hoja.aplicado() == esperado(hoja.filas)
+
+    # Tras ordenar, la huella de las filas "S" quedó corrida: editar una no puede confundir normas
+    hoja.filas[0][6] = "N"
+    hoja.ingerir()
+    assert hoja.aplicado() == esperado(hoja.filas)
+    assert hoja.texto(hoja.filas[0]) not in hoja.corpus.entradas
+    assert all(hoja.texto(f) in hoja.corpus.entradas for f in hoja.filas if f[6] == "S")
+
+
+def test_fila_insertada_arriba_con_la_misma_etiqueta():
+    hoja = Hoja([fila(i, "S") for i in range(5)])
+    hoja.ingerir()
+    hoja.filas.insert(0, fila(99, "S"))
+    hoja.ingerir()
+    assert hoja.aplicado() == esperado(hoja.filas)
+    assert hoja.texto(fila(99)) in hoja.corpus.entradas
+
+
+def test_fila_borrada_entre_iguales():
+    hoja = Hoja([fila(i, "S") for i in range(5)])
+    hoja.ingerir()
+    borrada = hoja.filas.pop(1)
+    hoja.ingerir()
+    assert hoja.aplicado() == esperado(hoja.filas)
+    assert hoja.texto(borrada) not in hoja.corpus.entradas
+
+
+def test_ediciones_aleatorias():
+    azar = random.Random(20260105)
+    hoja = Hoja([fila(i, azar.choice(["S", "N", "", ""])) for i in range(40)])
+    siguiente = 40
+    for _ in range(150):
+        operacion = azar.choice(["etiquetar", "etiquetar", "agregar", "insertar", "borrar", "ordenar", "mezclar"])
+        if operacion == "etiquetar" and hoja.filas:
+            azar.choice(hoja.filas)[6] = azar.choice(["S", "N", "", "s "])
+        elif operacion == "agregar":
+            hoja.filas.extend(fila(siguiente + k) for k in range(azar.randint(1, 5)))
+            siguiente += 5
+        elif operacion == "insertar":
+            hoja.filas.insert(azar.randint(0, len(hoja.filas)), fila(siguiente, azar.choice(["S", "N", ""])))
+            siguiente += 1
+        elif operacion == "borrar" and hoja.filas:
+            hoja.filas.pop(azar.randrange(len(hoja.filas)))
+        elif operacion == "ordenar":
+            hoja.filas.sort(key=lambda f: (f[6], f[1]), reverse=azar.random() < 0.5)
+        elif operacion == "mezclar":
+            azar.shuffle(hoja.filas)
+        hoja.ingerir()
+        assert hoja.aplicado() == esperado([f[:6] + [f[6].strip().upper()] for f in hoja.filas]), operacion
+        for f in hoja.filas:
+            if f[6].strip().upper() == "S":
+                assert hoja.texto(f) in hoja.corpus.entradas, operacion
@@ -0,0 +1,53 @@
+"""
+_cargar_indice_pdf(): solo recorre las subcarpetas de DRIVE_FOLDER_ID creadas dentro de la
+ventana de INDICE_PDF_DIAS, por vieja que sea la carpeta raíz.
+
+    python -m pytest -q tests
+"""
+
+import contextlib
+import io
+import os
+import sys
+
+import pytest
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.join(RAIZ, "benchmarks"))
+
+import normas_github as ng
+from dobles import cliente_en_memoria
+
+CARPETA = "application/vnd.google-apps.folder"
+RECIENTE = "2100-01-01T00:00:00.000Z"
+VIEJA = "2000-01-01T00:00:00.000Z"
+
+
+@pytest.fixture(scope="module", autouse=True)
+def configuracion():
+    with contextlib.redirect_stdout(io.StringIO()):
+        ng.inicializar({"DRIVE_FOLDER_ID": "carpeta-benchmark", "INDICE_PDF_DIAS": "30"})
+
+
+def agregar(drive, file_id, padre, mime, creado, **meta):
+    drive.archivos[file_id] = dict(name=file_id, parents=[padre], mimeType=mime, trashed=False,
+                                   createdTime=creado, modifiedTime=RECIENTE, **meta)
+
+
+def test_solo_subcarpetas_de_la_ventana():
+    cliente, drive, _ = cliente_en_memoria(ng)
+    for i in range(200):
+        agregar(drive, f"vieja{i}", "carpeta-benchmark", CARPETA, VIEJA)
+    agregar(drive, "hoy", "carpeta-benchmark", CARPETA, RECIENTE)
+    agregar(drive, "pdf-viejo", "vieja7", "application/pdf", VIEJA, md5Checksum="a" * 32)
+    agregar(drive, "pdf-nuevo", "hoy", "application/pdf", RECIENTE, md5Checksum="b" * 32)
+    agregar(drive, "pdf-raiz", "carpeta-benchmark", "application/pdf", VIEJA, md5Checksum="c" * 32)
+
+    salida = io.StringIO()
+    with contextlib.redirect_stdout(salida):
+        indice = cliente._cargar_indice_pdf(carpetas_por_consulta=40)
+
+    assert set(indice) == {"b" * 32, "c" * 32}
+    assert "en 2 carpetas" in salida.getvalue()
+    assert drive.llamadas == 2  # subcarpetas + una consulta de PDFs, no 200 / 40
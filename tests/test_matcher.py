@@ -0,0 +1,75 @@
+"""
+MatcherPalabras contra el criterio que reemplaza: `patron in texto` por categoría y, como
+primer match, el primer patrón de la lista (en el orden en que están escritas) que aparece.
+
+    python -m pytest -q tests
+"""
+
+import contextlib
+import io
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import normas_github as ng
+
+CATEGORIAS = ["entidad", "prioritario", "secundario", "excluir", "obligatoria", "token"]
+
+
+def esperado(categorias, texto):
+    return {c: {p for p in patrones if p in texto} for c, patrones in categorias.items()}
+
+
+def primero_esperado(patrones, texto):
+    return next((p for p in patrones if p in texto), None)
+
+
+def comparar(categorias, textos):
+    matcher = ng.MatcherPalabras(categorias)
+    for texto in textos:
+        encontrados = matcher.buscar(texto)
+        assert encontrados == esperado(categorias, texto), texto
+        for categoria, patrones in categorias.items():
+            assert matcher.primero(categoria, encontrados) == primero_esperado(patrones, texto), (categoria, texto)
+
+
+def test_aleatorio_alfabeto_chico():
+    # Alfabeto de 3 letras: muchos prefijos/sufijos compartidos y solapamientos (enlaces de falla)
+    azar = random.Random(20260105)
+    for _ in range(300):
+        categorias = {}
+        for categoria in azar.sample(CATEGORIAS, azar.randint(1, len(CATEGORIAS))):
+            patrones = ["".join(azar.choice("abc ") for _ in range(azar.randint(1, 6))) for _ in range(50)]
+            categorias[categoria] = dict.fromkeys(patrones)
+        textos = ["".join(azar.choice("abcd ") for _ in range(azar.randint(0, 60))) for _ in range(20)]
+        comparar(categorias, textos)
+
+
+def test_patrones_vacios_y_repetidos_entre_categorias():
+    categorias = {"entidad": dict.fromkeys(["", "minem"]), "token": dict.fromkeys(["minem", "mine", "em"])}
+    comparar(categorias, ["", "minem", "el minem y osinergmin", "mine"])
+
+
+def test_keywords_del_modulo():
+    # Las listas reales, sobre textos armados con fragmentos de sus propios patrones
+    with contextlib.redirect_stdout(io.StringIO()):
+        ng.inicializar({})
+    categorias = {
+        "entidad": dict.fromkeys(ng.normalizar_lote(ng.ENTIDADES_SECTOR)),
+        "prioritario": dict.fromkeys(ng.normalizar_lote(ng.SECTORES_PRIORITARIOS)),
+        "secundario": dict.fromkeys(ng.normalizar_lote(ng.SECTORES_SECUNDARIOS)),
+        "excluir": dict.fromkeys(ng.normalizar_lote(ng.SECTORES_EXCLUIR)),
+        "obligatoria": dict.fromkeys(ng.normalizar_lote(ng.PALABRAS_OBLIGATORIAS)),
+    }
+    todos = [p for patrones in categorias.values() for p in patrones if p]
+    azar = random.Random(7)
+    textos = []
+    for _ in range(300):
+        partes = []
+        for patron in azar.sample(todos, azar.randint(0, 5)):
+            inicio = azar.randint(0, len(patron) - 1)
+            partes.append(patron[inicio:azar.randint(inicio + 1, len(patron))] if azar.random() < 0.5 else patron)
+        textos.append(" ".join(partes))
+    comparar(categorias, textos)
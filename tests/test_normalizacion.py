@@ -0,0 +1,38 @@
+"""
+normalizar_texto() / normalizar_lote(): usables apenas se importa el módulo, sin inicializar();
+configurar() solo recrea la caché LRU si NORMALIZACION_CACHE pide otro tamaño.
+
+    python -m pytest -q tests
+"""
+
+import contextlib
+import io
+import os
+import subprocess
+import sys
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, RAIZ)
+
+import normas_github as ng
+
+
+def test_sin_configurar():
+    # Proceso aparte: en este ya corrieron los inicializar() de otros tests
+    codigo = ("import normas_github as ng; "
+              "print(ng.normalizar_texto('Resolución  N° 001'), ng.normalizar_lote(['Á', None, 'Á']))")
+    salida = subprocess.run([sys.executable, "-c", codigo], cwd=RAIZ, capture_output=True,
+                            text=True, encoding="utf-8", check=True)
+    assert salida.stdout.strip() == "resolucion n 001 ['a', '', 'a']"
+
+
+def test_configurar_conserva_la_cache_por_defecto():
+    with contextlib.redirect_stdout(io.StringIO()):
+        ng.configurar({})
+        normalizar = ng._normalizar
+        ng.configurar({})
+        assert ng._normalizar is normalizar
+        ng.configurar({"NORMALIZACION_CACHE": "8"})
+        assert ng._normalizar.cache_parameters()["maxsize"] == 8
+        ng.configurar({})
+    assert ng._normalizar.cache_parameters()["maxsize"] == ng.NORMALIZACION_CACHE_DEFECTO
@@ -0,0 +1,112 @@
+"""
+parsear_articulos(): el backend lxml tiene que producir exactamente los mismos datos crudos
+y candidatos que BeautifulSoup, sobre las páginas grabadas y sobre casos armados a mano.
+Lo mismo para el modo 'script' (JS_EXTRAER_ARTICULOS_NUEVOS), corrido en Node sobre un
+DOM mínimo (dom_minimo.js) armado con la página ya parseada; sin Node esos casos se saltean.
+
+    python -m pytest -q tests
+"""
+
+import contextlib
+import glob
+import io
+import os
+import shutil
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import normas_github as ng
+from navegador_node import NavegadorNode
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "benchmarks", "fixtures")
+PAGINAS = sorted(glob.glob(os.path.join(FIXTURES, "*.html")))
+
+ARTICULO = """<article class="edicionesoficiales_articulos">{}</article>"""
+
+CASOS = {
+    "script_y_style": ARTICULO.format(
+        '<h4>ENERGIA Y MINAS<script>var sector = "x";</script></h4>'
+        '<h5><a href="/norma/1">DECRETO SUPREMO<style>.t { color: red }</style> N° 001-2026-EM</a></h5>'
+        '<p><b>Fecha:</b> 05/01/2026<script type="text/javascript">track("a < b")</script> Edición</p>'
+        '<input data-url="/pdf/1.pdf" value="1">'),
+    "comentarios": ARTICULO.format(
+        '<h4>ENERGIA <!-- sector --> Y MINAS</h4>'
+        '<h5><a href="/norma/2">RESOLUCIÓN <!-- N° viejo -->MINISTERIAL</a></h5>'
+        '<p>Aprueban <!--x-->el reglamento</p>'),
+    "noscript": ARTICULO.format(
+        '<h4>AMBIENTE</h4><h5>DECRETO LEGISLATIVO</h5>'
+        '<p>Texto visible<noscript> sin js</noscript></p>'),
+    "entidades_y_espacios": ARTICULO.format(
+        '<h4>  ENERGIA&nbsp;Y&nbsp;MINAS </h4><h5><a href="/n?a=1&amp;b=2">LEY  N°&#160;32000</a></h5>'
+        '<p>\n  <strong class="extraordinaria">EDICIÓN EXTRAORDINARIA</strong>\n</p>'
+        '<p><b></b>   </p><input data-url="/pdf/3.pdf">'),
+    "varios_articulos": "<div>" + "".join(ARTICULO.format(
+        f'<h4>SECTOR {i}</h4><h5><a href="/norma/{i}">NORMA {i}</a></h5>'
+        f'<p><b>Fecha:</b> 0{i}/01/2026</p><script>ignorar({i})</script>') for i in range(1, 4)) + "</div>",
+}
+
+
+@pytest.fixture(scope="module", autouse=True)
+def configuracion():
+    with contextlib.redirect_stdout(io.StringIO()):
+        ng.inicializar({})
+
+
+def candidatos(html, backend):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return ng.construir_candidatos(ng.parsear_articulos(html, backend))
+
+
+def datos_en_navegador(html):
+    datos_crudos = []
+    ng.recolectar_articulos_nuevos(NavegadorNode(html), datos_crudos)
+    return datos_crudos
+
+
+con_node = pytest.mark.skipif(shutil.which("node") is None, reason="requiere Node")
+
+
+@pytest.mark.parametrize("ruta", PAGINAS, ids=os.path.basename)
+def test_paginas_grabadas(ruta):
+    with open(ruta, encoding="utf-8") as f:
+        html = f.read()
+    crudos = ng.parsear_articulos(html, "bs4")
+    assert crudos
+    assert ng.parsear_articulos(html, "lxml") == crudos
+    assert candidatos(html, "lxml") == candidatos(html, "bs4")
+
+
+@pytest.mark.parametrize("nombre", sorted(CASOS))
+def test_casos_borde(nombre):
+    html = CASOS[nombre]
+    assert ng.parsear_articulos(html, "lxml") == ng.parsear_articulos(html, "bs4")
+
+
+@con_node
+@pytest.mark.parametrize("ruta", PAGINAS, ids=os.path.basename)
+def test_paginas_grabadas_modo_script(ruta):
+    with open(ruta, encoding="utf-8") as f:
+        html = f.read()
+    assert datos_en_navegador(html) == ng.parsear_articulos(html, "bs4")
+
+
+@con_node
+@pytest.mark.parametrize("nombre", sorted(CASOS))
+def test_casos_borde_modo_script(nombre):
+    html = CASOS[nombre]
+    assert datos_en_navegador(html) == ng.parsear_articulos(html, "bs4")
+
+
+def test_script_y_style_no_aparecen_en_el_texto():
+    crudo, = ng.parsear_articulos(CASOS["script_y_style"], "lxml")
+    assert crudo["sector"] == "ENERGIA Y MINAS"
+    assert crudo["titulo"] == "DECRETO SUPREMO N° 001-2026-EM"
+    assert crudo["parrafos"][0]["texto"] == "Fecha: 05/01/2026 Edición"
+
+
+def test_backend_desconocido():
+    with pytest.raises(ValueError):
+        ng.parsear_articulos(CASOS["comentarios"], "html5lib")
@@ -0,0 +1,101 @@
+"""
+armar_mensajes_telegram(): ninguna parte supera los 4096 caracteres de Telegram (contados en
+unidades UTF-16, como los cuenta la Bot API), el recorte nunca parte una entidad como &amp;
+y una norma que sola no entra en un mensaje se recorta en vez de perderse.
+
+    python -m pytest -q tests
+"""
+
+import contextlib
+import html
+import io
+import os
+import random
+import re
+import sys
+
+import pytest
+
+RAIZ = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.join(RAIZ, "benchmarks"))
+
+import normas_github as ng
+from bot_api_local import LIMITE_TEXTO, validar_html
+
+# '&' que no abre una de las entidades que produce escape(quote=False)
+ENTIDAD_PARTIDA = re.compile(r"&(?!amp;|lt;|gt;)")
+
+
+@pytest.fixture(scope="module", autouse=True)
+def configuracion():
+    with contextlib.redirect_stdout(io.StringIO()):
+        ng.inicializar({})
+
+
+def largo_utf16(texto):
+    return len(texto.encode("utf-16-le")) // 2
+
+
+def revisar(mensajes):
+    for m in mensajes:
+        assert largo_utf16(m) <= LIMITE_TEXTO
+        assert validar_html(m)[0] is None
+        assert not ENTIDAD_PARTIDA.search(m)
+
+
+def titulos(mensaje):
+    return [html.unescape(t) for t in re.findall(r"<b>(.*?)</b>", mensaje, re.S)]
+
+
+def norma(titulo, sumilla="", tipo="Ordinaria"):
+    return {"titulo": titulo, "Sumilla": sumilla, "TipoEdicion": tipo}
+
+
+def test_muchas_normas_se_reparten_en_partes():
+    aceptados = [norma(f"RESOLUCIÓN MINISTERIAL N° {i:03d}-2026-MINEM/DM",
+                       "Aprueban procedimiento & requisitos <anexo> " * 20) for i in range(60)]
+    mensajes = ng.armar_mensajes_telegram(aceptados)
+    assert len(mensajes) > 1
+    revisar(mensajes)
+    assert all(m.endswith(f"/{len(mensajes)})</i>") for m in mensajes)
+    # Ningún bloque se parte ni se pierde: los títulos aparecen enteros y en orden
+    assert [t for m in mensajes for t in titulos(m)] == [n["titulo"] for n in aceptados]
+
+
+@pytest.mark.parametrize("titulo, sumilla", [
+    ("x" * 5000, "sumilla"),
+    ("T&<" * 1700, "corta"),          # cada carácter escapado ocupa hasta 4
+    ("🔋" * 3000, "s"),                # 3000 caracteres de Python, 6000 unidades UTF-16
+    ("DECRETO SUPREMO", "<&>" * 3000),
+])
+def test_norma_que_no_entra_se_recorta(titulo, sumilla):
+    mensajes = ng.armar_mensajes_telegram([norma(titulo, sumilla, "Extraordinaria")])
+    assert len(mensajes) == 1
+    revisar(mensajes)
+    visible, = titulos(mensajes[0])
+    assert visible.endswith(" (Extraordinaria)")
+    visible = visible[:-len(" (Extraordinaria)")]
+    if visible != titulo:
+        assert visible.endswith("…") and titulo.startswith(visible[:-1]) and len(visible) > 1
+
+
+def test_recorte_no_parte_entidades():
+    for maximo in range(1, 40):
+        recortado = ng._recortar_escapado("a&b<c>d" * 5, maximo)
+        assert largo_utf16(recortado) <= maximo
+        assert not ENTIDAD_PARTIDA.search(recortado)
+        assert ("a&b<c>d" * 5).startswith(html.unescape(recortado).rstrip("…"))
+
+
+def test_normas_al_azar():
+    azar = random.Random(20260105)
+    alfabeto = "ab é&<>\n🔋"
+    for _ in range(20):
+        aceptados = [norma("".join(azar.choice(alfabeto) for _ in range(azar.randint(0, 5000))),
+                           "".join(azar.choice(alfabeto) for _ in range(azar.randint(0, 5000))),
+                           azar.choice(["Ordinaria", "Extraordinaria"]))
+                     for _ in range(azar.randint(1, 8))]
+        mensajes = ng.armar_mensajes_telegram(aceptados)
+        revisar(mensajes)
+        assert sum(len(titulos(m)) for m in mensajes) == len(aceptados)